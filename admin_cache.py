@@ -0,0 +1,75 @@
+"""
+Per-process caches for admin checks that would otherwise hit MySQL on every admin request or render.
+
+  admin status   — admin_required's accounts.is_admin lookup, per account. Only positive results are
+                   cached, so a database error never locks an admin out for the TTL.
+  pending count  — the pending access-request badge injected into every admin template.
+
+set_data invalidates both when it changes them (toggle_admin_status, record_access_attempt,
+update_access_attempt_status, ...). Other worker processes catch up when their entry expires.
+
+Configure via Flask config or environment variables:
+  ADMIN_STATUS_CACHE_SECONDS      — default 60
+  PENDING_REQUESTS_CACHE_SECONDS  — default 30
+"""
+import threading
+import time
+
+import settings
+
+DEFAULT_ADMIN_STATUS_SECONDS = 60
+DEFAULT_PENDING_REQUESTS_SECONDS = 30
+
+_lock = threading.Lock()
+_admins = {}
+_pending = None
+_admin_status_ttl = DEFAULT_ADMIN_STATUS_SECONDS
+_pending_ttl = DEFAULT_PENDING_REQUESTS_SECONDS
+
+
+def configure(app=None):
+    global _admin_status_ttl, _pending_ttl
+    _admin_status_ttl = settings.get(app, 'ADMIN_STATUS_CACHE_SECONDS', DEFAULT_ADMIN_STATUS_SECONDS, int)
+    _pending_ttl = settings.get(app, 'PENDING_REQUESTS_CACHE_SECONDS', DEFAULT_PENDING_REQUESTS_SECONDS, int)
+
+
+def is_admin(user_id, loader):
+    """loader(user_id) -> bool (get_data.check_admin_status) on a miss"""
+    if not user_id:
+        return False
+    with _lock:
+        cached_at = _admins.get(user_id)
+        if cached_at is not None and time.monotonic() - cached_at <= _admin_status_ttl:
+            return True
+    admin = loader(user_id)
+    if admin and _admin_status_ttl > 0:
+        with _lock:
+            _admins[user_id] = time.monotonic()
+    return admin
+
+
+def invalidate_admin_status(user_id=None):
+    """Drop one account's cached status, or every account's when user_id is None"""
+    with _lock:
+        if user_id is None:
+            _admins.clear()
+        else:
+            _admins.pop(user_id, None)
+
+
+def pending_requests_count(loader):
+    """loader() -> int (set_data.count_pending_access_attempts) on a miss; loader errors propagate"""
+    global _pending
+    with _lock:
+        if _pending is not None and time.monotonic() - _pending[0] <= _pending_ttl:
+            return _pending[1]
+    count = loader()
+    with _lock:
+        _pending = (time.monotonic(), count)
+    return count
+
+
+def invalidate_pending_count():
+    global _pending
+    with _lock:
+        _pending = None
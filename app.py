@@ -1,5 +1,5 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, make_response
-from flask_mysqldb import MySQL
+from db_pool import PooledMySQL
 from forms import PurchaseForm, SaleForm, GroupForm, ListForm, ItemForm, ReportsForm, ButtonForm, ReturnItemForm, CityReportForm, NeighborhoodForm, NeighborhoodReportForm
 from upload_function import *
 from datetime import datetime, date, timedelta
@@ -14,6 +14,7 @@ import json
 import requests
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 try:
     from google.oauth2 import id_token
     from google.auth.transport import requests as google_requests
@@ -23,7 +24,15 @@ except ImportError:
     google_requests = None
 
 import get_data, set_data
+import admin_cache
 import reports_cache
+import response_headers
+import ebay_client
+import ebay_rate_limit
+import ebay_sync
+import ebay_token_cache
+import ebay_token_refresher
+import ebay_xml
 import shippo_rates
 import files
 import function
@@ -36,56 +45,6 @@ app.secret_key = 'your-secret-key-here'  # Required for session functionality
 # Disable automatic Date header to prevent duplicates
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 
-# WSGI Middleware to remove duplicate headers at the WSGI level
-class RemoveDuplicateHeadersMiddleware:
-    """WSGI middleware to remove duplicate headers before sending to nginx"""
-    def __init__(self, app):
-        self.app = app
-    
-    def __call__(self, environ, start_response):
-        def new_start_response(status, response_headers, exc_info=None):
-            # Deduplicate headers - explicitly handle Date header
-            # Convert to list to handle iterator
-            headers_list = list(response_headers)
-            
-            seen_headers = {}
-            deduplicated_headers = []
-            cookie_values = []
-            date_header = None
-            date_key = None
-            
-            # Process all headers and deduplicate
-            for key, value in headers_list:
-                key_lower = key.lower()
-                
-                if key_lower == 'set-cookie':
-                    # Keep all unique Set-Cookie headers
-                    if value not in cookie_values:
-                        cookie_values.append(value)
-                        deduplicated_headers.append((key, value))
-                elif key_lower == 'date':
-                    # Store only the first Date header encountered
-                    if date_header is None:
-                        date_header = value
-                        date_key = key  # Preserve original case
-                    # Skip all subsequent Date headers
-                elif key_lower not in seen_headers:
-                    # Keep first occurrence of other headers
-                    seen_headers[key_lower] = True
-                    deduplicated_headers.append((key, value))
-                # Skip duplicate non-cookie headers
-            
-            # Add Date header only once, at the end (after all other headers)
-            if date_header is not None:
-                deduplicated_headers.append((date_key or 'Date', date_header))
-            
-            return start_response(status, deduplicated_headers, exc_info)
-        
-        return self.app(environ, new_start_response)
-
-# Wrap the Flask app with the middleware
-app.wsgi_app = RemoveDuplicateHeadersMiddleware(app.wsgi_app)
-
 # Initialize the extension
 try:
     app.config.from_object("config.ProductionConfig")
@@ -94,17 +53,35 @@ except Exception as e:
     # Set default configuration
     app.config['GOOGLE_MAPS_API_KEY'] = "YOUR_GOOGLE_MAPS_API_KEY"
 
-# Initialize MySQL with proper error handling
+# Drop duplicate header lines nginx would reject, once per response (see response_headers)
+response_headers.configure_header_normalization(app)
+
+# Initialize MySQL with proper error handling (pooled per worker; see db_pool for MYSQL_POOL_* settings)
 try:
-    mysql = MySQL(app)
-    print("MySQL connection initialized successfully")
-    # Set the MySQL connection in get_data and set_data modules
+    mysql = PooledMySQL(app)
+    print("MySQL connection pool initialized successfully")
+    # Share the pooled connection with get_data, set_data and function
     get_data.set_mysql_connection(mysql)
     set_data.set_mysql_connection(mysql)
+    function.set_mysql_connection(mysql)
 except Exception as e:
     print("Error initializing MySQL: {}".format(e))
     mysql = None
 
+# Report cache backend (shared across workers; see reports_cache for REPORT_CACHE_* settings)
+reports_cache.configure_report_cache(app)
+
+# Client-side eBay quota governor (see ebay_rate_limit for EBAY_RATE_* / EBAY_QUOTA_* settings)
+ebay_rate_limit.configure(app)
+# Pooled keep-alive session for every eBay API call (see ebay_client for EBAY_HTTP_* settings)
+ebay_http = ebay_client.configure_ebay_client(app)
+# Per-process eBay token cache (see ebay_token_cache for EBAY_TOKEN_CACHE_SECONDS)
+ebay_token_cache.configure(app)
+# Shippo rate-quote cache (see shippo_rates for SHIPPO_QUOTE_CACHE_* settings)
+shippo_rates.configure_quote_cache(app)
+# Admin status / pending-request badge caches (see admin_cache)
+admin_cache.configure(app)
+
 def login_required(f):
     """Decorator to check if user is logged in and redirect to login with next parameter"""
     def decorated_function(*args, **kwargs):
@@ -136,8 +113,8 @@ def admin_required(f):
             flash('Access denied. Please log in.', 'error')
             return redirect(url_for('index'))
         
-        # Check admin status in database
-        admin_status = get_data.check_admin_status(current_user_id)
+        # Check admin status in database (cached briefly; see admin_cache)
+        admin_status = admin_cache.is_admin(current_user_id, get_data.check_admin_status)
         if not admin_status:
             flash('Access denied. Admin privileges required.', 'error')
             return redirect(url_for('index'))
@@ -146,56 +123,6 @@ def admin_required(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
-@app.after_request
-def remove_duplicate_headers(response):
-    """Remove duplicate headers to prevent nginx 'upstream sent duplicate header line' errors"""
-    from werkzeug.datastructures import Headers
-    
-    # Convert headers to a list to avoid iteration issues
-    original_headers = list(response.headers)
-    
-    # Build a mapping of lowercase header names to (original_key, value) tuples
-    # This ensures we only keep the first occurrence of each header
-    headers_dict = {}
-    cookie_values = []
-    date_header = None
-    date_key = None
-    
-    # Iterate through all headers and deduplicate
-    for key, value in original_headers:
-        key_lower = key.lower()
-        
-        if key_lower == 'set-cookie':
-            # For Set-Cookie, collect all unique values
-            if value not in cookie_values:
-                cookie_values.append(value)
-        elif key_lower == 'date':
-            # Store only the first Date header
-            if date_header is None:
-                date_header = value
-                date_key = key  # Preserve original case
-        else:
-            # For other headers, keep only the first occurrence
-            if key_lower not in headers_dict:
-                headers_dict[key_lower] = (key, value)
-    
-    # Completely clear and rebuild response headers
-    response.headers.clear()
-    
-    # Add all non-cookie headers using direct assignment (overwrites if exists)
-    for original_key, value in headers_dict.values():
-        response.headers[original_key] = value
-    
-    # Add Date header only once, if it exists
-    if date_header is not None:
-        response.headers[date_key or 'Date'] = date_header
-    
-    # Add Set-Cookie headers separately
-    for cookie_value in cookie_values:
-        response.headers.add('Set-Cookie', cookie_value)
-    
-    return response
-
 # eBay OAuth 2.0 Functions
 def get_ebay_oauth_url():
     """
@@ -271,7 +198,7 @@ def exchange_ebay_code_for_token(authorization_code):
         }
         
         # Make token request
-        response = requests.post(token_url, headers=headers, data=data)
+        response = ebay_http.post(token_url, headers=headers, data=data, retries=0)
         
         if response.status_code == 200:
             token_data = response.json()
@@ -312,9 +239,10 @@ def exchange_ebay_code_for_token(authorization_code):
             'error': f'Token exchange error: {str(e)}'
         }
 
-def refresh_ebay_token(refresh_token):
+def refresh_ebay_token(refresh_token, user_id=None):
     """
-    Refresh eBay access token using refresh token
+    Refresh eBay access token using refresh token.
+    With user_id (background jobs) only the database copy is updated; otherwise the session too.
     """
     try:
         # Determine environment URLs
@@ -336,7 +264,7 @@ def refresh_ebay_token(refresh_token):
         }
         
         # Make refresh request
-        response = requests.post(token_url, headers=headers, data=data)
+        response = ebay_http.post(token_url, headers=headers, data=data)
         
         if response.status_code == 200:
             token_data = response.json()
@@ -345,16 +273,18 @@ def refresh_ebay_token(refresh_token):
             expires_at = datetime.now() + timedelta(seconds=token_data.get('expires_in', 7200))
             
             # Update session tokens
-            session['ebay_access_token'] = token_data.get('access_token')
-            if token_data.get('refresh_token'):
-                session['ebay_refresh_token'] = token_data.get('refresh_token')
-            session['ebay_token_expires'] = expires_at
+            if user_id is None:
+                session['ebay_access_token'] = token_data.get('access_token')
+                if token_data.get('refresh_token'):
+                    session['ebay_refresh_token'] = token_data.get('refresh_token')
+                session['ebay_token_expires'] = expires_at
             
             # Update database tokens
             store_ebay_tokens_in_db(
                 token_data.get('access_token'),
                 token_data.get('refresh_token', refresh_token),  # Use old refresh token if new one not provided
-                expires_at
+                expires_at,
+                user_id=user_id
             )
             
             return {
@@ -394,10 +324,11 @@ def get_valid_ebay_token():
         refresh_token = session.get('ebay_refresh_token')
         token_expires = session.get('ebay_token_expires')
         
-        # If no session tokens, try to get from database
-        if not access_token:
-            db_tokens = get_ebay_tokens_from_db()
-            if db_tokens:
+        # If no session tokens, try to get from database. Also prefer the stored token when it expires
+        # later than the session's copy: another request or worker has refreshed it since.
+        db_tokens = get_ebay_tokens_from_db()
+        if db_tokens and db_tokens.get('access_token'):
+            if not access_token or _ebay_token_is_newer(db_tokens, token_expires):
                 access_token = db_tokens['access_token']
                 refresh_token = db_tokens['refresh_token']
                 token_expires = db_tokens['expires_at']
@@ -425,8 +356,8 @@ def get_valid_ebay_token():
         # Check if token is expired or will expire soon (with 10-minute buffer for safety)
         if token_expires and datetime.now() >= (token_expires - timedelta(minutes=10)):
             if refresh_token:
-                # Try to refresh the token
-                refresh_result = refresh_ebay_token(refresh_token)
+                # Try to refresh the token (one refresh per account at a time)
+                refresh_result = _refresh_ebay_token_once(session.get('id'), refresh_token, token_expires)
                 if refresh_result['success']:
                     return {
                         'success': True,
@@ -491,6 +422,7 @@ def store_ebay_tokens_in_db(access_token, refresh_token, expires_at, user_id=Non
         """, (user_id, access_token, refresh_token, expires_at))
         
         mysql.connection.commit()
+        ebay_token_cache.put(user_id, access_token, refresh_token, expires_at)
         return True
         
     except Exception as e:
@@ -498,9 +430,20 @@ def store_ebay_tokens_in_db(access_token, refresh_token, expires_at, user_id=Non
 
 def get_ebay_tokens_from_db(user_id=None):
     """
-    Retrieve eBay tokens from database for a specific user
+    Retrieve eBay tokens for a specific user (in-process cache first, then the database)
     """
     try:
+        # Use session user ID if not provided
+        if not user_id:
+            user_id = session.get('id')
+        
+        if not user_id:
+            return None
+        
+        cached = ebay_token_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         # Ensure MySQL connection is available
         if not mysql.connection:
             try:
@@ -510,13 +453,6 @@ def get_ebay_tokens_from_db(user_id=None):
         
         cur = mysql.connection.cursor()
         
-        # Use session user ID if not provided
-        if not user_id:
-            user_id = session.get('id')
-        
-        if not user_id:
-            return None
-        
         cur.execute("""
             SELECT access_token, refresh_token, expires_at, user_id
             FROM ebay_tokens
@@ -529,25 +465,77 @@ def get_ebay_tokens_from_db(user_id=None):
         if result:
             # Handle both dict and tuple formats
             if isinstance(result, dict):
-                return {
+                tokens = {
                     'access_token': result.get('access_token'),
                     'refresh_token': result.get('refresh_token'),
                     'expires_at': result.get('expires_at'),
                     'user_id': result.get('user_id')
                 }
             else:
-                return {
+                tokens = {
                     'access_token': result[0],
                     'refresh_token': result[1],
                     'expires_at': result[2],
                     'user_id': result[3] if len(result) > 3 else None
                 }
+            ebay_token_cache.put(user_id, tokens['access_token'], tokens['refresh_token'], tokens['expires_at'])
+            return tokens
         
         return None
         
     except Exception as e:
         return None
 
+def _ebay_token_is_newer(tokens, seen_expires_at):
+    """True when stored tokens expire later than the copy the caller is holding"""
+    expires_at = tokens.get('expires_at') if tokens else None
+    return bool(expires_at and seen_expires_at and expires_at > seen_expires_at)
+
+def _refresh_ebay_token_once(user_id, refresh_token, seen_expires_at, update_session=True):
+    """
+    Refresh an account's token with at most one refresh in flight per account in this process.
+    Requests that queued behind a refresh, here or in another worker process, reuse the token it
+    stored instead of calling eBay again.
+    """
+    if not user_id:
+        return refresh_ebay_token(refresh_token)
+    with ebay_token_cache.refresh_lock(user_id):
+        current = get_ebay_tokens_from_db(user_id)
+        if not _ebay_token_is_newer(current, seen_expires_at):
+            # The cached entry may predate a refresh made by another worker: read the table itself
+            ebay_token_cache.invalidate(user_id)
+            current = get_ebay_tokens_from_db(user_id)
+        if (current and current.get('access_token') and current.get('expires_at')
+                and (seen_expires_at is None or current['expires_at'] > seen_expires_at)
+                and current['expires_at'] > datetime.now() + timedelta(minutes=10)):
+            if update_session:
+                session['ebay_access_token'] = current['access_token']
+                session['ebay_refresh_token'] = current['refresh_token']
+                session['ebay_token_expires'] = current['expires_at']
+            return {'success': True, 'access_token': current['access_token']}
+        return refresh_ebay_token(refresh_token, user_id=None if update_session else user_id)
+
+def _refresh_ebay_token_in_background(user_id, refresh_token, expires_at):
+    """Refresh for the background refresher and force-refresh: no session, tokens stored for user_id"""
+    return _refresh_ebay_token_once(user_id, refresh_token, expires_at, update_session=False)
+
+def get_ebay_token_for_user(user_id):
+    """
+    Valid eBay access token for an account outside a request (background jobs), refreshing it
+    when it expires within 10 minutes. Returns None when the account has no usable token.
+    """
+    db_tokens = get_ebay_tokens_from_db(user_id)
+    if not db_tokens or not db_tokens.get('access_token'):
+        return None
+    access_token = db_tokens['access_token']
+    expires_at = db_tokens.get('expires_at')
+    if access_token.startswith('v^') or not expires_at or datetime.now() < expires_at - timedelta(minutes=10):
+        return access_token
+    if not db_tokens.get('refresh_token'):
+        return None
+    refresh_result = _refresh_ebay_token_once(user_id, db_tokens['refresh_token'], expires_at, update_session=False)
+    return refresh_result['access_token'] if refresh_result['success'] else None
+
 def refresh_token_if_needed():
     """
     Check if token needs refresh and refresh it if necessary
@@ -567,7 +555,7 @@ def refresh_token_if_needed():
             
             # If token expires within 30 minutes, refresh it
             if expires_at <= datetime.now() + timedelta(minutes=30):
-                refresh_result = refresh_ebay_token(db_tokens['refresh_token'])
+                refresh_result = _refresh_ebay_token_once(session.get('id'), db_tokens['refresh_token'], expires_at)
                 return refresh_result['success']
         
         return True  # Token is still valid
@@ -634,6 +622,8 @@ def get_ebay_active_listings():
             'error': 'Unexpected error: {}'.format(str(e))
         }
 
+LEGACY_COMPLETED_LISTINGS_MAX = 200
+
 def get_ebay_completed_listings_legacy(user_token):
     """
     Fetch completed/sold listings using eBay Transaction API for accurate financial data
@@ -641,8 +631,9 @@ def get_ebay_completed_listings_legacy(user_token):
     try:
         import xml.etree.ElementTree as ET
         
-        # First get sold listings to get item IDs
-        sold_items = get_sold_items_basic(user_token)
+        # First get sold listings to get item IDs. Each one costs a transaction lookup below, so keep
+        # to the single 200-entry page this path has always read rather than the whole sold list.
+        sold_items = get_sold_items_basic(user_token, max_items=LEGACY_COMPLETED_LISTINGS_MAX)
         if not sold_items['success']:
             return sold_items
         
@@ -671,22 +662,30 @@ def get_ebay_completed_listings_legacy(user_token):
             'error': 'Transaction API error: {}'.format(str(e))
         }
 
-def get_sold_items_basic(user_token):
+SOLD_LIST_ENTRIES_PER_PAGE = 200
+SOLD_LIST_MAX_PAGES = 100
+
+def iter_sold_items(user_token, entries_per_page=SOLD_LIST_ENTRIES_PER_PAGE, max_pages=SOLD_LIST_MAX_PAGES):
     """
-    Get basic sold items list using GetMyeBaySelling
-    Works with both OAuth tokens and legacy tokens
+    Walk every page of the GetMyeBaySelling SoldList, yielding normalized sold-item records.
+    Each response is streamed through iterparse and every Item/OrderTransaction is dropped once
+    handled, so memory stays bounded by one order rather than by the seller's sold history.
+    Raises RuntimeError for HTTP or eBay API errors.
     """
-    try:
-        import xml.etree.ElementTree as ET
-        
-        url = "https://api.ebay.com/ws/api.dll"
-        
-        # Check if this is an OAuth token (starts with v1.1# or similar)
-        # OAuth tokens might not work with Trading API, so we may need to use a different approach
-        is_oauth = user_token.startswith('v1.1#') or user_token.startswith('v^1.1#') or not user_token.startswith('v^')
-        
-        # For OAuth tokens, we might need to use a different API
-        # But let's try Trading API first - some OAuth tokens might work
+    import xml.etree.ElementTree as ET
+    ns = ebay_xml.NS
+    url = "https://api.ebay.com/ws/api.dll"
+    headers = {
+        'X-EBAY-API-COMPATIBILITY-LEVEL': '1199',
+        'X-EBAY-API-DEV-NAME': app.config.get('EBAY_DEV_NAME', 'your_dev_name'),
+        'X-EBAY-API-APP-NAME': app.config.get('EBAY_APP_NAME', 'your_app_name'),
+        'X-EBAY-API-CERT-NAME': app.config.get('EBAY_CERT_NAME', 'your_cert_name'),
+        'X-EBAY-API-CALL-NAME': 'GetMyeBaySelling',
+        'X-EBAY-API-SITEID': '0',
+        'Content-Type': 'text/xml'
+    }
+    page = 1
+    while page <= max_pages:
         xml_request = """<?xml version="1.0" encoding="utf-8"?>
         <GetMyeBaySellingRequest xmlns="urn:ebay:apis:eBLBaseComponents">
             <RequesterCredentials>
@@ -695,206 +694,77 @@ def get_sold_items_basic(user_token):
             <SoldList>
                 <Include>true</Include>
                 <Pagination>
-                    <EntriesPerPage>200</EntriesPerPage>
-                    <PageNumber>1</PageNumber>
+                    <EntriesPerPage>{}</EntriesPerPage>
+                    <PageNumber>{}</PageNumber>
                 </Pagination>
             </SoldList>
             <DetailLevel>ReturnAll</DetailLevel>
             <Version>1199</Version>
-        </GetMyeBaySellingRequest>""".format(user_token)
-        
-        headers = {
-            'X-EBAY-API-COMPATIBILITY-LEVEL': '1199',
-            'X-EBAY-API-DEV-NAME': app.config.get('EBAY_DEV_NAME', 'your_dev_name'),
-            'X-EBAY-API-APP-NAME': app.config.get('EBAY_APP_NAME', 'your_app_name'),
-            'X-EBAY-API-CERT-NAME': app.config.get('EBAY_CERT_NAME', 'your_cert_name'),
-            'X-EBAY-API-CALL-NAME': 'GetMyeBaySelling',
-            'X-EBAY-API-SITEID': '0',
-            'Content-Type': 'text/xml'
+        </GetMyeBaySellingRequest>""".format(user_token, entries_per_page, page)
+
+        response = ebay_http.post(url, data=xml_request, headers=headers, stream=True)
+        with response:
+            if response.status_code != 200:
+                raise RuntimeError('API error: {} - {}'.format(response.status_code, response.text))
+            response.raw.decode_content = True
+            total_pages = 1
+            page_items = 0
+            in_sold_list = False
+            parents = []
+            for event, elem in ET.iterparse(response.raw, events=('start', 'end')):
+                if event == 'start':
+                    parents.append(elem)
+                    if elem.tag == ns + 'SoldList':
+                        in_sold_list = True
+                    continue
+                parents.pop()
+                tag = elem.tag
+                if tag == ns + 'Errors':
+                    if elem.findtext(ebay_xml.ERROR_SEVERITY) != 'Warning' and elem.find(ebay_xml.ERROR_LONG_MESSAGE) is not None:
+                        raise RuntimeError('eBay API error: {}'.format(elem.findtext(ebay_xml.ERROR_LONG_MESSAGE)))
+                elif in_sold_list and tag == ns + 'Item':
+                    page_items += 1
+                    yield ebay_xml.sold_item(elem)
+                    if parents:
+                        parents[-1].remove(elem)
+                elif in_sold_list and tag == ns + 'OrderTransaction':
+                    if parents:
+                        parents[-1].remove(elem)
+                elif in_sold_list and tag == ns + 'PaginationResult':
+                    total_pages = int(elem.findtext(ns + 'TotalNumberOfPages') or 1)
+                elif tag == ns + 'SoldList':
+                    in_sold_list = False
+        if page_items == 0 or page >= total_pages:
+            return
+        page += 1
+
+def get_sold_items_basic(user_token, max_items=None):
+    """
+    Get sold items using GetMyeBaySelling (all pages, or the first max_items)
+    Works with both OAuth tokens and legacy tokens
+    """
+    try:
+        items = []
+        for record in iter_sold_items(user_token):
+            items.append(record)
+            if max_items and len(items) >= max_items:
+                break
+        return {
+            'success': True,
+            'items': items
+        }
+    except RuntimeError as e:
+        return {
+            'success': False,
+            'error': str(e)
         }
-        
-        response = requests.post(url, data=xml_request, headers=headers)
-        
-        if response.status_code == 200:
-            root = ET.fromstring(response.text)
-            
-            # Check for errors
-            errors = root.findall('.//{urn:ebay:apis:eBLBaseComponents}Errors')
-            if errors:
-                error_msg = errors[0].find('.//{urn:ebay:apis:eBLBaseComponents}LongMessage')
-                if error_msg is not None:
-                    return {
-                        'success': False,
-                        'error': 'eBay API error: {}'.format(error_msg.text)
-                    }
-            
-            # Extract basic item info
-            items = []
-            sold_list = root.find('.//{urn:ebay:apis:eBLBaseComponents}SoldList')
-            if sold_list is not None:
-                item_elements = sold_list.findall('.//{urn:ebay:apis:eBLBaseComponents}Item')
-                for item in item_elements:
-                    item_id = item.find('.//{urn:ebay:apis:eBLBaseComponents}ItemID')
-                    title = item.find('.//{urn:ebay:apis:eBLBaseComponents}Title')
-                    condition = item.find('.//{urn:ebay:apis:eBLBaseComponents}ConditionDisplayName')
-                    quantity = item.find('.//{urn:ebay:apis:eBLBaseComponents}Quantity')
-                    end_time = item.find('.//{urn:ebay:apis:eBLBaseComponents}EndTime')
-                    
-                    # Get price from SellingStatus
-                    selling_status = item.find('.//{urn:ebay:apis:eBLBaseComponents}SellingStatus')
-                    price = 0
-                    currency = 'USD'
-                    if selling_status is not None:
-                        current_price = selling_status.find('.//{urn:ebay:apis:eBLBaseComponents}CurrentPrice')
-                        if current_price is not None:
-                            price = float(current_price.text) if current_price.text else 0
-                            currency_attr = current_price.get('{http://www.w3.org/XML/1998/namespace}currencyID')
-                            if currency_attr:
-                                currency = currency_attr
-                    
-                    # Get image from PictureDetails
-                    image_url = None
-                    picture_details = item.find('.//{urn:ebay:apis:eBLBaseComponents}PictureDetails')
-                    if picture_details is not None:
-                        gallery_url = picture_details.find('.//{urn:ebay:apis:eBLBaseComponents}GalleryURL')
-                        if gallery_url is not None:
-                            image_url = gallery_url.text
-                    
-                    # Get category
-                    primary_category = item.find('.//{urn:ebay:apis:eBLBaseComponents}PrimaryCategoryName')
-                    category_name = primary_category.text if primary_category is not None else 'N/A'
-                    
-                    # Check for cancelled transactions/orders
-                    is_cancelled = False
-                    has_valid_transaction = False
-                    
-                    # Check for cancelled transactions/orders
-                    is_cancelled = False
-                    has_valid_transaction = False
-                    
-                    # Method 1: Check TransactionArray for cancelled transactions
-                    transaction_array = item.find('.//{urn:ebay:apis:eBLBaseComponents}TransactionArray')
-                    if transaction_array is not None:
-                        transactions = transaction_array.findall('.//{urn:ebay:apis:eBLBaseComponents}Transaction')
-                        if len(transactions) > 0:
-                            # Check each transaction
-                            all_cancelled = True
-                            for transaction in transactions:
-                                # Check OrderStatus for cancellation
-                                order_status = transaction.find('.//{urn:ebay:apis:eBLBaseComponents}OrderStatus')
-                                if order_status is not None:
-                                    status_text = order_status.text
-                                    if status_text and ('Cancelled' in status_text or 'Canceled' in status_text):
-                                        # This transaction is cancelled
-                                        continue
-                                    else:
-                                        # Found a non-cancelled transaction
-                                        all_cancelled = False
-                                        has_valid_transaction = True
-                                        break
-                                
-                                # Check TransactionStatus for cancellation
-                                transaction_status = transaction.find('.//{urn:ebay:apis:eBLBaseComponents}Status')
-                                if transaction_status is not None:
-                                    status_text = transaction_status.text
-                                    if status_text and ('Cancelled' in status_text or 'Canceled' in status_text):
-                                        # This transaction is cancelled
-                                        continue
-                                    else:
-                                        # Found a non-cancelled transaction
-                                        all_cancelled = False
-                                        has_valid_transaction = True
-                                        break
-                                
-                                # Check for payment status in transaction
-                                payment_status = transaction.find('.//{urn:ebay:apis:eBLBaseComponents}PaymentStatus')
-                                if payment_status is not None:
-                                    status_text = payment_status.text
-                                    if status_text and ('Cancelled' in status_text or 'Canceled' in status_text or 
-                                                       'Failed' in status_text or 'NoPayment' in status_text):
-                                        # Payment was cancelled/failed
-                                        continue
-                                    else:
-                                        # Payment is valid
-                                        all_cancelled = False
-                                        has_valid_transaction = True
-                                        break
-                                
-                                # Check all text in transaction for payment cancellation
-                                transaction_text = ET.tostring(transaction, encoding='unicode', method='text')
-                                if transaction_text and ('payment' in transaction_text.lower() and 'cancel' in transaction_text.lower()):
-                                    # Payment cancelled mentioned in transaction
-                                    continue
-                                else:
-                                    # No payment cancellation found
-                                    all_cancelled = False
-                                    has_valid_transaction = True
-                                    break
-                                
-                                # If we get here, no cancellation indicators found
-                                all_cancelled = False
-                                has_valid_transaction = True
-                                break
-                            
-                            # If all transactions are cancelled, mark as cancelled
-                            if all_cancelled and len(transactions) > 0:
-                                is_cancelled = True
-                    
-                    # Method 2: Check SellingStatus for listing status
-                    if not is_cancelled and selling_status is not None:
-                        listing_status = selling_status.find('.//{urn:ebay:apis:eBLBaseComponents}ListingStatus')
-                        if listing_status is not None:
-                            status_text = listing_status.text
-                            if status_text and ('Cancelled' in status_text or 'Canceled' in status_text):
-                                is_cancelled = True
-                    
-                    # Method 3: Check for specific cancellation indicators in the item itself
-                    if not is_cancelled:
-                        # Check if there's a cancellation reason or note anywhere in the item
-                        cancel_reason = item.find('.//{urn:ebay:apis:eBLBaseComponents}CancelReason')
-                        if cancel_reason is not None:
-                            is_cancelled = True
-                        
-                        # Check all text content for cancellation keywords
-                        item_text = ET.tostring(item, encoding='unicode', method='text')
-                        if item_text and ('cancel' in item_text.lower() or 'cancelled' in item_text.lower()):
-                            # Only mark as cancelled if we also don't have a valid transaction
-                            if not has_valid_transaction:
-                                is_cancelled = True
-                    
-                    items.append({
-                        'itemId': item_id.text if item_id is not None else 'N/A',
-                        'title': title.text if title is not None else 'N/A',
-                        'description': title.text if title is not None else 'N/A',
-                        'condition': condition.text if condition is not None else 'N/A',
-                        'quantity': int(quantity.text) if quantity is not None and quantity.text else 0,
-                        'sku': item_id.text if item_id is not None else 'N/A',
-                        'end_time': end_time.text if end_time is not None else 'N/A',
-                        'price': price,
-                        'currency': currency,
-                        'image_url': image_url,
-                        'category': category_name,
-                        'status': 'Sold',
-                        'is_cancelled': is_cancelled,
-                        'ebay_url': 'https://www.ebay.com/itm/{}'.format(item_id.text) if item_id is not None else '#'
-                    })
-            
-            return {
-                'success': True,
-                'items': items
-            }
-        else:
-            return {
-                'success': False,
-                'error': 'API error: {} - {}'.format(response.status_code, response.text)
-            }
-            
     except Exception as e:
         return {
             'success': False,
             'error': 'API error: {}'.format(str(e))
         }
 
+
 def get_active_listings_basic(user_token):
     """
     Get active (currently listed) items using GetMyeBaySelling ActiveList.
@@ -934,7 +804,7 @@ def get_active_listings_basic(user_token):
             <DetailLevel>ReturnAll</DetailLevel>
             <Version>1199</Version>
         </GetMyeBaySellingRequest>""".format(user_token, entries_per_page, page)
-            response = requests.post(url, data=xml_request, headers=headers)
+            response = ebay_http.post(url, data=xml_request, headers=headers)
             if response.status_code != 200:
                 return {'success': False, 'error': 'API error: {} - {}'.format(response.status_code, response.text)}
             root = ET.fromstring(response.text)
@@ -1028,7 +898,7 @@ def get_active_listings_sell_api(api_base_url, user_token, max_skus=150):
         limit = 200
         while offset < max_skus:
             url = '{}/sell/inventory/v1/inventory_item?limit={}&offset={}'.format(api_base_url, limit, offset)
-            r = requests.get(url, headers=headers)
+            r = ebay_http.get(url, headers=headers)
             if r.status_code != 200:
                 if offset == 0:
                     return {'success': False, 'error': 'Inventory API error: {} - {}'.format(r.status_code, r.text[:200])}
@@ -1049,16 +919,30 @@ def get_active_listings_sell_api(api_base_url, user_token, max_skus=150):
                 break
         if not skus:
             return {'success': True, 'items': [], 'note_sell': 'No inventory items (listings created outside Inventory API are not included).'}
+        # Pool threads do not inherit the caller's thread-local eBay call priority
+        priority = ebay_rate_limit.current_priority()
+
+        def fetch_offers(entry):
+            offer_url = '{}/sell/inventory/v1/offer?sku={}&marketplace_id=EBAY_US&limit=10'.format(api_base_url, requests.utils.quote(entry['sku'], safe=''))
+            try:
+                with ebay_rate_limit.with_priority(priority):
+                    ro = ebay_http.get(offer_url, headers=headers)
+            except requests.exceptions.RequestException:
+                return []
+            if ro.status_code != 200:
+                return []
+            return ro.json().get('offers', [])
+
+        # One offer lookup per SKU; fan them out (bounded, under the eBay client's connection pool)
+        # so the page costs roughly one round trip instead of one per SKU. map() keeps SKU order.
+        workers = max(1, min(int(app.config.get('EBAY_OFFER_FETCH_CONCURRENCY', 8)), len(skus)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            offers_by_sku = list(pool.map(fetch_offers, skus[:max_skus]))
+
         items = []
-        for entry in skus[:max_skus]:
-            sku = entry['sku']
+        for entry, offers in zip(skus[:max_skus], offers_by_sku):
             title_fallback = entry.get('title') or 'N/A'
-            offer_url = '{}/sell/inventory/v1/offer?sku={}&marketplace_id=EBAY_US&limit=10'.format(api_base_url, requests.utils.quote(sku, safe=''))
-            ro = requests.get(offer_url, headers=headers)
-            if ro.status_code != 200:
-                continue
-            od = ro.json()
-            for offer in od.get('offers', []):
+            for offer in offers:
                 listing = offer.get('listing') or {}
                 listing_id = listing.get('listingId')
                 status = listing.get('listingStatus', '')
@@ -1177,19 +1061,135 @@ def search_ebay_recently_listed(search_term=None, num_items=25):
             'detail': traceback.format_exc()[:500]
         }
 
-def get_item_transaction_details(user_token, item_id):
+def _ebay_order_is_final(order_json):
+    """
+    True once a Fulfillment API order can no longer change: cancelled, fully refunded, or paid and
+    fulfilled with no modification for EBAY_ORDER_SETTLE_DAYS (returns/refunds window).
+    """
+    if not order_json:
+        return False
+    if (order_json.get('cancelStatus') or {}).get('cancelState') == 'CANCELED':
+        return True
+    payment_status = order_json.get('orderPaymentStatus')
+    if payment_status == 'FULLY_REFUNDED':
+        return True
+    if payment_status != 'PAID' or order_json.get('orderFulfillmentStatus') != 'FULFILLED':
+        return False
+    modified = order_json.get('lastModifiedDate') or order_json.get('creationDate')
+    try:
+        modified_at = datetime.strptime(modified[:19], '%Y-%m-%dT%H:%M:%S')
+    except (TypeError, ValueError):
+        return False
+    settle_days = int(app.config.get('EBAY_ORDER_SETTLE_DAYS', 60))
+    return datetime.utcnow() - modified_at > timedelta(days=settle_days)
+
+def _order_created_at(value):
+    """eBay order timestamp (Trading CreatedTime/CreatedDate, Fulfillment creationDate) -> naive UTC datetime"""
+    try:
+        return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S')
+    except (TypeError, ValueError):
+        return None
+
+def _as_date(value):
+    """GSale sale date (date, datetime or 'YYYY-MM-DD' string) -> date, or None"""
+    if isinstance(value, datetime):
+        return value.date()
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+def _choose_order(orders, sold_on=None):
+    """
+    The order a lookup is about, from a listing's orders (newest first): the newest for a plain lookup,
+    or for a recorded sale the newest created no later than the day after sold_on (eBay times are UTC).
+    """
+    if sold_on is None:
+        return orders[0]
+    for order in orders:
+        created_at = _order_created_at(order.get('createdTime'))
+        if created_at is not None and created_at.date() <= sold_on + timedelta(days=1):
+            return order
+    return orders[-1]
+
+def _cached_order(cached, sold_on=None):
+    """
+    Breakdown from a listing's ebay_order_cache rows that a lookup can use without calling eBay, or None.
+    A recorded sale needs a cached order from within a day of its sale date. A plain lookup takes the
+    newest cached order only while the listing was checked within EBAY_ORDER_CACHE_TTL: a
+    multi-quantity listing may have sold again since, even when every cached order is settled.
+    """
+    if not cached:
+        return None
+    if sold_on is not None:
+        for row in cached:
+            created_at = row.get('order_created_at')
+            if created_at is not None and abs((created_at.date() - sold_on).days) <= 1:
+                return row['transaction_data']
+        return None
+    checked_at = max(row['fetched_at'] for row in cached)
+    if datetime.now() - checked_at <= timedelta(seconds=int(app.config.get('EBAY_ORDER_CACHE_TTL', 900))):
+        return cached[0]['transaction_data']
+    return None
+
+def _ebay_order_cache_hit(ebay_item_id, sold_on=None):
+    """True when get_item_transaction_details(ebay_item_id, sold_on=sold_on) will not call eBay"""
+    return _cached_order(get_data.get_ebay_order_cache(ebay_item_id), _as_date(sold_on)) is not None
+
+def get_item_transaction_details(user_token, item_id, refresh=False, orders_result=None, sold_on=None):
+    """
+    Order/fee breakdown for an eBay item, served from ebay_order_cache when possible.
+    The cache holds one row per order line. Settled orders are kept permanently; open orders and fee
+    estimates are refetched after EBAY_ORDER_CACHE_TTL seconds (default 15 minutes). refresh=True
+    bypasses the cache.
+    A plain lookup is for the listing's newest order; sold_on (the GSale sale date) picks the order
+    of that sale instead, so each sale of a multi-quantity listing gets its own buyer and fees.
+    orders_result: this item's GetOrders lookup when already fetched in bulk (get_orders_for_items).
+    """
+    sold_on = _as_date(sold_on)
+    cached = [] if refresh else get_data.get_ebay_order_cache(item_id)
+    if orders_result is None:
+        hit = _cached_order(cached, sold_on)
+        if hit is not None:
+            return {'success': True, 'transaction_data': hit}
+    # Settled lines found again on GetOrders skip the fee lookup
+    settled = {row['order_line_item_id']: row['transaction_data'] for row in cached if row['is_final']}
+    result = _fetch_item_transaction_details(user_token, item_id, orders_result=orders_result, sold_on=sold_on,
+                                             settled=settled)
+    if result.get('success') and result.get('transaction_data'):
+        try:
+            set_data.set_ebay_order_cache(item_id, result.get('order_line_item_id') or item_id,
+                                          result.get('order_created_at'), result['transaction_data'],
+                                          result.get('is_final', False),
+                                          int(app.config.get('EBAY_ORDER_CACHE_TTL', 900)))
+        except Exception as e:
+            print("Error caching eBay order data for {}: {}".format(item_id, e))
+    return result
+
+def _fetch_item_transaction_details(user_token, item_id, orders_result=None, sold_on=None, settled=None):
     """
     Get detailed transaction information including fees using modern eBay Order API with TAX_BREAKDOWN
+    sold_on: pick the listing's order for that sale date (_choose_order); settled: cached breakdowns of
+    settled order lines by OrderLineItemID, returned as they are when that line is chosen.
     """
     try:
         
         # Try modern Order API: Trading GetOrders first, then Fulfillment getOrders if no orders
-        orders_result = get_orders_for_item(user_token, item_id)
+        if orders_result is None:
+            orders_result = get_orders_for_item(user_token, item_id)
         if not orders_result.get('orders'):
             orders_result = get_orders_for_item_fulfillment_api(item_id)
         if orders_result.get('success') and orders_result.get('orders'):
-            order_data = orders_result['orders'][0]
+            order_data = _choose_order(orders_result['orders'], sold_on)
             order_id = order_data.get('orderId')
+            line = {
+                'order_line_item_id': order_data.get('orderLineItemId') or '{}-{}'.format(item_id, order_id),
+                'order_created_at': _order_created_at(order_data.get('createdTime')),
+            }
+            if line['order_line_item_id'] in (settled or {}):
+                return dict(line, success=True, transaction_data=settled[line['order_line_item_id']], is_final=True)
             has_xml = order_data.get('order') and order_data.get('transaction')
             transaction_data = None
             if has_xml:
@@ -1223,9 +1223,10 @@ def get_item_transaction_details(user_token, item_id):
                 transaction_data['order_id'] = transaction_data.get('order_id') or order_id
                 if fee_details.get('ship_to_address'):
                     transaction_data['ship_to_address'] = fee_details['ship_to_address']
-                return {'success': True, 'transaction_data': transaction_data}
+                return dict(line, success=True, transaction_data=transaction_data,
+                            is_final=_ebay_order_is_final(fee_details.get('order_json')))
             if transaction_data is not None:
-                return {'success': True, 'transaction_data': transaction_data}
+                return dict(line, success=True, transaction_data=transaction_data)
 
         # Fallback: try legacy approach
         
@@ -1351,14 +1352,27 @@ def _amount_value(amount):
     return 0.0
 
 
-def get_orders_for_item(user_token, item_id):
+GET_ORDERS_ENTRIES_PER_PAGE = 100
+GET_ORDERS_MAX_PAGES = 50
+
+def get_orders_for_items(user_token, item_ids, max_pages=GET_ORDERS_MAX_PAGES):
     """
-    Get orders for a specific item using Trading API GetOrders call
+    Orders for many eBay item IDs from one Trading API GetOrders sweep of the last 90 days
+    (newest first, at most max_pages pages, stopping at the first page by which every ID has been
+    seen), indexed by ItemID in memory. Returns {'success', 'orders_by_item': {item_id: [...]}}
+    where each entry is {'orderId', 'orderLineItemId', 'createdTime', 'transaction', 'order'} like
+    get_orders_for_item.
+    Each list starts with the listing's most recent order; for a multi-quantity listing, older
+    orders on pages after the stop are not included, so the list is not its full sale history.
     """
     try:
         import xml.etree.ElementTree as ET
         from datetime import datetime, timedelta
         
+        wanted = {str(i) for i in item_ids if i}
+        if not wanted:
+            return {'success': True, 'orders_by_item': {}}
+        
         url = "https://api.ebay.com/ws/api.dll"
         
         # Calculate date range - last 90 days (eBay API limit)
@@ -1370,19 +1384,6 @@ def get_orders_for_item(user_token, item_id):
         start_date_str = start_date.strftime('%Y-%m-%dT%H:%M:%S.000Z')
         end_date_str = end_date.strftime('%Y-%m-%dT%H:%M:%S.000Z')
         
-        
-        xml_request = f"""<?xml version="1.0" encoding="utf-8"?>
-        <GetOrdersRequest xmlns="urn:ebay:apis:eBLBaseComponents">
-            <RequesterCredentials>
-                <eBayAuthToken>{user_token}</eBayAuthToken>
-            </RequesterCredentials>
-            <CreateTimeFrom>{start_date_str}</CreateTimeFrom>
-            <CreateTimeTo>{end_date_str}</CreateTimeTo>
-            <DetailLevel>ReturnAll</DetailLevel>
-            <IncludeFinalValueFee>true</IncludeFinalValueFee>
-            <Version>1193</Version>
-        </GetOrdersRequest>"""
-        
         headers = {
             'X-EBAY-API-COMPATIBILITY-LEVEL': '1193',
             'X-EBAY-API-DEV-NAME': app.config.get('EBAY_DEV_NAME', 'your_dev_name'),
@@ -1393,50 +1394,68 @@ def get_orders_for_item(user_token, item_id):
             'Content-Type': 'text/xml'
         }
         
-        response = requests.post(url, data=xml_request, headers=headers)
-        
-        if response.status_code == 200:
-            root = ET.fromstring(response.text)
+        orders_by_item = {}
+        page = 1
+        while page <= max_pages:
+            xml_request = f"""<?xml version="1.0" encoding="utf-8"?>
+            <GetOrdersRequest xmlns="urn:ebay:apis:eBLBaseComponents">
+                <RequesterCredentials>
+                    <eBayAuthToken>{user_token}</eBayAuthToken>
+                </RequesterCredentials>
+                <CreateTimeFrom>{start_date_str}</CreateTimeFrom>
+                <CreateTimeTo>{end_date_str}</CreateTimeTo>
+                <DetailLevel>ReturnAll</DetailLevel>
+                <IncludeFinalValueFee>true</IncludeFinalValueFee>
+                <SortingOrder>Descending</SortingOrder>
+                <Pagination>
+                    <EntriesPerPage>{GET_ORDERS_ENTRIES_PER_PAGE}</EntriesPerPage>
+                    <PageNumber>{page}</PageNumber>
+                </Pagination>
+                <Version>1193</Version>
+            </GetOrdersRequest>"""
             
-            # Check for errors
-            errors = root.findall('.//{urn:ebay:apis:eBLBaseComponents}Errors')
-            if errors:
-                error_msg = errors[0].find('.//{urn:ebay:apis:eBLBaseComponents}LongMessage')
-                if error_msg is not None:
-                    return {
-                        'success': False,
-                        'error': f'eBay API error: {error_msg.text}'
-                    }
+            response = ebay_http.post(url, data=xml_request, headers=headers)
+            if response.status_code != 200:
+                return {
+                    'success': False,
+                    'error': f'GetOrders failed: {response.status_code} - {response.text}'
+                }
             
-            # Iterate through orders and transactions
-            matching_orders = []
-            orders = root.findall('.//{urn:ebay:apis:eBLBaseComponents}Order')
+            root = ET.fromstring(response.text)
+            error_msg = ebay_xml.api_error(root)
+            if error_msg:
+                return {
+                    'success': False,
+                    'error': f'eBay API error: {error_msg}'
+                }
             
-            for order in orders:
-                order_id = order.find('.//{urn:ebay:apis:eBLBaseComponents}OrderID')
-                transactions = order.findall('.//{urn:ebay:apis:eBLBaseComponents}Transaction')
-                
-                # Iterate through transactions in this order
-                for transaction in transactions:
-                    item_elem = transaction.find('.//{urn:ebay:apis:eBLBaseComponents}Item')
-                    if item_elem is not None:
-                        item_id_elem = item_elem.find('.//{urn:ebay:apis:eBLBaseComponents}ItemID')
-                        if item_id_elem is not None and item_id_elem.text == item_id:
-                            matching_orders.append({
-                                'orderId': order_id.text if order_id is not None else 'Unknown',
-                                'transaction': transaction,
-                                'order': order
-                            })
-                            break
-            return {
-                'success': True,
-                'orders': matching_orders
-            }
-        else:
-            return {
-                'success': False,
-                'error': f'GetOrders failed: {response.status_code} - {response.text}'
-            }
+            # Index the first matching line of each order by ItemID (the whole page, then stop once
+            # every requested listing has been found: no need to sweep the rest of the 90 days)
+            for order, transaction, line_item_id in ebay_xml.iter_order_transactions(root):
+                if line_item_id not in wanted:
+                    continue
+                entries = orders_by_item.setdefault(line_item_id, [])
+                if any(entry['order'] is order for entry in entries):
+                    continue
+                entries.append({
+                    'orderId': ebay_xml.text(order, ebay_xml.ORDER_ID, 'Unknown'),
+                    'orderLineItemId': ebay_xml.text(transaction, ebay_xml.TRANSACTION_LINE_ITEM_ID),
+                    'createdTime': (ebay_xml.text(transaction, ebay_xml.TRANSACTION_CREATED_DATE)
+                                    or ebay_xml.text(order, ebay_xml.ORDER_CREATED_TIME)),
+                    'transaction': transaction,
+                    'order': order
+                })
+            
+            if len(orders_by_item) == len(wanted):
+                break
+            if ebay_xml.text(root, ebay_xml.HAS_MORE_ORDERS) != 'true':
+                break
+            page += 1
+        
+        return {
+            'success': True,
+            'orders_by_item': orders_by_item
+        }
             
     except Exception as e:
         return {
@@ -1444,109 +1463,25 @@ def get_orders_for_item(user_token, item_id):
             'error': f'GetOrders error: {str(e)}'
         }
 
+def get_orders_for_item(user_token, item_id):
+    """
+    Get orders for a specific item using Trading API GetOrders call (one page of the most recent
+    orders; callers fall back to the Fulfillment API when the item is not on it)
+    """
+    result = get_orders_for_items(user_token, [item_id], max_pages=1)
+    if not result['success']:
+        return result
+    return {
+        'success': True,
+        'orders': result['orders_by_item'].get(str(item_id), [])
+    }
+
 def get_order_with_tax_breakdown(user_token, order_data):
     """
     Extract detailed order information from Trading API GetOrders response
     """
     try:
-        import xml.etree.ElementTree as ET
-        
-        order = order_data['order']
-        transaction = order_data['transaction']
-        
-        transaction_data = {
-            'final_price': 0,
-            'subtotal': 0,
-            'shipping': 0,
-            'listing_fees': 0,
-            'final_value_fee': 0,
-            'paypal_fee': 0,
-            'sales_tax': 0,
-            'net_earnings': 0,
-            'total_fees': 0,
-            'has_actual_fees': True,
-            'order_id': order_data['orderId']
-        }
-        
-        # Extract transaction price
-        transaction_price = transaction.find('.//{urn:ebay:apis:eBLBaseComponents}TransactionPrice')
-        if transaction_price is not None:
-            transaction_data['final_price'] = float(transaction_price.text) if transaction_price.text else 0
-        
-        # Extract subtotal
-        subtotal = order.find('.//{urn:ebay:apis:eBLBaseComponents}Subtotal')
-        if subtotal is not None:
-            transaction_data['subtotal'] = float(subtotal.text) if subtotal.text else 0
-        
-        # Extract shipping cost - try multiple possible element names
-        shipping_cost = order.find('.//{urn:ebay:apis:eBLBaseComponents}ShippingCost')
-        if shipping_cost is not None:
-            transaction_data['shipping'] = float(shipping_cost.text) if shipping_cost.text else 0
-        else:
-            # Try alternative shipping element names
-            shipping_service_cost = order.find('.//{urn:ebay:apis:eBLBaseComponents}ShippingServiceCost')
-            if shipping_service_cost is not None:
-                transaction_data['shipping'] = float(shipping_service_cost.text) if shipping_service_cost.text else 0
-            else:
-                # Try in transaction element
-                transaction_shipping = transaction.find('.//{urn:ebay:apis:eBLBaseComponents}ShippingCost')
-                if transaction_shipping is not None:
-                    transaction_data['shipping'] = float(transaction_shipping.text) if transaction_shipping.text else 0
-                else:
-                    transaction_shipping_service = transaction.find('.//{urn:ebay:apis:eBLBaseComponents}ShippingServiceCost')
-                    if transaction_shipping_service is not None:
-                        transaction_data['shipping'] = float(transaction_shipping_service.text) if transaction_shipping_service.text else 0
-                    else:
-                        # Try ActualShippingCost element
-                        actual_shipping_cost = order.find('.//{urn:ebay:apis:eBLBaseComponents}ActualShippingCost')
-                        if actual_shipping_cost is not None:
-                            transaction_data['shipping'] = float(actual_shipping_cost.text) if actual_shipping_cost.text else 0
-                        else:
-                            transaction_data['shipping'] = 0
-        
-        # Extract order total (might be different from transaction price)
-        order_total = order.find('.//{urn:ebay:apis:eBLBaseComponents}Total')
-        if order_total is not None:
-            transaction_data['final_price'] = float(order_total.text) if order_total.text else transaction_data['final_price']
-        
-        # Extract Final Value Fee
-        fvf = order.find('.//{urn:ebay:apis:eBLBaseComponents}FinalValueFee')
-        if fvf is not None:
-            transaction_data['final_value_fee'] = float(fvf.text) if fvf.text else 0
-        
-        # Extract sales tax
-        sales_tax = order.find('.//{urn:ebay:apis:eBLBaseComponents}SalesTax')
-        if sales_tax is not None:
-            transaction_data['sales_tax'] = float(sales_tax.text) if sales_tax.text else 0
-        
-        # Extract fees from Fees section
-        fees_section = order.find('.//{urn:ebay:apis:eBLBaseComponents}Fees')
-        if fees_section is not None:
-            fees = fees_section.findall('.//{urn:ebay:apis:eBLBaseComponents}Fee')
-            for fee in fees:
-                fee_name = fee.find('.//{urn:ebay:apis:eBLBaseComponents}Name')
-                fee_amount = fee.find('.//{urn:ebay:apis:eBLBaseComponents}Fee')
-                
-                if fee_name is not None and fee_amount is not None:
-                    fee_name_text = fee_name.text.lower() if fee_name.text else ''
-                    fee_amount_val = float(fee_amount.text) if fee_amount.text else 0
-                    
-                    if 'final value' in fee_name_text:
-                        transaction_data['final_value_fee'] += fee_amount_val
-                    elif 'paypal' in fee_name_text:
-                        transaction_data['paypal_fee'] += fee_amount_val
-                    elif 'listing' in fee_name_text or 'insertion' in fee_name_text:
-                        transaction_data['listing_fees'] += fee_amount_val
-        
-        # Calculate total fees
-        transaction_data['total_fees'] = (
-            transaction_data['final_value_fee'] + 
-            transaction_data['paypal_fee'] + 
-            transaction_data['listing_fees']
-        )
-        
-        # Calculate net earnings
-        transaction_data['net_earnings'] = transaction_data['final_price'] - transaction_data['total_fees']
+        transaction_data = ebay_xml.order_breakdown(order_data['order'], order_data['transaction'], order_data['orderId'])
         
         return {
             'success': True,
@@ -1661,7 +1596,7 @@ def get_transaction_identifiers(user_token, item_id):
             'Content-Type': 'text/xml'
         }
         
-        response = requests.post(url, data=xml_request, headers=headers)
+        response = ebay_http.post(url, data=xml_request, headers=headers)
         
         if response.status_code == 200:
             root = ET.fromstring(response.text)
@@ -1738,7 +1673,7 @@ def get_ebay_fees_from_order_api(order_id):
         }
 
         params = {'fieldGroups': 'TAX_BREAKDOWN'}
-        response = requests.get(url, headers=headers, params=params)
+        response = ebay_http.get(url, headers=headers, params=params)
 
         if response.status_code != 200:
             print("[getOrder] failed order_id={} status={} body={}".format(order_id, response.status_code, response.text[:200]))
@@ -1751,7 +1686,7 @@ def get_ebay_fees_from_order_api(order_id):
 
         ship_to = extract_ship_to_address_from_fulfillment_order(data)
         if ship_to is None:
-            resp2 = requests.get(url, headers=headers)
+            resp2 = ebay_http.get(url, headers=headers)
             if resp2.status_code == 200:
                 data2 = resp2.json()
                 ship_to = extract_ship_to_address_from_fulfillment_order(data2)
@@ -1785,7 +1720,7 @@ def get_orders_for_item_fulfillment_api(item_id):
         item_id_str = str(item_id)
         while True:
             params = {'limit': limit, 'offset': offset, 'filter': f'creationdate:[{start_date}..]'}
-            response = requests.get(url, headers=headers, params=params)
+            response = ebay_http.get(url, headers=headers, params=params)
             if response.status_code != 200:
                 print("[Fulfillment getOrders] failed status={} body={}".format(response.status_code, response.text[:200]))
                 return {'success': False, 'error': f'Fulfillment getOrders failed: {response.status_code}', 'orders': []}
@@ -1801,7 +1736,8 @@ def get_orders_for_item_fulfillment_api(item_id):
                     # Match legacyItemId (listing item id) or lineItemId if API only returns that
                     if legacy is not None and str(legacy) == item_id_str:
                         print("[Fulfillment getOrders] found order_id={} for item_id={}".format(oid, item_id_str))
-                        return {'success': True, 'orders': [{'orderId': oid}]}
+                        return {'success': True, 'orders': [{'orderId': oid, 'orderLineItemId': li.get('lineItemId'),
+                                                             'createdTime': order.get('creationDate')}]}
             if len(orders_batch) < limit:
                 break
             offset += limit
@@ -1943,7 +1879,7 @@ def get_ebay_final_value_fees_trading_api(order_ids):
         </GetOrdersRequest>
         """.format(token_result['access_token'], order_xml)
 
-        response = requests.post(url, headers=headers, data=xml_body)
+        response = ebay_http.post(url, headers=headers, data=xml_body)
 
         if response.status_code == 200:
             return parse_fvf_from_xml(response.text)
@@ -1963,25 +1899,12 @@ def parse_fvf_from_xml(xml_response):
         root = ET.fromstring(xml_response)
         
         # Check for errors
-        errors = root.findall('.//{urn:ebay:apis:eBLBaseComponents}Errors')
-        if errors:
-            error_msg = errors[0].find('.//{urn:ebay:apis:eBLBaseComponents}LongMessage')
-            if error_msg is not None:
-                return {'success': False, 'error': f'eBay API error: {error_msg.text}'}
+        error_msg = ebay_xml.api_error(root)
+        if error_msg:
+            return {'success': False, 'error': f'eBay API error: {error_msg}'}
         
         # Extract FVF data
-        fvf_data = []
-        orders = root.findall('.//{urn:ebay:apis:eBLBaseComponents}Order')
-        
-        for order in orders:
-            order_id = order.find('.//{urn:ebay:apis:eBLBaseComponents}OrderID')
-            fvf = order.find('.//{urn:ebay:apis:eBLBaseComponents}FinalValueFee')
-            
-            if order_id is not None and fvf is not None:
-                fvf_data.append({
-                    'order_id': order_id.text,
-                    'final_value_fee': float(fvf.text) if fvf.text else 0.0
-                })
+        fvf_data = ebay_xml.final_value_fees(root)
         
         return {
             'success': True,
@@ -2021,7 +1944,7 @@ def get_specific_transaction_details(user_token, transaction_id, transaction_typ
             'Content-Type': 'text/xml'
         }
         
-        response = requests.post(url, data=xml_request, headers=headers)
+        response = ebay_http.post(url, data=xml_request, headers=headers)
         
         if response.status_code == 200:
             root = ET.fromstring(response.text)
@@ -2135,7 +2058,7 @@ def get_order_details_by_id(user_token, order_id):
             'Content-Type': 'text/xml'
         }
         
-        response = requests.post(url, data=xml_request, headers=headers)
+        response = ebay_http.post(url, data=xml_request, headers=headers)
         
         if response.status_code == 200:
             root = ET.fromstring(response.text)
@@ -2254,7 +2177,7 @@ def get_basic_item_price(user_token, item_id):
             'Content-Type': 'text/xml'
         }
         
-        response = requests.post(url, data=xml_request, headers=headers)
+        response = ebay_http.post(url, data=xml_request, headers=headers)
         
         if response.status_code == 200:
             root = ET.fromstring(response.text)
@@ -2321,7 +2244,7 @@ def get_ebay_recently_sold_items(user_token, api_base_url):
             'sort': 'endTime:desc'  # Sort by end time descending (most recent first)
         }
         
-        response = requests.get(url, headers=headers, params=params)
+        response = ebay_http.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -2407,7 +2330,7 @@ def get_ebay_listings_via_browse(user_token, api_base_url):
             'filter': 'deliveryCountry:US,deliveryPostalCode:US'  # Limit to US
         }
         
-        response = requests.get(url, headers=headers, params=params)
+        response = ebay_http.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -2496,7 +2419,7 @@ def get_ebay_listings_legacy(user_token):
             'Content-Type': 'text/xml'
         }
         
-        response = requests.post(url, data=xml_request, headers=headers)
+        response = ebay_http.post(url, data=xml_request, headers=headers)
         
         if response.status_code == 200:
             # Parse XML response
@@ -2571,7 +2494,7 @@ def get_ebay_listings_modern(user_token, api_base_url):
             'offset': 0
         }
         
-        response = requests.get(url, headers=headers, params=params)
+        response = ebay_http.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -2619,7 +2542,7 @@ def try_alternative_ebay_endpoints(user_token, api_base_url):
             'filter': 'conditionIds:{1000|1500|2000|2500|3000|4000|5000}'  # Various conditions
         }
         
-        response = requests.get(url, headers=headers, params=params)
+        response = ebay_http.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -2661,7 +2584,7 @@ def get_ebay_listings_oauth(access_token, api_base_url):
             'offset': 0
         }
         
-        response = requests.get(url, headers=headers, params=params)
+        response = ebay_http.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -2705,7 +2628,7 @@ def get_ebay_fulfillment_oauth(access_token, api_base_url):
             'offset': 0
         }
         
-        response = requests.get(url, headers=headers, params=params)
+        response = ebay_http.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -2746,7 +2669,7 @@ def get_ebay_browse_oauth(access_token, api_base_url):
             'filter': 'conditionIds:{1000|1500|2000|2500|3000|4000|5000}'
         }
         
-        response = requests.get(url, headers=headers, params=params)
+        response = ebay_http.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -2794,8 +2717,9 @@ def search_ebay_sold_items(search_term=None, num_items=25, min_price=None, max_p
             # Check if OAuth token format - if so, we might need to use Sell API instead
             # But let's try Trading API first
         
-        # Get user's sold items
-        sold_items_result = get_sold_items_basic(user_token)
+        # Get user's sold items (all pages when filtering, otherwise stop once num_items are read)
+        has_filter = bool(search_term and search_term.strip())
+        sold_items_result = get_sold_items_basic(user_token, max_items=None if has_filter else int(num_items))
         
         if not sold_items_result['success']:
             return sold_items_result
@@ -2852,7 +2776,7 @@ def search_ebay_sold_items(search_term=None, num_items=25, min_price=None, max_p
             }
             
             try:
-                response = requests.post(url, data=xml_request, headers=headers)
+                response = ebay_http.post(url, data=xml_request, headers=headers)
                 if response.status_code == 200:
                     root = ET.fromstring(response.text)
                     errors = root.findall('.//{urn:ebay:apis:eBLBaseComponents}Errors')
@@ -3025,7 +2949,7 @@ def search_ebay_sold_items_finding_api(search_term, num_items=25, min_price=None
             params[f'itemFilter({filter_index}).paramName'] = 'Currency'
             params[f'itemFilter({filter_index}).paramValue'] = 'USD'
         
-        response = requests.get(url, params=params)
+        response = ebay_http.get(url, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -3084,7 +3008,7 @@ def search_ebay_sold_items_finding_api(search_term, num_items=25, min_price=None
                 if total_results == 0 and len(search_query.split()) == 1 and '*' not in search_query:
                     # Retry with wildcard
                     params['keywords'] = f"{search_query}*"
-                    retry_response = requests.get(url, params=params)
+                    retry_response = ebay_http.get(url, params=params)
                     if retry_response.status_code == 200:
                         retry_data = retry_response.json()
                         retry_response_data = retry_data.get('findCompletedItemsResponse', [{}])
@@ -3224,7 +3148,7 @@ def get_ebay_rate_limits(api_name=None, api_context=None):
                 'itemFilter(0).value': 'true'
             }
             
-            response = requests.get(url, params=params)
+            response = ebay_http.get(url, params=params)
             
             # Check response headers for rate limit information
             rate_limit_headers = {}
@@ -3323,6 +3247,20 @@ def get_ebay_rate_limits(api_name=None, api_context=None):
                     pass
         
         # Fall back to Analytics API with OAuth if App ID method didn't work
+        return get_ebay_analytics_rate_limits(api_name, api_context)
+            
+    except Exception as e:
+        import traceback
+        return {
+            'success': False,
+            'error': f'Error getting rate limits: {str(e)}. Traceback: {traceback.format_exc()[:500]}'
+        }
+
+def get_ebay_analytics_rate_limits(api_name=None, api_context=None):
+    """
+    Get eBay API rate limits from the Developer Analytics API and feed them to the quota governor
+    """
+    try:
         token_result = get_valid_ebay_token()
         
         if not token_result['success']:
@@ -3354,13 +3292,14 @@ def get_ebay_rate_limits(api_name=None, api_context=None):
         if api_context:
             params['api_context'] = api_context
         
-        response = requests.get(url, headers=headers, params=params if params else None)
+        response = ebay_http.get(url, headers=headers, params=params if params else None)
         
         if response.status_code == 200:
             data = response.json()
             
             # Parse rate limits
             rate_limits = data.get('rateLimits', [])
+            ebay_rate_limit.get_governor().update_from_analytics(rate_limits)
             
             return {
                 'success': True,
@@ -3429,7 +3368,7 @@ def get_ebay_listing_details(listing_id):
             'Accept': 'application/json'
         }
         
-        response = requests.get(url, headers=headers)
+        response = ebay_http.get(url, headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -3634,6 +3573,7 @@ def google_callback():
                 cursor.execute('INSERT INTO access_attempts (email, successful, attempt_time) VALUES (%s, %s, NOW())', (email, False))
                 mysql.connection.commit()
                 cursor.close()
+                admin_cache.invalidate_pending_count()
             except Exception as e:
                 print("Error recording access attempt: {}".format(e))
             
@@ -3790,6 +3730,7 @@ def ebay_logout():
                 cur = mysql.connection.cursor()
                 cur.execute("DELETE FROM ebay_tokens WHERE user_id = %s", (user_id,))
                 mysql.connection.commit()
+                ebay_token_cache.invalidate(user_id)
             except Exception as db_error:
                 print(f"Error clearing database tokens: {db_error}")
         
@@ -3888,35 +3829,18 @@ def api_ebay_refresh_token():
         })
 
 @app.route('/api/ebay-force-refresh', methods=['POST'])
+@admin_required
 def api_ebay_force_refresh():
     """API endpoint to force refresh all eBay tokens immediately"""
     try:
-        cur = mysql.connection.cursor()
-        cur.execute("""
-            SELECT user_id, access_token, refresh_token, expires_at
-            FROM ebay_tokens
-            WHERE refresh_token IS NOT NULL
-        """)
-        
-        tokens_to_refresh = cur.fetchall()
-        refreshed_count = 0
-        failed_count = 0
-        
-        for token_data in tokens_to_refresh:
-            user_id, access_token, refresh_token, expires_at = token_data
-            
-            refresh_result = refresh_ebay_token(refresh_token)
-            
-            if refresh_result['success']:
-                store_ebay_tokens_in_db(
-                    refresh_result['access_token'],
-                    refresh_result.get('refresh_token', refresh_token),
-                    datetime.now() + timedelta(seconds=refresh_result.get('expires_in', 7200)),
-                    user_id
-                )
-                refreshed_count += 1
-            else:
-                failed_count += 1
+        # Same named lock as the background scan, so a forced run never overlaps another worker's
+        counts = ebay_token_refresher.run_refresh(app, mysql, _refresh_ebay_token_in_background, force=True)
+        if counts is None:
+            return jsonify({
+                'success': False,
+                'error': 'A token refresh is already running. Try again in a moment.'
+            }), 409
+        refreshed_count, failed_count = counts
         
         return jsonify({
             'success': True,
@@ -3932,9 +3856,11 @@ def api_ebay_force_refresh():
         })
 
 @app.route('/api/ebay-refresh-status', methods=['GET'])
+@admin_required
 def api_ebay_refresh_status():
     """API endpoint to check the status of automatic token refresh"""
     try:
+        refresher = ebay_token_refresher.status()
         cur = mysql.connection.cursor()
         
         # Get token count and expiration info
@@ -3942,26 +3868,30 @@ def api_ebay_refresh_status():
             SELECT 
                 COUNT(*) as total_tokens,
                 COUNT(CASE WHEN refresh_token IS NOT NULL THEN 1 END) as tokens_with_refresh,
-                COUNT(CASE WHEN expires_at <= DATE_ADD(NOW(), INTERVAL 20 MINUTE) THEN 1 END) as tokens_expiring_soon,
+                COUNT(CASE WHEN expires_at <= DATE_ADD(NOW(), INTERVAL %s SECOND) THEN 1 END) as tokens_expiring_soon,
                 MIN(expires_at) as earliest_expiration,
                 MAX(expires_at) as latest_expiration
             FROM ebay_tokens
-        """)
+        """, (refresher['window'],))
         
         stats = cur.fetchone()
+        cur.close()
         
         return jsonify({
             'success': True,
-            'background_refresh_active': _background_refresh_started,
+            'background_refresh_active': refresher['started'],
             'token_stats': {
-                'total_tokens': stats[0],
-                'tokens_with_refresh': stats[1],
-                'tokens_expiring_soon': stats[2],
-                'earliest_expiration': stats[3].isoformat() if stats[3] else None,
-                'latest_expiration': stats[4].isoformat() if stats[4] else None
+                'total_tokens': stats['total_tokens'],
+                'tokens_with_refresh': stats['tokens_with_refresh'],
+                'tokens_expiring_soon': stats['tokens_expiring_soon'],
+                'earliest_expiration': stats['earliest_expiration'].isoformat() if stats['earliest_expiration'] else None,
+                'latest_expiration': stats['latest_expiration'].isoformat() if stats['latest_expiration'] else None
             },
-            'refresh_schedule': 'Every 15 minutes',
-            'refresh_threshold': '20 minutes before expiration'
+            'refresh_schedule': 'Every {} minutes (jittered)'.format(refresher['interval'] // 60),
+            'refresh_threshold': '{} minutes before expiration'.format(refresher['window'] // 60),
+            'last_run_at': refresher['last_run_at'].isoformat() if refresher['last_run_at'] else None,
+            'last_refreshed_count': refresher['last_refreshed'],
+            'last_failed_count': refresher['last_failed']
         })
             
     except Exception as e:
@@ -4139,6 +4069,7 @@ def api_ebay_clear_tokens():
         cur = mysql.connection.cursor()
         cur.execute("DELETE FROM ebay_tokens")
         mysql.connection.commit()
+        ebay_token_cache.invalidate()
         
         # Clear from session
         session.pop('ebay_access_token', None)
@@ -4202,12 +4133,7 @@ def logout_with_redirect(next_page):
 @app.route('/')
 @login_required
 def index():
-    items = []
-    years = get_data.get_years()
-   
-    for value in years:
-        item = get_data.get_profit(value['year'])
-        items.append(item)
+    items = get_data.get_yearly_profit()
     return render_template('index.html', items=items)
 
 @app.route('/reports/profit',methods=["GET", "POST"])
@@ -4228,16 +4154,20 @@ def reports_profit():
     if request.method == "POST":
         details = request.form
         
-        # Check cache first
+        # Check cache first (namespaced by group, tagged with the dates the report covers)
         cache_params = {
             'type': details['type'],
             'date': str(details['date']),
             'month': details['month'],
             'year': details['year'],
-            'day': details.get('day', '')
+            'day': details.get('day', ''),
+            'account': session.get('id'),
         }
+        # Day-of-week sales span every year, so that report is tagged as covering all dates
+        date_range = function.set_dates(details) if details['type'] != '3' else None
+        cache_tenant = get_data.get_current_group_id()
         
-        cached_data = reports_cache.get_cached_report('profit', cache_params)
+        cached_data = reports_cache.get_cached_report('profit', cache_params, cache_tenant, date_range)
         if cached_data:
             return render_template('reports_profit.html', 
                                 form=form, 
@@ -4246,7 +4176,7 @@ def reports_profit():
                                 type_value=details['type'])
         
         if not details['type'] == '3':
-            start_date, end_date = function.set_dates(details)
+            start_date, end_date = date_range
             sold_dates = get_data.get_group_sold_from_date(start_date, end_date)
             purchased_dates = get_data.get_purchased_from_date(start_date, end_date)
         else:
@@ -4257,7 +4187,7 @@ def reports_profit():
         reports_cache.cache_report('profit', cache_params, {
             'sold_dates': sold_dates,
             'purchased_dates': purchased_dates
-        })
+        }, cache_tenant, date_range)
         
         return render_template('reports_profit.html', 
                             form=form, 
@@ -4808,12 +4738,13 @@ def _ebay_user_token_or_json_error():
     return user_token, None
 
 
-def _ebay_financial_api_payload(user_token, ebay_item_id, log_internal_item_id=None):
+def _ebay_financial_api_payload(user_token, ebay_item_id, log_internal_item_id=None, orders_result=None):
     """
     Same eBay order/fee breakdown used by Sell Item and Quick Sell (prefill by listing ID).
     log_internal_item_id: GSale item id for debug logs when resolving from DB; None for quick sell.
+    orders_result: prefetched GetOrders lookup for this listing (bulk endpoint).
     """
-    transaction_data = get_item_transaction_details(user_token, ebay_item_id)
+    transaction_data = get_item_transaction_details(user_token, ebay_item_id, orders_result=orders_result)
     if transaction_data['success']:
         trans_data = transaction_data['transaction_data']
         order_id = trans_data.get('order_id') or trans_data.get('orderId') or ''
@@ -4884,6 +4815,61 @@ def get_ebay_item_data(item_id):
         })
 
 
+EBAY_BULK_ITEM_DATA_MAX = 100
+
+@app.route('/api/ebay-item-data/bulk', methods=['POST'])
+@login_required
+def get_ebay_item_data_bulk():
+    """
+    eBay financial data for many items at once (sell flow). JSON body: {"item_ids": [GSale item ids]}
+    and/or {"ebay_item_ids": [listing ids]}. Listings not already in ebay_order_cache are looked up
+    with a single paginated GetOrders sweep instead of one GetOrders call per item.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        item_ids = [str(i) for i in (data.get('item_ids') or []) if i]
+        listing_ids = [str(i) for i in (data.get('ebay_item_ids') or []) if i]
+        if not item_ids and not listing_ids:
+            return jsonify({'success': False, 'message': 'item_ids or ebay_item_ids is required'}), 400
+        if len(item_ids) + len(listing_ids) > EBAY_BULK_ITEM_DATA_MAX:
+            return jsonify({'success': False, 'message': 'At most {} items per request'.format(EBAY_BULK_ITEM_DATA_MAX)}), 400
+
+        user_token, err_body = _ebay_user_token_or_json_error()
+        if err_body is not None:
+            return jsonify(err_body)
+
+        # (result key, ebay_item_id, GSale item id for logs)
+        ebay_ids_by_item = get_data.get_ebay_item_ids_for_items(item_ids)
+        targets = [(item_id, ebay_ids_by_item.get(item_id), item_id) for item_id in item_ids]
+        targets += [(listing_id, listing_id, None) for listing_id in listing_ids]
+
+        misses = {ebay_id for _, ebay_id, _ in targets if ebay_id and not _ebay_order_cache_hit(ebay_id)}
+        batch = get_orders_for_items(user_token, misses) if misses else None
+
+        results = {}
+        for key, ebay_id, log_item_id in targets:
+            if not ebay_id:
+                results[key] = {'success': False, 'message': 'No eBay item ID found for this item'}
+                continue
+            orders_result = None
+            if ebay_id in misses:
+                if not batch.get('success'):
+                    # Report the sweep's failure per item rather than retrying each listing on its own
+                    results[key] = {'success': False,
+                                    'message': "Could not fetch eBay data: {}".format(batch.get('error', 'Unknown error'))}
+                    continue
+                orders_result = {'success': True, 'orders': batch['orders_by_item'].get(ebay_id, [])}
+            results[key] = _ebay_financial_api_payload(user_token, ebay_id, log_internal_item_id=log_item_id,
+                                                       orders_result=orders_result)
+        return jsonify({'success': True, 'results': results})
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching eBay data: {str(e)}'
+        }), 500
+
+
 @app.route('/api/ebay-listing-data/<ebay_item_id>')
 @login_required
 def get_ebay_listing_data(ebay_item_id):
@@ -4892,7 +4878,9 @@ def get_ebay_listing_data(ebay_item_id):
         user_token, err_body = _ebay_user_token_or_json_error()
         if err_body is not None:
             return jsonify(err_body)
-        return jsonify(_ebay_financial_api_payload(user_token, ebay_item_id, log_internal_item_id=None))
+        # Quick Sell preview: first to be shed when the eBay budget runs low
+        with ebay_rate_limit.low_priority():
+            return jsonify(_ebay_financial_api_payload(user_token, ebay_item_id, log_internal_item_id=None))
     except Exception as e:
         return jsonify({
             'success': False,
@@ -4936,10 +4924,10 @@ def groups_list():
         # Support ?date=YYYY-MM-DD for direct links / iOS app (e.g. /groups/list?date=2025-05-03)
         date_param = request.args.get('date', type=str)
         if date_param:
-            # Use exact date pattern for get_all_from_group_and_items (LIKE match)
+            # Exact day (YYYY-MM-DD), month or year; get_all_from_group_and_items turns it into a date range
             date = date_param.strip()
             if not date:
-                date = f"{datetime.now().year}-%-%"
+                date = str(datetime.now().year)
             # Derive year for form display
             try:
                 year_param = date[:4] if len(date) >= 4 else str(datetime.now().year)
@@ -4949,19 +4937,13 @@ def groups_list():
             year_param = request.args.get('year', type=str) or request.args.get('listYear', type=str)
             if not year_param:
                 year_param = str(datetime.now().year)
-            if year_param == 'All':
-                date = "%-%-%"
-            else:
-                date = f"{year_param}-%-%"
+            date = year_param
         form.process(data={'listYear': year_param})
     else:
         form = GroupForm()
         # Read from submitted form
         selected_year = request.form.get('listYear', type=str)
-        if selected_year == 'All':
-            date = "%-%-%"
-        else:
-            date = f"{selected_year}-%-%"
+        date = selected_year or str(datetime.now().year)
 
     groups = get_data.get_all_from_group_and_items(date)
     neighborhoods = get_data.get_user_neighborhoods()
@@ -5395,8 +5377,7 @@ def inject_pending_requests():
     """Inject pending requests count into all templates for admin notification"""
     if session.get('loggedin') and session.get('is_admin'):
         try:
-            pending_attempts = set_data.get_pending_access_attempts()
-            return {'pending_requests_count': len(pending_attempts)}
+            return {'pending_requests_count': admin_cache.pending_requests_count(set_data.count_pending_access_attempts)}
         except Exception as e:
             print("Error getting pending requests count: {}".format(e))
             return {'pending_requests_count': 0}
@@ -5544,11 +5525,21 @@ def admin_panel():
                 else:
                     flash('Group ID is required.', 'error')
                 return redirect(url_for('admin_panel'))
+            
+            elif action == 'refresh_ebay_budget':
+                # Pull current eBay usage from the Analytics API into the quota governor
+                result = get_ebay_analytics_rate_limits()
+                if result['success']:
+                    flash('eBay API budget updated from the Analytics API.', 'success')
+                else:
+                    flash('Could not update eBay API budget: {}'.format(result['error']), 'error')
+                return redirect(url_for('admin_panel'))
         
         # Ensure users is always a list to prevent KeyError: 0
         if not users:
             users = [{'id': '1', 'username': 'Admin', 'email': 'admin@example.com', 'is_admin': 1, 'is_current_user': 'Current User'}]
-        return render_template('admin.html', users=users, groups=groups, pending_attempts=pending_attempts)
+        return render_template('admin.html', users=users, groups=groups, pending_attempts=pending_attempts,
+                               ebay_budget=ebay_rate_limit.get_governor().snapshot())
     
     except Exception as e:
         # Log the error for debugging
@@ -5717,6 +5708,45 @@ def api_items_search():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/items/bulk', methods=['POST'])
+@login_required
+def api_items_bulk():
+    """Apply one operation to many items: {"operation": "mark_sold"|"move"|"recategorize"|"delete", "item_ids": [...]}.
+
+    mark_sold takes "sold" (0/1), move takes "group_id", recategorize takes "category_id".
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'message': 'JSON body required'}), 400
+        operation = data.get('operation')
+        item_ids = data.get('item_ids')
+
+        if operation == 'mark_sold':
+            try:
+                sold = int(data.get('sold', 1))
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'message': 'Invalid sold status'}), 400
+            count = set_data.set_items_bulk_mark_sold(item_ids, sold)
+        elif operation == 'move':
+            count = set_data.set_items_bulk_move(item_ids, data.get('group_id'))
+        elif operation == 'recategorize':
+            count = set_data.set_items_bulk_category(item_ids, data.get('category_id'))
+        elif operation == 'delete':
+            count = set_data.remove_items_bulk(item_ids)
+        else:
+            return jsonify({'success': False, 'message': 'Unknown operation'}), 400
+
+        return jsonify({
+            'success': True,
+            'message': '{} item(s) updated'.format(count) if operation != 'delete' else '{} item(s) deleted'.format(count),
+            'count': count,
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/api/shippo-rates', methods=['POST'])
 @login_required
 def api_shippo_rates():
@@ -5732,20 +5762,137 @@ def api_shippo_rates():
             return jsonify({'success': False, 'message': 'JSON body required'}), 400
         address_to = shippo_rates.build_address_to(body)
         parcel = shippo_rates.build_parcel(body)
-        address_from = shippo_rates.get_address_from(app)
-        token = shippo_rates.get_shippo_token(app)
-        shipment = shippo_rates.request_shipment_rates(token, address_from, address_to, parcel)
-        rates = shippo_rates.normalize_rates(shipment)
+        quote = shippo_rates.quote_rates(app, address_to, parcel)
         return jsonify({
             'success': True,
-            'rates': rates,
-            'shipment_status': shipment.get('status'),
+            'rates': quote['rates'],
+            'shipment_status': quote['shipment_status'],
+            'cached': quote['cached'],
         })
     except ValueError as e:
         return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/shippo-rates/jobs', methods=['POST'])
+@login_required
+def api_shippo_rate_job_start():
+    """
+    Start an async Shippo quote (same body as /api/shippo-rates). Returns immediately with
+    status 'done' and rates, or status 'pending' and a job_id to poll at /api/shippo-rates/jobs/<job_id>.
+    """
+    try:
+        if not shippo_rates.is_shippo_configured(app):
+            return jsonify({
+                'success': False,
+                'message': 'Shippo is not configured. Set SHIPPO_API_TOKEN and ship-from address fields.',
+            }), 400
+        body = request.get_json()
+        if not body:
+            return jsonify({'success': False, 'message': 'JSON body required'}), 400
+        address_to = shippo_rates.build_address_to(body)
+        parcel = shippo_rates.build_parcel(body)
+        job = shippo_rates.start_quote_job(app, address_to, parcel, session.get('id'))
+        return jsonify(dict(job, success=True)), 202 if job['status'] == 'pending' else 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/shippo-rates/jobs/<job_id>', methods=['GET'])
+@login_required
+def api_shippo_rate_job_status(job_id):
+    """Status of an async Shippo quote: pending (rates so far), done (all rates) or error."""
+    try:
+        if not shippo_rates.is_shippo_configured(app):
+            return jsonify({'success': False, 'message': 'Shippo is not configured.'}), 400
+        job = shippo_rates.poll_quote_job(app, job_id, session.get('id'))
+        if job is None:
+            return jsonify({'success': False, 'message': 'Quote job not found'}), 404
+        if job['status'] == 'error':
+            return jsonify(dict(job, success=False))
+        return jsonify(dict(job, success=True))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+SHIPPO_BATCH_MAX = 100
+
+@app.route('/api/shippo-rates/batch', methods=['POST'])
+@login_required
+def api_shippo_rates_batch():
+    """
+    Shippo rate quotes for many parcels at once. JSON body: {"shipments": [{"id", to_*, weight/size
+    fields as for /api/shippo-rates}]} and/or {"group_date": "YYYY-MM-DD"} to quote every sold item of
+    that date to its eBay buyer's address, using "parcel" (weight/size fields) as the package.
+    """
+    try:
+        if not shippo_rates.is_shippo_configured(app):
+            return jsonify({
+                'success': False,
+                'message': 'Shippo is not configured. Set SHIPPO_API_TOKEN and ship-from address fields.',
+            }), 400
+        body = request.get_json()
+        if not body:
+            return jsonify({'success': False, 'message': 'JSON body required'}), 400
+
+        ids = []
+        bodies = []
+        for index, shipment in enumerate(body.get('shipments') or []):
+            if not isinstance(shipment, dict):
+                return jsonify({'success': False, 'message': 'Each shipment must be an object'}), 400
+            ids.append(shipment.get('id', index))
+            bodies.append(shipment)
+
+        # (id, error) for sold items of group_date that have no buyer address to quote
+        unquotable = []
+        group_date = body.get('group_date')
+        sold_items = get_data.get_sold_items_by_group_date(group_date) if group_date else []
+        # Check the size before any eBay lookup
+        if len(bodies) + len(sold_items) > SHIPPO_BATCH_MAX:
+            return jsonify({'success': False, 'message': 'At most {} shipments per request'.format(SHIPPO_BATCH_MAX)}), 400
+        if sold_items:
+            user_token, err_body = _ebay_user_token_or_json_error()
+            if err_body is not None:
+                return jsonify(err_body)
+            parcel_fields = body.get('parcel') or {}
+            # Buyer addresses for listings not in ebay_order_cache come from one GetOrders sweep
+            misses = {item['ebay_item_id'] for item in sold_items
+                      if item.get('ebay_item_id') and not _ebay_order_cache_hit(item['ebay_item_id'], item.get('sale_date'))}
+            batch = get_orders_for_items(user_token, misses) if misses else None
+            for item in sold_items:
+                ebay_id = item.get('ebay_item_id')
+                if not ebay_id:
+                    unquotable.append((item['id'], 'No eBay item ID for this item'))
+                    continue
+                orders_result = None
+                if ebay_id in misses:
+                    if not batch.get('success'):
+                        unquotable.append((item['id'], batch.get('error') or 'Could not load order'))
+                        continue
+                    orders_result = {'success': True, 'orders': batch['orders_by_item'].get(ebay_id, [])}
+                td = get_item_transaction_details(user_token, ebay_id, orders_result=orders_result,
+                                                  sold_on=item.get('sale_date'))
+                ship_to = (td.get('transaction_data') or {}).get('ship_to_address') if td.get('success') else None
+                if not ship_to:
+                    unquotable.append((item['id'], td.get('error') or 'No buyer address on this order'))
+                    continue
+                ids.append(item['id'])
+                bodies.append(shippo_rates.ship_to_body(ship_to, parcel_fields))
+
+        if not bodies and not unquotable:
+            return jsonify({'success': False, 'message': 'shipments or group_date is required'}), 400
+
+        results = []
+        for shipment_id, result in zip(ids, shippo_rates.quote_batch(app, bodies)):
+            results.append(dict(result, id=shipment_id))
+        for item_id, message in unquotable:
+            results.append({'id': item_id, 'success': False, 'message': message})
+        return jsonify({'success': True, 'results': results})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/api/categories', methods=['GET'])
 @login_required
 def api_categories():
@@ -5798,12 +5945,11 @@ def api_get_groups():
         # Optional year filter: year=All | 2024 | 2025 | ...
         year = request.args.get('year', type=str)
         if year and year != 'All':
-            # Use LIKE-based pattern to match web UI behavior
-            date_pattern = f"{year}-%-%"
-            groups_data = get_data.get_all_from_group_and_items(date_pattern)
+            # Same year filter as the web UI
+            groups_data = get_data.get_all_from_group_and_items(year)
         else:
             # All years
-            groups_data = get_data.get_all_from_group_and_items("%-%-%")
+            groups_data = get_data.get_all_from_group_and_items('All')
         
         # Convert to JSON format
         groups = []
@@ -5907,10 +6053,15 @@ def ebay_sold_search():
     error = None
     rate_limited = False
 
-    search_results = search_ebay_sold_items(
-        search_term=None,
-        num_items=limit
-    )
+    # Served from the background-synced store (ebay_sync); ?live=1 or a never-synced account hits eBay directly
+    search_results = None
+    if not request.args.get('live'):
+        search_results = ebay_sync.local_sold_listings(limit)
+    if search_results is None:
+        search_results = search_ebay_sold_items(
+            search_term=None,
+            num_items=limit
+        )
 
     if search_results['success']:
         results = search_results
@@ -6079,5 +6230,17 @@ def assign_neighborhood():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@app.before_request
+def start_background_workers():
+    """
+    Start this worker's background threads on its first request, not at import: a gunicorn --preload
+    master would otherwise start them before forking (threads do not survive the fork), and scripts
+    that import app would start them too. Both calls return at once after the first in each process.
+    """
+    # Background sold-order sync for /tools/ebay-sold-search (see ebay_sync for EBAY_SOLD_SYNC_* settings)
+    ebay_sync.start_sold_sync(app, mysql, get_ebay_token_for_user)
+    # Refresh eBay tokens ahead of expiry (see ebay_token_refresher for EBAY_TOKEN_REFRESH_* settings)
+    ebay_token_refresher.start_token_refresher(app, mysql, _refresh_ebay_token_in_background)
+
 if __name__ == '__main__':
     app.run(debug=True, port=app.config['PORT'])
@@ -0,0 +1,192 @@
+"""
+Pooled MySQL connections for the app, replacing flask_mysqldb's connect-per-request.
+
+PooledMySQL keeps the flask_mysqldb interface that get_data, set_data and function use
+(`mysql.connection.cursor()`, `mysql.connection.commit()`): the first access in an app context
+checks a connection out of the pool and teardown returns it (rolled back, so no transaction leaks
+into the next request).
+
+Reads the same MYSQL_* settings as flask_mysqldb, plus:
+  MYSQL_POOL_SIZE      — connections per worker process (default 5)
+  MYSQL_POOL_RECYCLE   — seconds before a connection is replaced (default 3600; below wait_timeout)
+  MYSQL_POOL_PRE_PING  — ping idle connections on checkout and replace dead ones (default True)
+  MYSQL_POOL_TIMEOUT   — seconds to wait for a free connection when the pool is exhausted (default 30)
+
+Pools are per process: a forked worker (gunicorn --preload) never reuses its parent's sockets.
+"""
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import MySQLdb
+import MySQLdb.cursors
+from flask import g, has_app_context
+
+
+class PoolTimeout(Exception):
+    """No connection became free within MYSQL_POOL_TIMEOUT."""
+
+
+class ConnectionPool:
+    def __init__(self, connect_kwargs, size=5, recycle=3600, pre_ping=True, timeout=30):
+        self.connect_kwargs = connect_kwargs
+        self.size = max(1, int(size))
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._created = 0
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Forked: the inherited sockets belong to the parent; start a fresh pool
+                    self._reset()
+
+    def _create(self):
+        conn = MySQLdb.connect(**self.connect_kwargs)
+        conn._pool_created_at = time.time()
+        conn._pool_pid = self._pid
+        return conn
+
+    def _usable(self, conn):
+        if self.recycle and time.time() - conn._pool_created_at > self.recycle:
+            return False
+        if self.pre_ping:
+            try:
+                conn.ping()
+            except MySQLdb.Error:
+                return False
+        return True
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def checkout(self):
+        self._check_pid()
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._create()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise PoolTimeout("No MySQL connection available after {}s (pool size {})".format(self.timeout, self.size))
+                try:
+                    conn = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+            if self._usable(conn):
+                return conn
+            self._close(conn)
+
+    def checkin(self, conn):
+        if getattr(conn, '_pool_pid', None) != os.getpid() or self._pid != os.getpid():
+            # Connection from before a fork; never hand it to this process's requests
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+        try:
+            conn.rollback()
+        except Exception:
+            self._close(conn)
+            return
+        self._idle.put(conn)
+
+    def discard(self, conn):
+        self._close(conn)
+
+
+class PooledMySQL:
+    """Drop-in for flask_mysqldb.MySQL backed by a per-process ConnectionPool."""
+
+    def __init__(self, app=None):
+        self.app = app
+        self.pool = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        cfg = app.config
+        kwargs = {
+            'host': cfg.get('MYSQL_HOST', 'localhost'),
+            'port': cfg.get('MYSQL_PORT', 3306),
+            'connect_timeout': cfg.get('MYSQL_CONNECT_TIMEOUT', 10),
+            'use_unicode': cfg.get('MYSQL_USE_UNICODE', True),
+            'charset': cfg.get('MYSQL_CHARSET', 'utf8'),
+            'autocommit': cfg.get('MYSQL_AUTOCOMMIT', False),
+        }
+        for key, arg in (('MYSQL_USER', 'user'), ('MYSQL_PASSWORD', 'passwd'), ('MYSQL_DB', 'db'),
+                         ('MYSQL_UNIX_SOCKET', 'unix_socket'), ('MYSQL_READ_DEFAULT_FILE', 'read_default_file'),
+                         ('MYSQL_SQL_MODE', 'sql_mode')):
+            if cfg.get(key):
+                kwargs[arg] = cfg[key]
+        if cfg.get('MYSQL_CURSORCLASS'):
+            kwargs['cursorclass'] = getattr(MySQLdb.cursors, cfg['MYSQL_CURSORCLASS'])
+        if cfg.get('MYSQL_CUSTOM_OPTIONS'):
+            kwargs.update(cfg['MYSQL_CUSTOM_OPTIONS'])
+
+        self.pool = ConnectionPool(
+            kwargs,
+            size=cfg.get('MYSQL_POOL_SIZE', 5),
+            recycle=cfg.get('MYSQL_POOL_RECYCLE', 3600),
+            pre_ping=cfg.get('MYSQL_POOL_PRE_PING', True),
+            timeout=cfg.get('MYSQL_POOL_TIMEOUT', 30),
+        )
+        app.teardown_appcontext(self.teardown)
+
+    def connect(self):
+        """Check out a connection for the current app context (same object as .connection)."""
+        return self.connection
+
+    @property
+    def connection(self):
+        if not has_app_context():
+            return None
+        conn = g.get('_pooled_mysql_db')
+        if conn is None:
+            conn = self.pool.checkout()
+            g._pooled_mysql_db = conn
+        return conn
+
+    def teardown(self, exception):
+        conn = g.pop('_pooled_mysql_db', None)
+        if conn is not None:
+            self.pool.checkin(conn)
+
+    @contextmanager
+    def pooled_connection(self):
+        """Connection for work outside a request (background threads); returned to the pool afterwards."""
+        conn = self.pool.checkout()
+        try:
+            yield conn
+        finally:
+            self.pool.checkin(conn)
@@ -0,0 +1,172 @@
+"""
+Shared HTTP client for eBay API calls (Trading, Finding, REST and OAuth endpoints).
+
+One pooled requests.Session per worker process keeps TLS connections to eBay alive between
+calls instead of paying a handshake per request. Every call gets a (connect, read) timeout
+chosen by endpoint, and 429/5xx responses or dropped connections are retried with
+exponential backoff (honouring Retry-After when eBay sends one). Each attempt first takes a slot
+from ebay_rate_limit's governor; calls it sheds come back as a 429 without reaching eBay.
+
+Configure via Flask config or environment variables:
+  EBAY_HTTP_POOL_SIZE    — keep-alive connections per host (default 10)
+  EBAY_HTTP_MAX_RETRIES  — retries after the first attempt (default 3)
+  EBAY_HTTP_BACKOFF      — base backoff in seconds, doubled per retry (default 0.5)
+  EBAY_HTTP_MAX_RETRY_AFTER — longest Retry-After honoured by sleeping (default 3); a longer one
+                           returns the 429 instead of blocking the worker. Background jobs pass
+                           max_retry_after=BACKGROUND_MAX_RETRY_AFTER.
+"""
+import http.cookiejar
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import ebay_rate_limit
+import settings
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+DEFAULT_MAX_RETRY_AFTER = 3
+BACKGROUND_MAX_RETRY_AFTER = 30
+
+# (connect, read) seconds per endpoint family; Trading API calls return large XML pages
+ENDPOINT_TIMEOUTS = {
+    'oauth': (5, 15),
+    'trading': (5, 30),
+    'finding': (5, 20),
+    'rest': (5, 20),
+}
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+
+def endpoint_for(url):
+    """Classify an eBay URL into one of the ENDPOINT_TIMEOUTS families."""
+    if '/identity/v1/oauth2/' in url:
+        return 'oauth'
+    if '/ws/api.dll' in url:
+        return 'trading'
+    if 'svcs.ebay.com' in url or 'svcs.sandbox.ebay.com' in url:
+        return 'finding'
+    return 'rest'
+
+
+class EbayClient:
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF,
+                 max_retry_after=DEFAULT_MAX_RETRY_AFTER):
+        self.pool_size = max(1, int(pool_size))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = float(backoff)
+        self.max_retry_after = max(0.0, float(max_retry_after))
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+    def _new_session(self):
+        s = requests.Session()
+        # API calls are made on behalf of many accounts; never carry cookies between them
+        s.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=0)
+        s.mount('https://', adapter)
+        s.mount('http://', adapter)
+        return s
+
+    @property
+    def session(self):
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    # Forked worker: sockets inherited from the parent are not ours to reuse
+                    self._session = self._new_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return int(retry_after)
+        return self.backoff * (2 ** attempt)
+
+    def request(self, method, url, timeout=None, retries=None, max_retry_after=None, **kwargs):
+        """Send a request through the pooled session.
+
+        Returns the final response (callers keep checking status_code as before); raises the
+        last requests exception if every attempt failed at the connection level. Pass
+        retries=0 for calls that must not be repeated (e.g. single-use authorization codes).
+        A retry that would sleep longer than max_retry_after (default EBAY_HTTP_MAX_RETRY_AFTER)
+        is not made; the 429/5xx response is returned instead.
+        """
+        max_retry_after = self.max_retry_after if max_retry_after is None else max_retry_after
+        if timeout is None:
+            timeout = ENDPOINT_TIMEOUTS[endpoint_for(url)]
+        retries = self.max_retries if retries is None else retries
+        family = ebay_rate_limit.family_for(url)
+        governor = ebay_rate_limit.get_governor()
+        attempt = 0
+        while True:
+            shed_reason = governor.acquire(family, ebay_rate_limit.current_priority())
+            if shed_reason:
+                return _shed_response(url, shed_reason)
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= retries:
+                    raise
+                time.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            governor.record(family, response, streamed=kwargs.get('stream', False))
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+            delay = self._delay(attempt, response)
+            if delay > max_retry_after:
+                return response
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+def _shed_response(url, reason):
+    """429 standing in for a call the rate-limit governor refused to send"""
+    response = requests.Response()
+    response.status_code = 429
+    response.reason = 'Too Many Requests'
+    response.url = url
+    response.headers['Content-Type'] = 'text/plain'
+    response.headers['X-GSale-Rate-Limited'] = '1'
+    response._content = 'Rate limited by GSale: {}'.format(reason).encode('utf-8')
+    response.encoding = 'utf-8'
+    return response
+
+
+_client = EbayClient()
+
+
+def configure_ebay_client(app=None):
+    """Build the shared client from config/env. Called once at app start-up; safe to call again."""
+    global _client
+    try:
+        _client = EbayClient(
+            pool_size=settings.get(app, 'EBAY_HTTP_POOL_SIZE', DEFAULT_POOL_SIZE),
+            max_retries=settings.get(app, 'EBAY_HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+            backoff=settings.get(app, 'EBAY_HTTP_BACKOFF', DEFAULT_BACKOFF),
+            max_retry_after=settings.get(app, 'EBAY_HTTP_MAX_RETRY_AFTER', DEFAULT_MAX_RETRY_AFTER),
+        )
+    except (TypeError, ValueError) as e:
+        print("Warning: invalid eBay HTTP settings ({}); using defaults".format(e))
+        _client = EbayClient()
+    return _client
+
+
+def get_client():
+    return _client
@@ -0,0 +1,361 @@
+"""
+Client-side rate-limit governor for eBay API calls, per API family.
+
+Every call made through ebay_client is classified (Trading, Sell Inventory, Fulfillment, Finances,
+Finding; OAuth and other endpoints are not governed) and must take a token from that family's
+bucket. Each family has its own refill rate and burst sized to its quota (Sell Inventory's 2M/day
+allows far more than Trading's 5000), overridable with EBAY_RATE_<FAMILY> (calls per second) and
+EBAY_RATE_BURST_<FAMILY> (e.g. EBAY_RATE_SELL_INVENTORY=50). The governor also keeps an
+estimate of the remaining daily quota: calls are counted locally and the estimate is corrected
+whenever eBay reports usage (rate-limit response headers, the Analytics API via
+update_from_analytics, or a quota error that marks the family exhausted until reset). A 429 is
+only a burst limit: it empties the family's bucket and holds the refill for its Retry-After (or a
+second, at most EBAY_RATE_THROTTLE_MAX_PAUSE seconds), so queued calls and EbayClient's own retry
+wait briefly instead of being shed for the day.
+
+Normal calls wait up to EBAY_RATE_MAX_WAIT seconds for a token. Low-priority calls (wrap them in
+`with low_priority():`) never wait and are shed first: when the bucket is empty, a normal call is
+queued, or the remaining quota is within EBAY_QUOTA_RESERVE (fraction of the daily limit).
+Shed calls get a synthetic 429 response, so callers' existing status_code checks handle them.
+
+State is per worker process, so each worker spends only its share of a daily quota: the limit (and
+any remaining figure eBay reports) is divided by EBAY_RATE_WORKERS, which defaults to gunicorn's
+WEB_CONCURRENCY or 1. Daily limits default to eBay's standard application limits and can be
+overridden per family with EBAY_QUOTA_<FAMILY> (e.g. EBAY_QUOTA_TRADING=5000).
+"""
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import settings
+
+DAY_SECONDS = 86400
+
+FAMILIES = ('trading', 'sell_inventory', 'fulfillment', 'finances', 'finding')
+FAMILY_LABELS = {
+    'trading': 'Trading',
+    'sell_inventory': 'Sell Inventory',
+    'fulfillment': 'Fulfillment',
+    'finances': 'Finances',
+    'finding': 'Finding',
+}
+DEFAULT_DAILY_LIMITS = {
+    'trading': 5000,
+    'sell_inventory': 2000000,
+    'fulfillment': 100000,
+    'finances': 15000,
+    'finding': 5000,
+}
+# Analytics API apiName (lower case) -> family
+ANALYTICS_API_NAMES = {
+    'tradingapi': 'trading',
+    'trading': 'trading',
+    'inventory': 'sell_inventory',
+    'fulfillment': 'fulfillment',
+    'finances': 'finances',
+    'findingapi': 'finding',
+    'finding': 'finding',
+}
+LIMIT_HEADERS = ('X-RateLimit-Limit', 'X-Ebay-C-RateLimit-Limit')
+REMAINING_HEADERS = ('X-RateLimit-Remaining', 'X-Ebay-C-RateLimit-Remaining')
+
+# (calls per second, burst) per family
+DEFAULT_RATES = {
+    'trading': (5.0, 10),
+    'sell_inventory': (50.0, 100),
+    'fulfillment': (20.0, 40),
+    'finances': (5.0, 10),
+    'finding': (5.0, 10),
+}
+DEFAULT_MAX_WAIT = 10.0
+DEFAULT_RESERVE = 0.2
+THROTTLE_PAUSE = 1.0
+DEFAULT_MAX_THROTTLE_PAUSE = 5.0
+
+_local = threading.local()
+
+
+def family_for(url):
+    """Governed API family of an eBay URL, or None for endpoints the governor does not limit"""
+    if '/ws/api.dll' in url:
+        return 'trading'
+    if 'svcs.ebay.com' in url or 'svcs.sandbox.ebay.com' in url:
+        return 'finding'
+    if '/sell/inventory/' in url:
+        return 'sell_inventory'
+    if '/sell/fulfillment/' in url:
+        return 'fulfillment'
+    if '/sell/finances/' in url:
+        return 'finances'
+    return None
+
+
+@contextmanager
+def with_priority(priority):
+    """Run eBay calls made by this thread inside the block at priority ('normal' or 'low').
+    Priority is thread-local: pool workers re-enter the submitting thread's current_priority()."""
+    previous = getattr(_local, 'priority', 'normal')
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def low_priority():
+    """Mark eBay calls made by this thread inside the block as low priority (shed first)"""
+    return with_priority('low')
+
+
+def current_priority():
+    return getattr(_local, 'priority', 'normal')
+
+
+class _Family:
+    def __init__(self, name, daily_limit, rate, burst, share=1.0):
+        self.name = name
+        self.share = share  # this worker's fraction of the daily quota
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.daily_limit = daily_limit
+        self.reported_remaining = None  # last figure eBay gave us
+        self.used_since_report = 0
+        self.used_today = 0
+        self.window_reset = time.time() + DAY_SECONDS
+        self.exhausted_until = 0
+        self.waiting = 0
+        self.calls = 0
+        self.shed = 0
+        self.waited = 0
+        self.source = 'local count'
+        self.updated_at = None
+
+    def roll_window(self, now):
+        if now >= self.window_reset:
+            self.used_today = 0
+            self.used_since_report = 0
+            self.reported_remaining = None
+            self.window_reset = now + DAY_SECONDS
+            self.source = 'local count'
+
+    def refill(self, now):
+        if now < self.refilled_at:
+            return  # refill held after a 429
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def remaining(self):
+        if self.exhausted_until > time.time():
+            return 0
+        if self.reported_remaining is not None:
+            return max(0, int(self.reported_remaining * self.share) - self.used_since_report)
+        return max(0, self.share_limit() - self.used_today)
+
+    def share_limit(self):
+        return int(self.daily_limit * self.share)
+
+
+class RateLimitGovernor:
+    def __init__(self, daily_limits=None, rates=None, max_wait=DEFAULT_MAX_WAIT, reserve=DEFAULT_RESERVE,
+                 max_throttle_pause=DEFAULT_MAX_THROTTLE_PAUSE, workers=1):
+        """rates: {family: (calls per second, burst)} over DEFAULT_RATES; workers: processes sharing the quota"""
+        limits = dict(DEFAULT_DAILY_LIMITS)
+        limits.update(daily_limits or {})
+        buckets = dict(DEFAULT_RATES)
+        buckets.update(rates or {})
+        self.max_wait = max(0.0, float(max_wait))
+        self.reserve = min(max(0.0, float(reserve)), 1.0)
+        self.max_throttle_pause = max(0.0, float(max_throttle_pause))
+        self.workers = max(1, int(workers))
+        self._cond = threading.Condition()
+        self._families = {name: _Family(name, int(limits[name]), max(0.01, float(buckets[name][0])),
+                                        max(1, int(buckets[name][1])), 1.0 / self.workers)
+                          for name in FAMILIES}
+
+    def acquire(self, family, priority='normal'):
+        """Take a call slot for family. Returns None when allowed, else the reason the call was shed."""
+        if family not in self._families:
+            return None
+        state = self._families[family]
+        deadline = time.monotonic() + (0 if priority == 'low' else self.max_wait)
+        with self._cond:
+            state.roll_window(time.time())
+            remaining = state.remaining()
+            if remaining <= 0:
+                state.shed += 1
+                return '{} daily quota exhausted'.format(FAMILY_LABELS[family])
+            if priority == 'low' and (state.waiting or remaining <= state.share_limit() * self.reserve):
+                state.shed += 1
+                return '{} quota reserved for priority calls'.format(FAMILY_LABELS[family])
+            queued = False
+            while True:
+                now = time.monotonic()
+                state.refill(now)
+                if state.tokens >= 1:
+                    state.tokens -= 1
+                    break
+                if now >= deadline:
+                    if queued:
+                        state.waiting -= 1
+                    state.shed += 1
+                    return '{} call rate limit reached'.format(FAMILY_LABELS[family])
+                if not queued:
+                    state.waiting += 1
+                    state.waited += 1
+                    queued = True
+                self._cond.wait(min(deadline - now, max(0.0, state.refilled_at - now) + (1 - state.tokens) / state.rate))
+            if queued:
+                state.waiting -= 1
+            state.calls += 1
+            state.used_today += 1
+            state.used_since_report += 1
+            return None
+
+    def record(self, family, response, streamed=False):
+        """Correct the quota estimate from an eBay response"""
+        if family not in self._families or response is None:
+            return
+        state = self._families[family]
+        limit = _header_int(response, LIMIT_HEADERS)
+        remaining = _header_int(response, REMAINING_HEADERS)
+        throttled = response.status_code == 429
+        exhausted = False
+        if not throttled and not streamed and response.status_code in (200, 500):
+            body = response.content or b''
+            # Trading: error 518 "call usage limit reached"; Finding: error 10001 from the RateLimiter
+            exhausted = ((family == 'trading' and b'<ErrorCode>518</ErrorCode>' in body)
+                         or (family == 'finding' and b'RateLimiter' in body))
+        with self._cond:
+            if limit is not None:
+                state.daily_limit = limit
+            if remaining is not None:
+                state.reported_remaining = remaining
+                state.used_since_report = 0
+                state.source = 'response headers'
+                state.updated_at = datetime.now()
+            if throttled:
+                # A 429 is a burst limit, not the daily quota: empty the bucket and hold the refill briefly
+                retry_after = response.headers.get('Retry-After')
+                pause = float(retry_after) if retry_after and retry_after.isdigit() else THROTTLE_PAUSE
+                state.tokens = 0.0
+                state.refilled_at = max(state.refilled_at, time.monotonic() + min(pause, self.max_throttle_pause))
+            elif exhausted:
+                state.exhausted_until = state.window_reset
+                state.reported_remaining = 0
+                state.used_since_report = 0
+                state.source = 'quota error'
+                state.updated_at = datetime.now()
+
+    def update_from_analytics(self, rate_limits):
+        """Apply the rateLimits list returned by the Developer Analytics API (daily windows only)"""
+        updated = set()
+        with self._cond:
+            for api in rate_limits or []:
+                family = ANALYTICS_API_NAMES.get(str(api.get('apiName', '')).lower())
+                if family is None:
+                    continue
+                limit = remaining = 0
+                reset = None
+                for resource in api.get('resources') or []:
+                    for rate in resource.get('rates') or []:
+                        if rate.get('timeWindow') not in (None, DAY_SECONDS):
+                            continue
+                        limit += int(rate.get('limit') or 0)
+                        remaining += int(rate.get('remaining') or 0)
+                        reset = _parse_reset(rate.get('reset')) or reset
+                if not limit:
+                    continue
+                state = self._families[family]
+                state.daily_limit = limit
+                state.reported_remaining = remaining
+                state.used_since_report = 0
+                state.used_today = int((limit - remaining) * state.share)
+                if reset:
+                    state.window_reset = reset
+                if remaining > 0:
+                    state.exhausted_until = 0
+                state.source = 'Analytics API'
+                state.updated_at = datetime.now()
+                updated.add(family)
+            self._cond.notify_all()
+        return sorted(updated)
+
+    def snapshot(self):
+        """Current budget per family, for the admin page"""
+        rows = []
+        with self._cond:
+            now = time.time()
+            for name in FAMILIES:
+                state = self._families[name]
+                state.roll_window(now)
+                state.refill(time.monotonic())
+                remaining = state.remaining()
+                share_limit = state.share_limit()
+                rows.append({
+                    'family': name,
+                    'label': FAMILY_LABELS[name],
+                    'daily_limit': state.daily_limit,
+                    'share_limit': share_limit,
+                    'workers': self.workers,
+                    'remaining': remaining,
+                    'remaining_pct': round(100.0 * remaining / share_limit, 1) if share_limit else 0,
+                    'resets_at': datetime.fromtimestamp(state.window_reset),
+                    'exhausted': state.exhausted_until > now,
+                    'bucket_tokens': int(state.tokens),
+                    'burst': state.burst,
+                    'calls': state.calls,
+                    'waited': state.waited,
+                    'shed': state.shed,
+                    'source': state.source,
+                    'updated_at': state.updated_at,
+                })
+        return rows
+
+
+def _header_int(response, names):
+    for name in names:
+        value = response.headers.get(name)
+        if value is not None and str(value).strip().isdigit():
+            return int(value)
+    return None
+
+
+def _parse_reset(value):
+    """Analytics API reset time (ISO 8601, UTC) -> epoch seconds"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+_governor = RateLimitGovernor()
+
+
+def configure(app=None):
+    """Build the governor from config/env. Called once at app start-up; safe to call again."""
+    global _governor
+    limits = {name: settings.get(app, 'EBAY_QUOTA_' + name.upper(), DEFAULT_DAILY_LIMITS[name], int) for name in FAMILIES}
+    rates = {name: (settings.get(app, 'EBAY_RATE_' + name.upper(), DEFAULT_RATES[name][0], float),
+                    settings.get(app, 'EBAY_RATE_BURST_' + name.upper(), DEFAULT_RATES[name][1], int))
+             for name in FAMILIES}
+    _governor = RateLimitGovernor(
+        daily_limits=limits,
+        rates=rates,
+        workers=settings.get(app, 'EBAY_RATE_WORKERS', settings.get(None, 'WEB_CONCURRENCY', 1, int), int),
+        max_wait=settings.get(app, 'EBAY_RATE_MAX_WAIT', DEFAULT_MAX_WAIT, float),
+        reserve=settings.get(app, 'EBAY_QUOTA_RESERVE', DEFAULT_RESERVE, float),
+        max_throttle_pause=settings.get(app, 'EBAY_RATE_THROTTLE_MAX_PAUSE', DEFAULT_MAX_THROTTLE_PAUSE, float),
+    )
+    return _governor
+
+
+def get_governor():
+    return _governor
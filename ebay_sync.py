@@ -0,0 +1,241 @@
+"""
+Background sync of sold eBay orders into ebay_sold_orders, read by /tools/ebay-sold-search.
+
+Each run pulls, for every account with stored eBay tokens, the orders modified since the previous
+run (Trading API GetOrders with ModTimeFrom/ModTimeTo, paginated) and upserts them locally. The
+page then reads the local table instead of calling GetMyeBaySelling inside the request, matching
+each order to its GSale item by items.ebay_item_id at read time.
+
+Runs on a daemon thread in each web worker, started by the worker's first request (start_sold_sync
+is a no-op once this process has started it, and a --preload master never does); a MySQL named
+lock makes sure only one worker syncs at a time. It can also run standalone:
+  python ebay_sync.py --once
+
+Configure via Flask config or environment variables:
+  EBAY_SOLD_SYNC_ENABLED   — start the background thread (default 1)
+  EBAY_SOLD_SYNC_INTERVAL  — seconds between runs (default 600)
+"""
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+import ebay_client
+import ebay_xml
+import get_data
+import set_data
+import settings
+
+TRADING_URL = 'https://api.ebay.com/ws/api.dll'
+SYNC_LOCK_NAME = 'gsale_ebay_sold_sync'
+DEFAULT_INTERVAL = 600
+# GetOrders only accepts ModTimeFrom within the last 30 days and CreateTimeFrom within 90
+MAX_MOD_TIME_DAYS = 30
+INITIAL_DAYS = 90
+# Re-read a little before the last window so orders modified during the previous run are not missed
+WINDOW_OVERLAP = timedelta(minutes=5)
+EBAY_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.000Z'
+CANCELLED_STATUSES = ('Cancelled', 'CancelPending')
+
+ORDER_CREATED = ebay_xml.ns_path('CreatedTime')
+ORDER_MODIFIED = ebay_xml.ns_path('CheckoutStatus/LastModifiedTime')
+LINE_ITEM_ID = ebay_xml.ns_path('OrderLineItemID')
+ITEM_TITLE = ebay_xml.ns_path('Item/Title')
+QUANTITY = ebay_xml.ns_path('QuantityPurchased')
+CREATED_DATE = ebay_xml.ns_path('CreatedDate')
+
+_start_lock = threading.Lock()
+_started_pid = None
+
+
+def _ebay_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S')
+    except ValueError:
+        return None
+
+
+def parse_orders(xml_text):
+    """Flatten a GetOrders response into one row per order line item. Returns (rows, has_more)."""
+    root = ET.fromstring(xml_text)
+    error = ebay_xml.api_error(root)
+    if error:
+        raise RuntimeError(error)
+    rows = []
+    for order, transaction, item_id in ebay_xml.iter_order_transactions(root):
+        if not item_id:
+            continue
+        order_id = ebay_xml.text(order, ebay_xml.ORDER_ID)
+        price_elem = transaction.find(ebay_xml.TRANSACTION_PRICE)
+        rows.append({
+            'order_line_item_id': ebay_xml.text(transaction, LINE_ITEM_ID) or '{}-{}'.format(item_id, order_id),
+            'order_id': order_id,
+            'ebay_item_id': item_id,
+            'title': ebay_xml.text(transaction, ITEM_TITLE, 'N/A')[:255],
+            'price': float(price_elem.text) if price_elem is not None and price_elem.text else 0,
+            'currency': price_elem.get('currencyID', 'USD') if price_elem is not None else 'USD',
+            'quantity': int(ebay_xml.text(transaction, QUANTITY, '1')),
+            'sold_at': _ebay_time(ebay_xml.text(transaction, CREATED_DATE)) or _ebay_time(ebay_xml.text(order, ORDER_CREATED)),
+            'modified_at': _ebay_time(ebay_xml.text(order, ORDER_MODIFIED)),
+            'is_cancelled': ebay_xml.text(order, ebay_xml.ORDER_STATUS, '') in CANCELLED_STATUSES,
+        })
+    return rows, ebay_xml.text(root, ebay_xml.HAS_MORE_ORDERS) == 'true'
+
+
+def fetch_orders(app, user_token, window_from, window_to, by_mod_time=True):
+    """All GetOrders pages for a time window (UTC datetimes)."""
+    field = 'ModTime' if by_mod_time else 'CreateTime'
+    headers = {
+        'X-EBAY-API-COMPATIBILITY-LEVEL': '1193',
+        'X-EBAY-API-DEV-NAME': app.config.get('EBAY_DEV_NAME', 'your_dev_name'),
+        'X-EBAY-API-APP-NAME': app.config.get('EBAY_APP_NAME', 'your_app_name'),
+        'X-EBAY-API-CERT-NAME': app.config.get('EBAY_CERT_NAME', 'your_cert_name'),
+        'X-EBAY-API-CALL-NAME': 'GetOrders',
+        'X-EBAY-API-SITEID': '0',
+        'Content-Type': 'text/xml'
+    }
+    rows = []
+    page = 1
+    while True:
+        xml_request = """<?xml version="1.0" encoding="utf-8"?>
+        <GetOrdersRequest xmlns="urn:ebay:apis:eBLBaseComponents">
+            <RequesterCredentials>
+                <eBayAuthToken>{token}</eBayAuthToken>
+            </RequesterCredentials>
+            <{field}From>{start}</{field}From>
+            <{field}To>{end}</{field}To>
+            <OrderRole>Seller</OrderRole>
+            <OrderStatus>All</OrderStatus>
+            <Pagination>
+                <EntriesPerPage>100</EntriesPerPage>
+                <PageNumber>{page}</PageNumber>
+            </Pagination>
+            <Version>1193</Version>
+        </GetOrdersRequest>""".format(token=user_token, field=field, page=page,
+                                      start=window_from.strftime(EBAY_TIME_FORMAT), end=window_to.strftime(EBAY_TIME_FORMAT))
+        response = ebay_client.get_client().post(TRADING_URL, data=xml_request, headers=headers,
+                                                    max_retry_after=ebay_client.BACKGROUND_MAX_RETRY_AFTER)
+        if response.status_code != 200:
+            raise RuntimeError('GetOrders HTTP {}'.format(response.status_code))
+        page_rows, has_more = parse_orders(response.text)
+        rows.extend(page_rows)
+        if not has_more:
+            return rows
+        page += 1
+
+
+def sync_account(app, account_id, user_token):
+    """Pull orders modified since the last run for one account and store them. Returns rows stored."""
+    now = datetime.utcnow()
+    state = get_data.get_ebay_sync_state(account_id)
+    last = state['last_mod_time'] if state else None
+    try:
+        if last and now - last < timedelta(days=MAX_MOD_TIME_DAYS):
+            rows = fetch_orders(app, user_token, last - WINDOW_OVERLAP, now)
+        else:
+            # First run, or the gap is beyond what ModTimeFrom allows: take everything created recently
+            rows = fetch_orders(app, user_token, now - timedelta(days=INITIAL_DAYS), now, by_mod_time=False)
+    except Exception as e:
+        set_data.set_ebay_sync_state(account_id, last, error=str(e)[:1000])
+        raise
+    set_data.set_ebay_sold_orders(account_id, rows)
+    set_data.set_ebay_sync_state(account_id, now)
+    return len(rows)
+
+
+def _acquire_lock(cur):
+    cur.execute("SELECT GET_LOCK(%s, 0) AS acquired", (SYNC_LOCK_NAME,))
+    row = cur.fetchone()
+    return bool(row and row['acquired'])
+
+
+def run_sync(app, mysql, token_provider):
+    """One sync pass over every account with eBay tokens, unless another worker is already running one."""
+    with app.app_context():
+        cur = mysql.connection.cursor()
+        if not _acquire_lock(cur):
+            cur.close()
+            return None
+        synced = {}
+        try:
+            for account_id in get_data.get_ebay_token_accounts():
+                user_token = token_provider(account_id)
+                if not user_token:
+                    continue
+                try:
+                    synced[account_id] = sync_account(app, account_id, user_token)
+                except Exception as e:
+                    print("Error syncing eBay sold orders for account {}: {}".format(account_id, e))
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (SYNC_LOCK_NAME,))
+            cur.close()
+        return synced
+
+
+def local_sold_listings(num_items):
+    """
+    Sold listings for the current account from the local store, in the shape search_ebay_sold_items
+    returns; None when the account has never been synced (callers fall back to the live API).
+    """
+    state = get_data.get_ebay_sync_state(get_data.get_current_user_id())
+    if not state or not state.get('last_success_at'):
+        return None
+    listings, total = get_data.get_ebay_sold_orders(num_items)
+    return {
+        'success': True,
+        'listings': listings,
+        'total': total,
+        'returned': len(listings),
+        'note': 'Showing your sold items (synced {} UTC)'.format(state['last_success_at'].strftime('%Y-%m-%d %H:%M'))
+    }
+
+
+def _loop(app, mysql, token_provider, interval):
+    while True:
+        try:
+            run_sync(app, mysql, token_provider)
+        except Exception as e:
+            print("Error in eBay sold sync: {}".format(e))
+        time.sleep(interval)
+
+
+def start_sold_sync(app, mysql, token_provider):
+    """
+    Start the background sync thread for this worker if EBAY_SOLD_SYNC_ENABLED; returns it, or None when
+    disabled or already started in this process. Cheap enough to call on every request.
+    """
+    global _started_pid
+    if _started_pid == os.getpid():
+        return None
+    with _start_lock:
+        if _started_pid == os.getpid():
+            return None
+        # Recorded per pid: a forked worker starts its own thread, never relying on the parent's
+        _started_pid = os.getpid()
+    enabled = app.config.get('EBAY_SOLD_SYNC_ENABLED', os.environ.get('EBAY_SOLD_SYNC_ENABLED', '1'))
+    if str(enabled).strip().lower() in ('0', 'false', 'no', 'off', 'none', ''):
+        return None
+    if mysql is None:
+        return None
+    interval = settings.get(app, 'EBAY_SOLD_SYNC_INTERVAL', DEFAULT_INTERVAL, int)
+    thread = threading.Thread(target=_loop, args=(app, mysql, token_provider, max(60, interval)),
+                              name='ebay-sold-sync', daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Sync sold eBay orders into the local store')
+    parser.add_argument('--once', action='store_true', help='run a single pass and exit')
+    args = parser.parse_args()
+    os.environ['EBAY_SOLD_SYNC_ENABLED'] = '0'
+    from app import app as flask_app, mysql as flask_mysql, get_ebay_token_for_user
+    if args.once:
+        print(run_sync(flask_app, flask_mysql, get_ebay_token_for_user))
+    else:
+        _loop(flask_app, flask_mysql, get_ebay_token_for_user,
+              settings.get(flask_app, 'EBAY_SOLD_SYNC_INTERVAL', DEFAULT_INTERVAL, int))
@@ -0,0 +1,72 @@
+"""
+Per-process cache of eBay OAuth tokens, keyed by account id.
+
+Saves the ebay_tokens read that get_valid_ebay_token / refresh_token_if_needed otherwise make on
+every eBay page load, and serializes refreshes per account (single flight): when several requests
+find the same token expiring, one calls eBay and the rest wait and reuse its result.
+
+Entries are written through by store_ebay_tokens_in_db and dropped when tokens are cleared. They
+are also re-read from the database after EBAY_TOKEN_CACHE_SECONDS (default 300) so a token
+refreshed or revoked by another worker process is picked up; access tokens stay valid until their
+own expiry, so a briefly stale entry is still usable.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import settings
+
+DEFAULT_MAX_AGE = 300
+
+_entries = {}
+_refresh_locks = {}
+_lock = threading.Lock()
+_max_age = DEFAULT_MAX_AGE
+
+
+def configure(app=None):
+    global _max_age
+    _max_age = settings.get(app, 'EBAY_TOKEN_CACHE_SECONDS', DEFAULT_MAX_AGE, int)
+
+
+def get(user_id):
+    """Cached {'access_token', 'refresh_token', 'expires_at', 'user_id'} or None"""
+    if not user_id:
+        return None
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry['cached_at'] > _max_age:
+            del _entries[user_id]
+            return None
+        return dict(entry['tokens'])
+
+
+def put(user_id, access_token, refresh_token, expires_at):
+    if not user_id:
+        return
+    with _lock:
+        _entries[user_id] = {
+            'tokens': {'access_token': access_token, 'refresh_token': refresh_token,
+                       'expires_at': expires_at, 'user_id': user_id},
+            'cached_at': time.monotonic(),
+        }
+
+
+def invalidate(user_id=None):
+    """Drop one account's entry, or every entry when user_id is None"""
+    with _lock:
+        if user_id is None:
+            _entries.clear()
+        else:
+            _entries.pop(user_id, None)
+
+
+@contextmanager
+def refresh_lock(user_id):
+    """Hold the account's refresh lock; callers re-check the cache inside before refreshing"""
+    with _lock:
+        lock = _refresh_locks.setdefault(user_id, threading.Lock())
+    with lock:
+        yield
@@ -0,0 +1,120 @@
+"""
+Background refresh of eBay OAuth tokens ahead of expiry, so requests never wait on a refresh.
+
+Every EBAY_TOKEN_REFRESH_INTERVAL seconds (default 300, jittered by ±20% per worker) the refresher
+scans ebay_tokens for tokens expiring within EBAY_TOKEN_REFRESH_WINDOW seconds (default 2700) and
+refreshes them. Each token also gets a random extra lead of up to one interval so tokens issued
+together are not all refreshed in the same pass. The window is kept wider than the request path's
+own 30-minute threshold (refresh_token_if_needed), so a scanned token never reaches it.
+
+Runs on a daemon thread in each web worker, started by the worker's first request
+(start_token_refresher is a no-op once this process has started it); a MySQL named lock lets only
+one worker scan at a time, and refreshes go through the same per-account single flight as the
+request path.
+"""
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+import get_data
+import settings
+
+REFRESH_LOCK_NAME = 'gsale_ebay_token_refresh'
+DEFAULT_INTERVAL = 300
+DEFAULT_WINDOW = 2700
+INTERVAL_JITTER = 0.2
+
+_start_lock = threading.Lock()
+_started_pid = None
+_status = {'started': False, 'interval': DEFAULT_INTERVAL, 'window': DEFAULT_WINDOW,
+           'last_run_at': None, 'last_refreshed': 0, 'last_failed': 0}
+
+
+def status():
+    return dict(_status)
+
+
+def _due(token, now, window, spread):
+    expires_at = token.get('expires_at')
+    if not expires_at:
+        return False
+    lead = timedelta(seconds=window + random.uniform(0, spread))
+    return expires_at - lead <= now
+
+
+def refresh_tokens(refresh_fn, window, spread=0, force=False):
+    """Refresh every token with a refresh_token that is due (or all of them when force). Returns (refreshed, failed)."""
+    now = datetime.now()
+    horizon = None if force else now + timedelta(seconds=window + spread)
+    refreshed = failed = 0
+    for token in get_data.get_ebay_tokens_for_refresh(horizon):
+        if not force and not _due(token, now, window, spread):
+            continue
+        try:
+            result = refresh_fn(token['user_id'], token['refresh_token'], token['expires_at'])
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        if result.get('success'):
+            refreshed += 1
+        else:
+            failed += 1
+            print("eBay token refresh failed for account {}: {}".format(token['user_id'], result.get('error')))
+    return refreshed, failed
+
+
+def run_refresh(app, mysql, refresh_fn, force=False):
+    """One scan, unless another worker holds the refresh lock. Returns (refreshed, failed) or None."""
+    with app.app_context():
+        cur = mysql.connection.cursor()
+        cur.execute("SELECT GET_LOCK(%s, 0) AS acquired", (REFRESH_LOCK_NAME,))
+        row = cur.fetchone()
+        if not (row and row['acquired']):
+            cur.close()
+            return None
+        try:
+            counts = refresh_tokens(refresh_fn, _status['window'], spread=_status['interval'], force=force)
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (REFRESH_LOCK_NAME,))
+            cur.close()
+    _status['last_run_at'] = datetime.now()
+    _status['last_refreshed'], _status['last_failed'] = counts
+    return counts
+
+
+def _loop(app, mysql, refresh_fn):
+    # Start at a random point of the interval so workers booted together do not scan in lockstep
+    time.sleep(random.uniform(0, _status['interval']))
+    while True:
+        try:
+            run_refresh(app, mysql, refresh_fn)
+        except Exception as e:
+            print("Error in eBay token refresher: {}".format(e))
+        interval = _status['interval']
+        time.sleep(interval * random.uniform(1 - INTERVAL_JITTER, 1 + INTERVAL_JITTER))
+
+
+def start_token_refresher(app, mysql, refresh_fn):
+    """
+    Start the refresher thread for this worker unless EBAY_TOKEN_REFRESH_ENABLED is off.
+    refresh_fn(user_id, refresh_token, expires_at) -> {'success': bool, ...}
+    Returns None when disabled or already started in this process; cheap enough to call on every request.
+    """
+    global _started_pid
+    if _started_pid == os.getpid():
+        return None
+    with _start_lock:
+        if _started_pid == os.getpid():
+            return None
+        # Recorded per pid: a forked worker starts its own thread, never relying on the parent's
+        _started_pid = os.getpid()
+    _status['interval'] = max(60, settings.get(app, 'EBAY_TOKEN_REFRESH_INTERVAL', DEFAULT_INTERVAL, int))
+    _status['window'] = settings.get(app, 'EBAY_TOKEN_REFRESH_WINDOW', DEFAULT_WINDOW, int)
+    enabled = app.config.get('EBAY_TOKEN_REFRESH_ENABLED', os.environ.get('EBAY_TOKEN_REFRESH_ENABLED', '1'))
+    if str(enabled).strip().lower() in ('0', 'false', 'no', 'off', 'none', '') or mysql is None:
+        return None
+    thread = threading.Thread(target=_loop, args=(app, mysql, refresh_fn), name='ebay-token-refresher', daemon=True)
+    thread.start()
+    _status['started'] = True
+    return thread
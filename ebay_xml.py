@@ -0,0 +1,199 @@
+"""
+Extraction of Trading API (urn:ebay:apis:eBLBaseComponents) XML into plain records.
+
+Every field is read through a namespaced direct child path built once at import (e.g.
+Item/SellingStatus/CurrentPrice) instead of `.//{ns}X` descendant searches, which walk the whole
+subtree on every lookup and dominated parsing time on large GetMyeBaySelling/GetOrders pages.
+Works on xml.etree elements, including ones produced incrementally by iterparse.
+
+Benchmark: python scripts/benchmark_xml_extraction.py
+"""
+import xml.etree.ElementTree as ET
+
+NS = '{urn:ebay:apis:eBLBaseComponents}'
+
+
+def ns_path(path):
+    """'SellingStatus/CurrentPrice' -> '{ns}SellingStatus/{ns}CurrentPrice'"""
+    return '/'.join(NS + part for part in path.split('/'))
+
+
+# Response level
+ERRORS = ns_path('Errors')
+ERROR_SEVERITY = ns_path('SeverityCode')
+ERROR_LONG_MESSAGE = ns_path('LongMessage')
+ERROR_SHORT_MESSAGE = ns_path('ShortMessage')
+ORDERS = ns_path('OrderArray/Order')
+HAS_MORE_ORDERS = ns_path('HasMoreOrders')
+
+# GetMyeBaySelling SoldList / ActiveList Item
+ITEM_ID = ns_path('ItemID')
+ITEM_TITLE = ns_path('Title')
+ITEM_CONDITION = ns_path('ConditionDisplayName')
+ITEM_QUANTITY = ns_path('Quantity')
+ITEM_END_TIME = ns_path('ListingDetails/EndTime')
+ITEM_START_TIME = ns_path('ListingDetails/StartTime')
+ITEM_CURRENT_PRICE = ns_path('SellingStatus/CurrentPrice')
+ITEM_LISTING_STATUS = ns_path('SellingStatus/ListingStatus')
+ITEM_GALLERY_URL = ns_path('PictureDetails/GalleryURL')
+ITEM_CATEGORY = ns_path('PrimaryCategory/CategoryName')
+ITEM_CANCEL_REASON = ns_path('CancelReason')
+ITEM_TRANSACTIONS = ns_path('TransactionArray/Transaction')
+
+# GetOrders Order / Transaction
+ORDER_ID = ns_path('OrderID')
+ORDER_STATUS = ns_path('OrderStatus')
+ORDER_CREATED_TIME = ns_path('CreatedTime')
+ORDER_SUBTOTAL = ns_path('Subtotal')
+ORDER_TOTAL = ns_path('Total')
+ORDER_SHIPPING_COST = ns_path('ShippingServiceSelected/ShippingServiceCost')
+ORDER_SALES_TAX = ns_path('ShippingDetails/SalesTax/SalesTaxAmount')
+ORDER_TRANSACTIONS = ns_path('TransactionArray/Transaction')
+ORDER_FEES = ns_path('Fees/Fee')
+TRANSACTION_ITEM_ID = ns_path('Item/ItemID')
+TRANSACTION_LINE_ITEM_ID = ns_path('OrderLineItemID')
+TRANSACTION_CREATED_DATE = ns_path('CreatedDate')
+TRANSACTION_PRICE = ns_path('TransactionPrice')
+TRANSACTION_FVF = ns_path('FinalValueFee')
+TRANSACTION_SHIPPING_COST = ns_path('ShippingServiceSelected/ShippingServiceCost')
+TRANSACTION_ACTUAL_SHIPPING = ns_path('ActualShippingCost')
+TRANSACTION_ORDER_STATUS = ns_path('ContainingOrder/OrderStatus')
+TRANSACTION_PAYMENT_STATUS = ns_path('Status/eBayPaymentStatus')
+FEE_NAME = ns_path('Name')
+FEE_AMOUNT = ns_path('Fee')
+
+
+def text(elem, path, default=None):
+    found = elem.find(path)
+    return found.text if found is not None and found.text else default
+
+
+def number(elem, path, default=0.0):
+    value = text(elem, path)
+    try:
+        return float(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+def api_error(root):
+    """LongMessage (or ShortMessage) of the first non-warning Errors block, or None"""
+    for error in root.findall(ERRORS):
+        if text(error, ERROR_SEVERITY) == 'Warning':
+            continue
+        return text(error, ERROR_LONG_MESSAGE) or text(error, ERROR_SHORT_MESSAGE) or 'Unknown error'
+    return None
+
+
+def _is_cancelled_text(value, extra=()):
+    return bool(value) and any(word in value for word in ('Cancelled', 'Canceled') + tuple(extra))
+
+
+def sold_item(item):
+    """GetMyeBaySelling SoldList <Item> -> sold-item record used by the sold tools"""
+    item_id = text(item, ITEM_ID)
+    title = text(item, ITEM_TITLE, 'N/A')
+    quantity = text(item, ITEM_QUANTITY)
+
+    price = 0
+    currency = 'USD'
+    current_price = item.find(ITEM_CURRENT_PRICE)
+    if current_price is not None:
+        price = float(current_price.text) if current_price.text else 0
+        currency = current_price.get('currencyID') or currency
+
+    # Cancelled when every transaction on the item is cancelled, the listing itself is, or (with no
+    # valid transaction to go on) eBay mentions a cancellation anywhere in the item
+    is_cancelled = False
+    has_valid_transaction = False
+    transactions = item.findall(ITEM_TRANSACTIONS)
+    for transaction in transactions:
+        if (_is_cancelled_text(text(transaction, TRANSACTION_ORDER_STATUS))
+                or _is_cancelled_text(text(transaction, TRANSACTION_PAYMENT_STATUS), ('Failed', 'NoPayment'))):
+            continue
+        has_valid_transaction = True
+        break
+    if transactions and not has_valid_transaction:
+        is_cancelled = True
+    if not is_cancelled and _is_cancelled_text(text(item, ITEM_LISTING_STATUS)):
+        is_cancelled = True
+    if not is_cancelled and item.find(ITEM_CANCEL_REASON) is not None:
+        is_cancelled = True
+    if not is_cancelled and not has_valid_transaction:
+        item_text = ET.tostring(item, encoding='unicode', method='text').lower()
+        if 'cancel' in item_text:
+            is_cancelled = True
+
+    return {
+        'itemId': item_id or 'N/A',
+        'title': title,
+        'description': title,
+        'condition': text(item, ITEM_CONDITION, 'N/A'),
+        'quantity': int(quantity) if quantity else 0,
+        'sku': item_id or 'N/A',
+        'end_time': text(item, ITEM_END_TIME, 'N/A'),
+        'price': price,
+        'currency': currency,
+        'image_url': text(item, ITEM_GALLERY_URL),
+        'category': text(item, ITEM_CATEGORY, 'N/A'),
+        'status': 'Sold',
+        'is_cancelled': is_cancelled,
+        'ebay_url': 'https://www.ebay.com/itm/{}'.format(item_id) if item_id else '#'
+    }
+
+
+def iter_order_transactions(root):
+    """(order, transaction, ebay_item_id) for every line of a GetOrders response"""
+    for order in root.findall(ORDERS):
+        for transaction in order.findall(ORDER_TRANSACTIONS):
+            yield order, transaction, text(transaction, TRANSACTION_ITEM_ID)
+
+
+def order_breakdown(order, transaction, order_id):
+    """GetOrders Order + Transaction -> transaction_data breakdown (fees from the response, not estimates)"""
+    data = {
+        'final_price': number(transaction, TRANSACTION_PRICE),
+        'subtotal': number(order, ORDER_SUBTOTAL),
+        'shipping': 0,
+        'listing_fees': 0,
+        'final_value_fee': number(transaction, TRANSACTION_FVF),
+        'paypal_fee': 0,
+        'sales_tax': number(order, ORDER_SALES_TAX),
+        'net_earnings': 0,
+        'total_fees': 0,
+        'has_actual_fees': True,
+        'order_id': order_id
+    }
+    for elem, path in ((order, ORDER_SHIPPING_COST), (transaction, TRANSACTION_SHIPPING_COST),
+                       (transaction, TRANSACTION_ACTUAL_SHIPPING)):
+        if elem.find(path) is not None:
+            data['shipping'] = number(elem, path)
+            break
+    if order.find(ORDER_TOTAL) is not None:
+        data['final_price'] = number(order, ORDER_TOTAL, data['final_price'])
+
+    for fee in order.findall(ORDER_FEES):
+        name = (text(fee, FEE_NAME) or '').lower()
+        amount = number(fee, FEE_AMOUNT)
+        if 'final value' in name:
+            data['final_value_fee'] += amount
+        elif 'paypal' in name:
+            data['paypal_fee'] += amount
+        elif 'listing' in name or 'insertion' in name:
+            data['listing_fees'] += amount
+
+    data['total_fees'] = data['final_value_fee'] + data['paypal_fee'] + data['listing_fees']
+    data['net_earnings'] = data['final_price'] - data['total_fees']
+    return data
+
+
+def final_value_fees(root):
+    """[{'order_id', 'final_value_fee'}] for each order in a GetOrders response that reports an FVF"""
+    fees = []
+    for order in root.findall(ORDERS):
+        order_id = text(order, ORDER_ID)
+        transaction = order.find(ORDER_TRANSACTIONS)
+        if order_id is None or transaction is None or transaction.find(TRANSACTION_FVF) is None:
+            continue
+        fees.append({'order_id': order_id, 'final_value_fee': number(transaction, TRANSACTION_FVF)})
+    return fees
@@ -1,14 +1,16 @@
 import datetime
 from datetime import date, timedelta
-from flask import Flask, session
+from flask import session
 
-from flask_mysqldb import MySQL
 import bcrypt
 
-app = Flask(__name__)
-app.secret_key = 'your-secret-key-here'  # Required for session functionality
+# MySQL connection will be set by app.py (shared pool, no second Flask app)
+mysql = None
 
-mysql = MySQL(app)
+def set_mysql_connection(mysql_connection):
+    """Set the MySQL connection from the main app"""
+    global mysql
+    mysql = mysql_connection
 
 def set_dates(details):
     """Optimized date calculation for reports"""
@@ -1,4 +1,5 @@
 import datetime
+import json
 from datetime import date, timedelta
 from flask import session
 
@@ -59,6 +60,45 @@ def validate_date_input(value, default=None):
         except ValueError:
             return default
 
+WILDCARD_DATES = ('', '%', '%-%-%', 'all', 'All')
+
+def date_range(selection):
+    """Turn a year/month/day/"all" selection into an inclusive (start, end) for BETWEEN.
+
+    Accepts 'YYYY', 'YYYY-MM', 'YYYY-MM-DD' and the legacy LIKE patterns callers used to
+    build ('YYYY-%-%', '%YYYY%', '%'). Returns None for wildcards, i.e. no predicate at all.
+    Unrecognised input yields an empty range, matching what the LIKE pattern would have found.
+    """
+    if selection is None:
+        return None
+    value = str(selection).strip()
+    if value in WILDCARD_DATES:
+        return None
+    value = value.strip('%')
+    parts = [p for p in value.split('-') if p and p != '%']
+    try:
+        if len(parts) == 1:
+            year = int(parts[0])
+            return "{:04d}-01-01".format(year), "{:04d}-12-31".format(year)
+        if len(parts) == 2:
+            year, month = int(parts[0]), int(parts[1])
+            first = datetime.date(year, month, 1)
+            next_month = datetime.date(year + month // 12, month % 12 + 1, 1)
+            return first.strftime('%Y-%m-%d'), (next_month - timedelta(days=1)).strftime('%Y-%m-%d')
+        if len(parts) == 3:
+            day = datetime.date(int(parts[0]), int(parts[1]), int(parts[2])).strftime('%Y-%m-%d')
+            return day, day
+    except ValueError:
+        pass
+    return '9999-12-31', '0001-01-01'
+
+def date_filter_sql(column, selection):
+    """Sargable 'AND column BETWEEN %s AND %s' fragment and its params; empty for wildcards."""
+    bounds = date_range(selection)
+    if bounds is None:
+        return "", []
+    return "AND {} BETWEEN %s AND %s".format(column), list(bounds)
+
 # We'll get the mysql object passed to us or use a global reference
 mysql = None
 
@@ -107,7 +147,8 @@ def get_all_from_group(group_id):
 
 def get_all_from_group_and_items(date):
     if not date:
-        date= '%' + str(datetime.date.today().year) + '%'
+        date = str(datetime.date.today().year)
+    date_sql, date_params = date_filter_sql('c.date', date)
     cur = mysql.connection.cursor()
     cur.execute("""
         SELECT 
@@ -123,10 +164,10 @@ def get_all_from_group_and_items(date):
         FROM collection c
         LEFT JOIN items i ON c.id = i.group_id
         LEFT JOIN sale s ON i.id = s.id
-        WHERE c.date LIKE %s AND c.group_id = %s
+        WHERE c.group_id = %s {}
         GROUP BY c.id, c.name, c.price, c.date, c.location_address, c.neighborhood_id
         ORDER BY c.date
-    """, (date, get_current_group_id()))
+    """.format(date_sql), [get_current_group_id()] + date_params)
     return list(cur.fetchall())
 
 def get_all_from_group_and_items_by_year(year):
@@ -179,42 +220,39 @@ def get_all_from_group_and_items_by_name(name):
 def get_all_from_groups(date):
     cur = mysql.connection.cursor()
     
-    # Handle wildcard case - if date is '%', get all groups regardless of date
-    if date == '%':
-        cur.execute("SELECT * FROM collection WHERE collection.group_id = %s ORDER BY name ASC", 
-                   (get_current_group_id(),))
-    else:
-        # Use validation function for specific dates
-        validated_date = validate_date_input(date)
-        search_pattern = '%{}%'.format(validated_date)
-        cur.execute("SELECT * FROM collection WHERE date LIKE %s AND collection.group_id = %s ORDER BY name ASC", 
-                   (search_pattern, get_current_group_id()))
+    # Wildcard ('%') gets all groups regardless of date; anything else is validated first
+    if date not in WILDCARD_DATES:
+        date = validate_date_input(date)
+    date_sql, date_params = date_filter_sql('date', date)
+    cur.execute("SELECT * FROM collection WHERE collection.group_id = %s {} ORDER BY name ASC".format(date_sql),
+               [get_current_group_id()] + date_params)
     
     return list(cur.fetchall())
 
 def get_group_choices_for_account(date_pattern='%'):
     """id and name only — for dropdowns (avoids SELECT * on every collection row). Same date filter as get_all_from_groups."""
     cur = mysql.connection.cursor()
-    like_pat = '%' + date_pattern + '%'
+    date_sql, date_params = date_filter_sql('date', date_pattern)
     cur.execute(
-        "SELECT id, name FROM collection WHERE date LIKE %s AND account = %s ORDER BY date DESC, name ASC",
-        (like_pat, session['id']),
+        "SELECT id, name FROM collection WHERE account = %s {} ORDER BY date DESC, name ASC".format(date_sql),
+        [session['id']] + date_params,
     )
     return list(cur.fetchall())
 
 def get_purchased_from_date(start_date, end_date):
-    """Optimized purchase report query"""
+    """Purchase report from the daily rollup (one row per purchase day, not per collection)"""
     cur = mysql.connection.cursor()
     cur.execute("""
         SELECT
-            date,
-            SUM(price) as price,
-            DAYNAME(date) as day
-        FROM collection
-        WHERE date BETWEEN %s AND %s 
+            rollup_date AS date,
+            SUM(purchase_spend) as price,
+            DAYNAME(rollup_date) as day
+        FROM report_daily_rollup
+        WHERE rollup_date BETWEEN %s AND %s 
         AND account = %s 
-        GROUP BY date 
-        ORDER BY date ASC
+        AND purchase_count > 0 
+        GROUP BY rollup_date 
+        ORDER BY rollup_date ASC
     """, (start_date, end_date, session.get('id')))
     return list(cur.fetchall())
 
@@ -261,19 +299,18 @@ def get_data_from_group_list(group_id):
     return list(cur.fetchall())
 
 def get_group_sold_from_date(start_date, end_date):
-    """Optimized group sales report query"""
+    """Net sales of items by the day their collection was bought, from the daily rollup"""
     cur = mysql.connection.cursor()
     cur.execute("""
         SELECT 
-            c.date,
-            COALESCE(SUM(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0)), 0) AS net
-        FROM collection c
-        LEFT JOIN items i ON c.id = i.group_id
-        LEFT JOIN sale s ON i.id = s.id
-        WHERE c.date BETWEEN %s AND %s 
-        AND c.account = %s 
-        GROUP BY c.date 
-        ORDER BY c.date
+            rollup_date AS date,
+            COALESCE(SUM(purchase_net), 0) AS net
+        FROM report_daily_rollup
+        WHERE rollup_date BETWEEN %s AND %s 
+        AND account = %s 
+        AND purchase_count > 0 
+        GROUP BY rollup_date 
+        ORDER BY rollup_date
     """, (start_date, end_date, session.get('id')))
     return list(cur.fetchall())
 
@@ -324,7 +361,7 @@ def get_list_of_items_with_name(name, sold):
     search_pattern = '%{}%'.format(validated_name)
     cur = mysql.connection.cursor()
     
-    # Use GROUP BY to ensure one row per item, avoiding duplicates from joins
+    # item_latest_sale holds one row per item, so every join here is 1:1
     cur.execute("""SELECT 
                 items.id,
                 items.name, 
@@ -333,32 +370,19 @@ def get_list_of_items_with_name(name, sold):
                 items.ebay_item_id,
                 items.returned,
                 items.list_date,
-                COALESCE(MAX(categories.uuid_id), items.category_id) AS category_id,
-                MAX(sale.price) AS gross_price,
-                MAX(sale.shipping_fee) AS shipping_fee,
-                MAX(sale.date) AS sale_date,
-                (MAX(sale.price) - MAX(sale.shipping_fee)) AS net,
+                COALESCE(categories.uuid_id, items.category_id) AS category_id,
+                ls.price AS gross_price,
+                ls.shipping_fee AS shipping_fee,
+                ls.sale_date AS sale_date,
+                (ls.price - ls.shipping_fee) AS net,
                 collection.id as group_id,
                 collection.name as group_name
                 FROM items items 
                 INNER JOIN collection collection ON items.group_id = collection.id
-                LEFT JOIN (
-                    SELECT s1.id, s1.price, s1.shipping_fee, s1.date
-                    FROM sale s1
-                    INNER JOIN (
-                        SELECT s.id, MAX(s.date) AS max_date
-                        FROM sale s
-                        INNER JOIN items i2 ON s.id = i2.id
-                        INNER JOIN collection c2 ON i2.group_id = c2.id
-                        WHERE i2.name LIKE %s AND c2.group_id = %s
-                        GROUP BY s.id
-                    ) sm ON s1.id = sm.id AND s1.date = sm.max_date
-                ) sale ON items.id = sale.id
+                LEFT JOIN item_latest_sale ls ON ls.item_id = items.id
                 LEFT JOIN categories ON items.category_id = categories.id
-                WHERE items.name LIKE %s AND collection.group_id = %s
-                GROUP BY items.id, items.name, items.sold, items.storage, items.ebay_item_id, 
-                         items.returned, items.list_date, items.category_id, collection.id, collection.name""", 
-                (search_pattern, get_current_group_id(), search_pattern, get_current_group_id()))
+                WHERE items.name LIKE %s AND collection.group_id = %s""", 
+                (search_pattern, get_current_group_id()))
     
     all_items = list(cur.fetchall())
     
@@ -385,41 +409,28 @@ def get_list_of_items_with_name(name, sold):
 def get_data_from_item_groups(group_id, limit=None, offset=None):
     """Items for a group detail table. Optional limit/offset for pagination."""
     cur = mysql.connection.cursor()
-    # Use subquery for most recent sale per item to avoid duplicates from multiple sale records
+    # item_latest_sale holds the most recent sale per item, so items never repeat
     sql = """ SELECT 
                     items.id,
                     items.name, 
                     items.sold, 
-                    COALESCE(MAX(categories.uuid_id), items.category_id) AS category_id,
+                    COALESCE(categories.uuid_id, items.category_id) AS category_id,
                     items.storage,
                     items.returned,
                     items.ebay_item_id,
-                    MAX(sale.price) AS gross,
-                    MAX(sale.shipping_fee) AS shipping_fee,
-                    MAX(sale.returned_fee) AS returned_fee,
-                    (MAX(sale.price) - MAX(sale.shipping_fee) - COALESCE(MAX(sale.returned_fee), 0)) AS net,
-                    MAX(sale.date) AS sale_date,
-                    DATEDIFF(MAX(sale.date), collection.date) AS days_to_sell 
+                    ls.price AS gross,
+                    ls.shipping_fee AS shipping_fee,
+                    ls.returned_fee AS returned_fee,
+                    (ls.price - ls.shipping_fee - COALESCE(ls.returned_fee, 0)) AS net,
+                    ls.sale_date AS sale_date,
+                    DATEDIFF(ls.sale_date, collection.date) AS days_to_sell 
                     FROM items items
                     INNER JOIN collection collection ON items.group_id = collection.id
-                    LEFT JOIN (
-                        SELECT s1.id, s1.price, s1.shipping_fee, s1.returned_fee, s1.date
-                        FROM sale s1
-                        INNER JOIN (
-                            SELECT s.id, MAX(s.date) AS max_date
-                            FROM sale s
-                            INNER JOIN items i2 ON s.id = i2.id
-                            WHERE i2.group_id = %s
-                            GROUP BY s.id
-                        ) sm ON s1.id = sm.id AND s1.date = sm.max_date
-                    ) sale ON items.id = sale.id
+                    LEFT JOIN item_latest_sale ls ON ls.item_id = items.id
                     LEFT JOIN categories ON items.category_id = categories.id
                     WHERE items.group_id = %s AND collection.group_id = %s
-                    GROUP BY items.id, items.name, items.sold, items.category_id, items.storage,
-                             items.returned, items.ebay_item_id, collection.date
                     ORDER BY sale_date"""
-    # Inner subquery must use same group_id — do not scan entire sale table for MAX(date).
-    params = [group_id, group_id, get_current_group_id()]
+    params = [group_id, get_current_group_id()]
     if limit is not None:
         sql += " LIMIT %s OFFSET %s"
         params.append(int(limit))
@@ -443,37 +454,25 @@ def search_items_in_group_by_name(group_id, q, limit=150):
                     items.id,
                     items.name, 
                     items.sold, 
-                    COALESCE(MAX(categories.uuid_id), items.category_id) AS category_id,
+                    COALESCE(categories.uuid_id, items.category_id) AS category_id,
                     items.storage,
                     items.returned,
                     items.ebay_item_id,
-                    MAX(sale.price) AS gross,
-                    MAX(sale.shipping_fee) AS shipping_fee,
-                    MAX(sale.returned_fee) AS returned_fee,
-                    (MAX(sale.price) - MAX(sale.shipping_fee) - COALESCE(MAX(sale.returned_fee), 0)) AS net,
-                    MAX(sale.date) AS sale_date,
-                    DATEDIFF(MAX(sale.date), collection.date) AS days_to_sell 
+                    ls.price AS gross,
+                    ls.shipping_fee AS shipping_fee,
+                    ls.returned_fee AS returned_fee,
+                    (ls.price - ls.shipping_fee - COALESCE(ls.returned_fee, 0)) AS net,
+                    ls.sale_date AS sale_date,
+                    DATEDIFF(ls.sale_date, collection.date) AS days_to_sell 
                     FROM items items
                     INNER JOIN collection collection ON items.group_id = collection.id
-                    LEFT JOIN (
-                        SELECT s1.id, s1.price, s1.shipping_fee, s1.returned_fee, s1.date
-                        FROM sale s1
-                        INNER JOIN (
-                            SELECT s.id, MAX(s.date) AS max_date
-                            FROM sale s
-                            INNER JOIN items i2 ON s.id = i2.id
-                            WHERE i2.group_id = %s
-                            GROUP BY s.id
-                        ) sm ON s1.id = sm.id AND s1.date = sm.max_date
-                    ) sale ON items.id = sale.id
+                    LEFT JOIN item_latest_sale ls ON ls.item_id = items.id
                     LEFT JOIN categories ON items.category_id = categories.id
                     WHERE items.group_id = %s AND collection.group_id = %s
                     AND LOCATE(%s, LOWER(items.name)) > 0
-                    GROUP BY items.id, items.name, items.sold, items.category_id, items.storage,
-                             items.returned, items.ebay_item_id, collection.date
                     ORDER BY items.name ASC
                     LIMIT %s"""
-    params = [group_id, group_id, get_current_group_id(), needle, limit]
+    params = [group_id, get_current_group_id(), needle, limit]
     cur.execute(sql, tuple(params))
     return list(cur.fetchall())
 
@@ -488,19 +487,9 @@ def get_group_detail_table_totals(group_id):
             COALESCE(SUM(CASE WHEN i.returned = 1 THEN COALESCE(latest.returned_fee, 0) ELSE 0 END), 0) AS sum_returned
         FROM items i
         INNER JOIN collection c ON i.group_id = c.id
-        LEFT JOIN (
-            SELECT s1.id, s1.price, s1.shipping_fee, s1.returned_fee
-            FROM sale s1
-            INNER JOIN (
-                SELECT s.id, MAX(s.date) AS max_date
-                FROM sale s
-                INNER JOIN items i2 ON s.id = i2.id
-                WHERE i2.group_id = %s
-                GROUP BY s.id
-            ) sm ON s1.id = sm.id AND s1.date = sm.max_date
-        ) latest ON i.id = latest.id
+        LEFT JOIN item_latest_sale latest ON latest.item_id = i.id
         WHERE i.group_id = %s AND c.group_id = %s
-    """, (group_id, group_id, get_current_group_id()))
+    """, (group_id, get_current_group_id()))
     row = cur.fetchone()
     cur.close()
     if not row:
@@ -520,38 +509,25 @@ def get_sold_items_by_group_date(group_date):
             items.id,
             items.name, 
             items.sold, 
-            COALESCE(MAX(categories.uuid_id), items.category_id) AS category_id,
+            COALESCE(categories.uuid_id, items.category_id) AS category_id,
             items.storage,
             items.returned,
             items.ebay_item_id,
-            MAX(sale.price) AS gross,
-            MAX(sale.shipping_fee) AS shipping_fee,
-            MAX(sale.returned_fee) AS returned_fee,
-            (MAX(sale.price) - MAX(sale.shipping_fee) - COALESCE(MAX(sale.returned_fee), 0)) AS net,
-            MAX(sale.date) AS sale_date,
-            DATEDIFF(MAX(sale.date), collection.date) AS days_to_sell,
+            ls.price AS gross,
+            ls.shipping_fee AS shipping_fee,
+            ls.returned_fee AS returned_fee,
+            (ls.price - ls.shipping_fee - COALESCE(ls.returned_fee, 0)) AS net,
+            ls.sale_date AS sale_date,
+            DATEDIFF(ls.sale_date, collection.date) AS days_to_sell,
             collection.id AS group_id,
             collection.name AS group_name
         FROM items items
         INNER JOIN collection collection ON items.group_id = collection.id
-        LEFT JOIN (
-            SELECT s1.id, s1.price, s1.shipping_fee, s1.returned_fee, s1.date
-            FROM sale s1
-            INNER JOIN (
-                SELECT s.id, MAX(s.date) AS max_date
-                FROM sale s
-                INNER JOIN items i2 ON s.id = i2.id
-                INNER JOIN collection c2 ON i2.group_id = c2.id
-                WHERE c2.date = %s AND c2.account = %s AND i2.sold = 1
-                GROUP BY s.id
-            ) sm ON s1.id = sm.id AND s1.date = sm.max_date
-        ) sale ON items.id = sale.id
+        LEFT JOIN item_latest_sale ls ON ls.item_id = items.id
         LEFT JOIN categories ON items.category_id = categories.id
         WHERE collection.date = %s AND collection.account = %s AND items.sold = 1
-        GROUP BY items.id, items.name, items.sold, items.category_id, items.storage,
-                 items.returned, items.ebay_item_id, collection.id, collection.name, collection.date
         ORDER BY sale_date, items.name
-    """, (group_date, session.get('id'), group_date, session.get('id')))
+    """, (group_date, session.get('id')))
     return list(cur.fetchall())
 
 def get_purchase_price_for_group_date(group_date):
@@ -589,23 +565,22 @@ def get_total_items_in_group_sold(group_id):
     return cur.fetchone()
 
 def get_sold_from_date(start_date, end_date):
-    """Optimized sales report query with better indexing"""
+    """Sales report by sale date, from the daily rollup"""
     cur = mysql.connection.cursor()
     cur.execute("""
         SELECT 
-            s.date,
-            SUM(s.price) as price,
-            SUM(s.shipping_fee) as shipping_fee,
-            SUM(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0)) AS net,
-            COUNT(i.id) AS total_items,
-            DAYNAME(s.date) AS day
-        FROM sale s
-        INNER JOIN items i ON s.id = i.id
-        INNER JOIN collection c ON i.group_id = c.id
-        WHERE s.date BETWEEN %s AND %s 
-        AND c.group_id = %s 
-        GROUP BY s.date 
-        ORDER BY s.date ASC
+            rollup_date AS date,
+            SUM(sale_price) as price,
+            SUM(shipping_fee) as shipping_fee,
+            SUM(sale_net) AS net,
+            SUM(sale_items) AS total_items,
+            DAYNAME(rollup_date) AS day
+        FROM report_daily_rollup
+        WHERE rollup_date BETWEEN %s AND %s 
+        AND group_id = %s 
+        AND sale_items > 0 
+        GROUP BY rollup_date 
+        ORDER BY rollup_date ASC
     """, (start_date, end_date, get_current_group_id()))
     return list(cur.fetchall())
 
@@ -647,6 +622,160 @@ def get_item_id_by_ebay_item_id(ebay_item_id):
     result = cur.fetchone()
     return result['id'] if result else None
 
+def get_ebay_order_cache(ebay_item_id):
+    """
+    Cached eBay order/fee breakdowns (one per order line) of a listing for the current group, newest
+    order first; expired rows are left out. Each row: order_line_item_id, order_id, order_created_at,
+    is_final, fetched_at and the decoded transaction_data.
+    """
+    group_id = get_current_group_id()
+    if not ebay_item_id or not group_id:
+        return []
+    try:
+        cur = mysql.connection.cursor()
+        cur.execute("""
+            SELECT order_line_item_id, order_id, order_created_at, is_final, fetched_at, transaction_data
+            FROM ebay_order_cache
+            WHERE group_id = %s AND ebay_item_id = %s
+              AND (expires_at IS NULL OR expires_at > %s)
+            ORDER BY order_created_at DESC, fetched_at DESC
+        """, (group_id, str(ebay_item_id), datetime.datetime.now()))
+        rows = list(cur.fetchall())
+        cur.close()
+        for row in rows:
+            row['transaction_data'] = json.loads(row['transaction_data'])
+        return rows
+    except Exception as e:
+        print("Error in get_ebay_order_cache: {}".format(e))
+        return []
+
+def get_ebay_token_accounts():
+    """Account ids with stored eBay tokens (accounts the background sold sync runs for)"""
+    try:
+        cur = mysql.connection.cursor()
+        cur.execute("SELECT user_id FROM ebay_tokens ORDER BY user_id")
+        rows = cur.fetchall() or []
+        cur.close()
+        return [r['user_id'] for r in rows]
+    except Exception as e:
+        print("Error in get_ebay_token_accounts: {}".format(e))
+        return []
+
+def get_ebay_tokens_for_refresh(expiring_before=None):
+    """Stored eBay tokens that have a refresh token, optionally only those expiring before a time (soonest first)"""
+    try:
+        cur = mysql.connection.cursor()
+        if expiring_before is None:
+            cur.execute("""
+                SELECT user_id, refresh_token, expires_at
+                FROM ebay_tokens
+                WHERE refresh_token IS NOT NULL
+                ORDER BY expires_at
+            """)
+        else:
+            cur.execute("""
+                SELECT user_id, refresh_token, expires_at
+                FROM ebay_tokens
+                WHERE refresh_token IS NOT NULL AND expires_at <= %s
+                ORDER BY expires_at
+            """, (expiring_before,))
+        rows = cur.fetchall() or []
+        cur.close()
+        return list(rows)
+    except Exception as e:
+        print("Error in get_ebay_tokens_for_refresh: {}".format(e))
+        return []
+
+def get_ebay_sync_state(account_id):
+    """Sold-order sync cursor for an account, or None if it has never been synced"""
+    if not account_id:
+        return None
+    try:
+        cur = mysql.connection.cursor()
+        cur.execute("""
+            SELECT last_mod_time, last_run_at, last_success_at, last_error
+            FROM ebay_sync_state
+            WHERE account = %s
+        """, (account_id,))
+        row = cur.fetchone()
+        cur.close()
+        return row
+    except Exception as e:
+        print("Error in get_ebay_sync_state: {}".format(e))
+        return None
+
+def get_ebay_sold_orders(limit=25):
+    """
+    Locally synced sold eBay orders for the current user, newest first, shaped like the
+    search_ebay_sold_items listings. Returns (listings, total).
+    """
+    try:
+        account_id = get_current_user_id()
+        cur = mysql.connection.cursor()
+        cur.execute("SELECT COUNT(*) AS total FROM ebay_sold_orders WHERE account = %s", (account_id,))
+        total = cur.fetchone()['total']
+        # Match GSale items at read time so items linked or unlinked after the sync show correctly
+        cur.execute("""
+            SELECT o.order_line_item_id, o.ebay_item_id, o.title, o.price, o.currency, o.sold_at,
+                   o.is_cancelled, i.id AS matching_item_id, i.sold AS db_sold
+            FROM (
+                SELECT account, order_line_item_id, ebay_item_id, title, price, currency, sold_at, is_cancelled
+                FROM ebay_sold_orders
+                WHERE account = %s
+                ORDER BY sold_at DESC
+                LIMIT %s
+            ) o
+            LEFT JOIN (items i INNER JOIN collection c ON c.id = i.group_id)
+                ON i.ebay_item_id = o.ebay_item_id AND c.account = o.account
+            ORDER BY o.sold_at DESC
+        """, (account_id, int(limit)))
+        rows = []
+        seen = set()
+        for r in cur.fetchall() or []:
+            # Several items can share one listing; keep one row per order line
+            if r['order_line_item_id'] not in seen:
+                seen.add(r['order_line_item_id'])
+                rows.append(r)
+        cur.close()
+        listings = [{
+            'itemId': r['ebay_item_id'],
+            'title': r['title'] or 'N/A',
+            'price': float(r['price'] or 0),
+            'currency': r['currency'] or 'USD',
+            'end_time': r['sold_at'].strftime('%Y-%m-%dT%H:%M:%S.000Z') if r['sold_at'] else 'N/A',
+            'ebay_url': 'https://www.ebay.com/itm/{}'.format(r['ebay_item_id']),
+            'status': 'Sold',
+            'is_cancelled': bool(r['is_cancelled']),
+            'matching_item_id': r['matching_item_id'],
+            'db_sold': r['db_sold'],
+        } for r in rows]
+        return listings, total
+    except Exception as e:
+        print("Error in get_ebay_sold_orders: {}".format(e))
+        return [], 0
+
+def get_ebay_item_ids_for_items(item_ids):
+    """Map GSale item id -> ebay_item_id for the current account. Omits unknown ids and items without one."""
+    unique = list({i for i in item_ids if i})
+    if not unique:
+        return {}
+    cur = mysql.connection.cursor()
+    placeholders = ','.join(['%s'] * len(unique))
+    cur.execute(
+        """
+        SELECT i.id, i.ebay_item_id
+        FROM items i
+        INNER JOIN collection c ON i.group_id = c.id
+        WHERE i.id IN ({})
+          AND c.account = %s
+          AND i.ebay_item_id IS NOT NULL AND i.ebay_item_id != ''
+        """.format(placeholders),
+        (*unique, get_current_user_id()),
+    )
+    rows = cur.fetchall() or []
+    cur.close()
+    return {r['id']: r['ebay_item_id'] for r in rows}
+
 def get_sold_status_for_item_ids(item_ids):
     """Map GSale item id -> items.sold (0 or 1) for the current account. Omits unknown ids."""
     if not item_ids:
@@ -738,6 +867,10 @@ def get_data_for_item_sold(item_id):
     return list(cur.fetchall())
 
 def get_list_of_items_purchased_by_date(sold_date, purchase_date, sold, list_date, storage):
+    filters, params = _item_list_filters(sold_date, purchase_date, list_date, storage)
+    if sold not in (None, '', '%'):
+        filters += " AND i.sold = %s"
+        params.append(int(sold))
     cur = mysql.connection.cursor()
     cur.execute("""
         SELECT 
@@ -755,13 +888,9 @@ def get_list_of_items_purchased_by_date(sold_date, purchase_date, sold, list_dat
         INNER JOIN collection c ON i.group_id = c.id
         INNER JOIN sale s ON i.id = s.id
         WHERE c.account = %s
-        AND s.date LIKE %s 
-        AND c.date LIKE %s
-        AND i.sold LIKE %s
-        AND i.list_date LIKE %s
-        AND i.storage LIKE %s
+        {}
         ORDER BY c.date ASC
-    """, (session.get('id'), sold_date, purchase_date, sold, list_date, storage))
+    """.format(filters), [session.get('id')] + params)
     return list(cur.fetchall())
 
 def get_list_of_items_with_categories(category_id):
@@ -860,82 +989,55 @@ def get_list_of_items_by_category(category_id, sold_status="all"):
     
     return list(cur.fetchall())
 
+def _item_list_filters(sold_date="%", purchase_date="%", list_date="%", storage="%"):
+    """Shared WHERE fragment for item lists: date ranges on the DATE columns, storage match; wildcards add nothing"""
+    clauses = []
+    params = []
+    for column, selection in (('s.date', sold_date), ('c.date', purchase_date), ('i.list_date', list_date)):
+        date_sql, date_params = date_filter_sql(column, selection)
+        if date_sql:
+            clauses.append(date_sql)
+            params.extend(date_params)
+    if storage not in (None, '', '%'):
+        clauses.append("AND i.storage LIKE %s")
+        params.append(storage)
+    return " ".join(clauses), params
+
 def get_list_of_items_by_sold_status(sold_status, sold_date="%", purchase_date="%", list_date="%", storage="%"):
     """Get items filtered by sold status (all, sold, not_sold) with the same structure as get_list_of_items_purchased_by_date"""
-    cur = mysql.connection.cursor()
-    
     if sold_status == "sold":
         # Only sold items - filter by items.sold = 1
-        cur.execute("""
-            SELECT 
-                i.id, 
-                i.name, 
-                i.sold,
-                i.group_id,
-                i.storage,
-                i.list_date,
-                s.date as sale_date,
-                (s.price - s.shipping_fee) AS net,
-                c.date as purchase_date,
-                c.name as group_name
-            FROM items i
-            INNER JOIN collection c ON i.group_id = c.id
-            LEFT JOIN sale s ON i.id = s.id
-            WHERE c.account = %s
-            AND i.sold = 1
-            AND s.date LIKE %s 
-            AND c.date LIKE %s
-            AND i.list_date LIKE %s
-            AND i.storage LIKE %s
-            ORDER BY c.date ASC
-        """, (session.get('id'), sold_date, purchase_date, list_date, storage))
+        status_sql = "AND i.sold = 1"
     elif sold_status == "not_sold":
-        # Only not sold items - filter by items.sold = 0
-        cur.execute("""
-            SELECT 
-                i.id, 
-                i.name, 
-                i.sold,
-                i.group_id,
-                i.storage,
-                i.list_date,
-                s.date as sale_date,
-                (s.price - s.shipping_fee) AS net,
-                c.date as purchase_date,
-                c.name as group_name
-            FROM items i
-            INNER JOIN collection c ON i.group_id = c.id
-            LEFT JOIN sale s ON i.id = s.id
-            WHERE c.account = %s
-            AND i.sold = 0
-            AND c.date LIKE %s
-            AND i.list_date LIKE %s
-            AND i.storage LIKE %s
-            ORDER BY c.date ASC
-        """, (session.get('id'), purchase_date, list_date, storage))
+        # Only not sold items - sale date filter does not apply
+        status_sql = "AND i.sold = 0"
+        sold_date = "%"
     else:
-        # All items - no sold status filter
-        cur.execute("""
-            SELECT 
-                i.id, 
-                i.name, 
-                i.sold,
-                i.group_id,
-                i.storage,
-                i.list_date,
-                s.date as sale_date,
-                (s.price - s.shipping_fee) AS net,
-                c.date as purchase_date,
-                c.name as group_name
-            FROM items i
-            INNER JOIN collection c ON i.group_id = c.id
-            LEFT JOIN sale s ON i.id = s.id
-            WHERE c.account = %s
-            AND c.date LIKE %s
-            AND i.list_date LIKE %s
-            AND i.storage LIKE %s
-            ORDER BY c.date ASC
-        """, (session.get('id'), purchase_date, list_date, storage))
+        # All items - no sold status filter (sale date filter does not apply)
+        status_sql = ""
+        sold_date = "%"
+    filters, params = _item_list_filters(sold_date, purchase_date, list_date, storage)
+    
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT 
+            i.id, 
+            i.name, 
+            i.sold,
+            i.group_id,
+            i.storage,
+            i.list_date,
+            s.date as sale_date,
+            (s.price - s.shipping_fee) AS net,
+            c.date as purchase_date,
+            c.name as group_name
+        FROM items i
+        INNER JOIN collection c ON i.group_id = c.id
+        LEFT JOIN sale s ON i.id = s.id
+        WHERE c.account = %s
+        {} {}
+        ORDER BY c.date ASC
+    """.format(status_sql, filters), [session.get('id')] + params)
     
     return list(cur.fetchall())
 
@@ -987,7 +1089,7 @@ def get_category_item_counts():
 
 #Profit Data
 def get_profit(year):
-    year_value = str(year) + '-%-%'
+    start_date, end_date = date_range(year)
     cur = mysql.connection.cursor()
     
     # Get sales (only for sold items, including returned fees)
@@ -996,8 +1098,8 @@ def get_profit(year):
         FROM sale s
         INNER JOIN items i ON s.id = i.id
         INNER JOIN collection c ON i.group_id = c.id
-        WHERE c.group_id = %s AND c.date LIKE %s AND i.sold = 1
-    """, (get_current_group_id(), year_value))
+        WHERE c.group_id = %s AND c.date BETWEEN %s AND %s AND i.sold = 1
+    """, (get_current_group_id(), start_date, end_date))
     sales_result = cur.fetchone()
     sale_price = sales_result['sale_price'] if sales_result else 0
     
@@ -1005,13 +1107,42 @@ def get_profit(year):
     cur.execute("""
         SELECT COALESCE(SUM(price), 0) AS purchase_price
         FROM collection
-        WHERE group_id = %s AND date LIKE %s
-    """, (get_current_group_id(), year_value))
+        WHERE group_id = %s AND date BETWEEN %s AND %s
+    """, (get_current_group_id(), start_date, end_date))
     purchase_result = cur.fetchone()
     purchase_price = purchase_result['purchase_price'] if purchase_result else 0
     
     return [sale_price, purchase_price, year]
 
+def get_yearly_profit():
+    """Sales and purchase totals for every year in one grouped query; rows are [sale_price, purchase_price, year], newest first"""
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT
+            p.year,
+            COALESCE(sales.sale_price, 0) AS sale_price,
+            p.purchase_price
+        FROM (
+            SELECT YEAR(date) AS year, COALESCE(SUM(price), 0) AS purchase_price
+            FROM collection
+            WHERE group_id = %s AND date IS NOT NULL
+            GROUP BY YEAR(date)
+        ) p
+        LEFT JOIN (
+            SELECT YEAR(c.date) AS year,
+                COALESCE(SUM(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0)), 0) AS sale_price
+            FROM sale s
+            INNER JOIN items i ON s.id = i.id
+            INNER JOIN collection c ON i.group_id = c.id
+            WHERE c.group_id = %s AND i.sold = 1
+            GROUP BY YEAR(c.date)
+        ) sales ON sales.year = p.year
+        ORDER BY p.year DESC
+    """, (get_current_group_id(), get_current_group_id()))
+    rows = cur.fetchall()
+    cur.close()
+    return [[row['sale_price'], row['purchase_price'], row['year']] for row in rows]
+
 def get_group_profit(group_id):
     cur = mysql.connection.cursor()
     cur.execute("""
@@ -1055,32 +1186,22 @@ def get_location_from_date(start_date, end_date):
 
 # Optimized Report Functions
 def get_combined_profit_report(start_date, end_date):
-    """Single query for profit report combining sales and purchases"""
+    """Sales net (by sale date) against purchase spend per day, from the daily rollup"""
     cur = mysql.connection.cursor()
     cur.execute("""
         SELECT 
-            COALESCE(s.date, c.date) as date,
-            COALESCE(SUM(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0)), 0) as sales_net,
-            COALESCE(SUM(c.price), 0) as purchase_price,
-            COALESCE(SUM(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0)), 0) - COALESCE(SUM(c.price), 0) as profit,
-            DAYNAME(COALESCE(s.date, c.date)) as day
-        FROM (
-            SELECT date, SUM(price - shipping_fee - COALESCE(returned_fee, 0)) as price, SUM(shipping_fee) as shipping_fee
-            FROM sale s
-            INNER JOIN items i ON s.id = i.id
-            INNER JOIN collection c ON i.group_id = c.id
-            WHERE s.date BETWEEN %s AND %s AND c.account = %s
-            GROUP BY s.date
-        ) s
-        FULL OUTER JOIN (
-            SELECT date, SUM(price) as price
-            FROM collection
-            WHERE date BETWEEN %s AND %s AND account = %s
-            GROUP BY date
-        ) c ON s.date = c.date
-        GROUP BY COALESCE(s.date, c.date)
-        ORDER BY COALESCE(s.date, c.date)
-    """, (start_date, end_date, session.get('id'), start_date, end_date, session.get('id')))
+            rollup_date as date,
+            COALESCE(SUM(sale_net), 0) as sales_net,
+            COALESCE(SUM(purchase_spend), 0) as purchase_price,
+            COALESCE(SUM(sale_net), 0) - COALESCE(SUM(purchase_spend), 0) as profit,
+            DAYNAME(rollup_date) as day
+        FROM report_daily_rollup
+        WHERE rollup_date BETWEEN %s AND %s 
+        AND account = %s 
+        AND (sale_items > 0 OR purchase_count > 0)
+        GROUP BY rollup_date
+        ORDER BY rollup_date
+    """, (start_date, end_date, session.get('id')))
     return list(cur.fetchall())
 
 def get_combined_sales_summary(start_date, end_date):
@@ -1108,12 +1229,8 @@ def get_purchases_by_city(city, year='all'):
     cur = mysql.connection.cursor()
     
     # Build the year filter
-    year_filter = ""
-    params = [get_current_group_id(), city, f'%, {city},%', f'%, {city} %', f'%, {city}, %']
-    
-    if year != 'all':
-        year_filter = "AND c.date LIKE %s"
-        params.append(f'{year}-%-%')
+    year_filter, year_params = date_filter_sql('c.date', year)
+    params = [get_current_group_id(), city, f'%, {city},%', f'%, {city} %', f'%, {city}, %'] + year_params
     
     cur.execute(f"""
         SELECT 
@@ -1151,12 +1268,8 @@ def get_city_summary(city, year='all'):
     cur = mysql.connection.cursor()
     
     # Build the year filter
-    year_filter = ""
-    params = [get_current_group_id(), city, f'%, {city},%', f'%, {city} %', f'%, {city}, %']
-    
-    if year != 'all':
-        year_filter = "AND c.date LIKE %s"
-        params.append(f'{year}-%-%')
+    year_filter, year_params = date_filter_sql('c.date', year)
+    params = [get_current_group_id(), city, f'%, {city},%', f'%, {city} %', f'%, {city}, %'] + year_params
     
     # First get the total spent from collection table only (no joins)
     cur.execute(f"""
@@ -1,32 +1,468 @@
-"""In-memory cache for report POST results (e.g. profit). Must be cleared when underlying data changes."""
+"""
+Cache for report POST results (e.g. profit). Must be cleared when underlying data changes.
+
+Entries live in a pluggable backend so every gunicorn/uwsgi worker can share them:
+  memory — in-process LRU (per worker); clears still reach every worker through a
+           generation stamp file in the cache directory
+  file   — shared on-disk store in the cache directory (default; works across workers)
+  redis  — local Redis-compatible server at REPORT_CACHE_URL (needs the redis package)
+
+Configure via Flask config or environment variables:
+  REPORT_CACHE_BACKEND          — memory | file | redis (default file)
+  REPORT_CACHE_DIR              — directory for the file backend / generation stamp
+                                  (default <instance path>/report_cache)
+  REPORT_CACHE_URL              — e.g. redis://localhost:6379/2
+  REPORT_CACHE_MAX_BYTES        — total size bound (default 64 MB)
+  REPORT_CACHE_MAX_ENTRY_BYTES  — single entry bound; larger reports are not cached (default 4 MB)
+
+Keys are namespaced by tenant (session group_id) and tagged with the date range the report
+covers: report:<tenant>:<start>:<end>:<type>_<hash>. Writes call invalidate_reports() with the
+dates they touched so only that tenant's overlapping entries are evicted.
+
+Reports are stored as JSON (dates and Decimals tagged so they round-trip), never pickle, and the
+cache directory must be a private (0700) directory owned by the app user; anything else is refused
+and the memory backend is used instead.
+"""
+import datetime
+import decimal
 import hashlib
 import json
-from datetime import datetime
+import os
+import stat
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import quote, unquote
+
+import settings
+
+try:
+    import redis
+except ImportError:
+    # Redis client not available; the redis backend falls back to file
+    redis = None
 
-report_cache = {}
 CACHE_DURATION = 300  # 5 minutes
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRY_BYTES = 4 * 1024 * 1024
+CACHE_DIR_NAME = 'report_cache'
+KEY_PREFIX = 'report:'
+ALL_DATES = '*'
+
+
+def ensure_private_dir(path):
+    """Create path as a 0700 directory, or check an existing one is a real directory owned by us
+    and not open to other users. Raises OSError when it cannot be trusted."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise OSError("{} is not a directory".format(path))
+    if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+        raise OSError("{} is not owned by the app user".format(path))
+    if stat.S_IMODE(st.st_mode) & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+def _encode_value(value):
+    if isinstance(value, decimal.Decimal):
+        return {'__decimal__': str(value)}
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {'__timedelta__': value.total_seconds()}
+    raise TypeError("{} is not JSON serializable".format(type(value).__name__))
+
+
+def _decode_value(obj):
+    if len(obj) == 1:
+        if '__decimal__' in obj:
+            return decimal.Decimal(obj['__decimal__'])
+        if '__datetime__' in obj:
+            return datetime.datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return datetime.date.fromisoformat(obj['__date__'])
+        if '__timedelta__' in obj:
+            return datetime.timedelta(seconds=obj['__timedelta__'])
+    return obj
+
+
+def dumps(data):
+    """Report data (DB rows with Decimal/date values) -> JSON bytes"""
+    return json.dumps(data, default=_encode_value, separators=(',', ':')).encode('utf-8')
+
+
+def loads(payload):
+    if isinstance(payload, bytes):
+        payload = payload.decode('utf-8')
+    return json.loads(payload, object_hook=_decode_value)
+
+
+class CacheBackend:
+    """Backends implement get/set/delete/keys/clear; scoped invalidation scans the tenant's keys."""
+
+    def invalidate(self, scope, predicate):
+        for key in self.keys(scope):
+            if predicate(key):
+                self.delete(key)
+
+
+class MemoryLRUBackend(CacheBackend):
+    """Per-process LRU bounded by total serialized size. Clears propagate via shared generation stamps.
+
+    Scoped invalidations are exact in the writing worker; other workers drop that tenant's
+    entries when they see its stamp change.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, generation_path=None):
+        self.max_bytes = max_bytes
+        self.generation_path = generation_path
+        self._entries = OrderedDict()  # key -> (expires_at, payload, scope_stamp)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._generation = self._read_stamp(generation_path)
+
+    @staticmethod
+    def _read_stamp(path):
+        if not path:
+            return None
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write_stamp(path):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(uuid.uuid4().hex)
+        except OSError as e:
+            print("Warning: could not write report cache generation stamp: {}".format(e))
+
+    def _scope_stamp_path(self, key):
+        if not self.generation_path:
+            return None
+        scope = _scope_of(key)
+        return '{}-{}'.format(self.generation_path, hashlib.md5(scope.encode()).hexdigest())
+
+    def _sync_generation(self):
+        """Drop local entries when another worker has cleared the cache."""
+        current = self._read_stamp(self.generation_path)
+        if current != self._generation:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation = current
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def get(self, key):
+        with self._lock:
+            self._sync_generation()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time() or entry[2] != self._read_stamp(self._scope_stamp_path(key)):
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, payload, ttl):
+        with self._lock:
+            self._sync_generation()
+            self._drop(key)
+            stamp = self._read_stamp(self._scope_stamp_path(key))
+            self._entries[key] = (time.time() + ttl, payload, stamp)
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def delete(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def keys(self, prefix=''):
+        with self._lock:
+            self._sync_generation()
+            return [k for k in self._entries if k.startswith(prefix)]
+
+    def invalidate(self, scope, predicate):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(scope)]:
+                if predicate(key):
+                    self._drop(key)
+            stamp_path = self._scope_stamp_path(scope)
+            if not stamp_path:
+                return
+            self._write_stamp(stamp_path)
+            # Entries that survived here are still valid; only other workers fall back to a tenant flush
+            stamp = self._read_stamp(stamp_path)
+            for key in [k for k in self._entries if k.startswith(scope)]:
+                expires_at, payload, _ = self._entries[key]
+                self._entries[key] = (expires_at, payload, stamp)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self.generation_path:
+                self._write_stamp(self.generation_path)
+            self._generation = self._read_stamp(self.generation_path)
+
+
+class FileBackend(CacheBackend):
+    """Shared on-disk store. One file per key; mtime is bumped on hit so eviction is LRU."""
 
+    SUFFIX = '.cache'
 
-def get_cache_key(report_type, params):
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        ensure_private_dir(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, quote(key, safe='') + self.SUFFIX)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires_at, payload = json.loads(f.read().decode('utf-8'))
+            expires_at = float(expires_at)
+            payload = payload.encode('utf-8')
+        except (OSError, ValueError, TypeError, AttributeError):
+            return None
+        if expires_at <= time.time():
+            self.delete(key)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return payload
+
+    def set(self, key, payload, ttl):
+        path = self._path(key)
+        tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps([time.time() + ttl, payload.decode('utf-8')]).encode('utf-8'))
+            os.replace(tmp_path, path)  # atomic: readers never see a partial entry
+        except OSError as e:
+            print("Warning: could not write report cache entry: {}".format(e))
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._enforce_size()
+
+    def _enforce_size(self):
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.SUFFIX):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                    total += st.st_size
+        except OSError:
+            return
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def keys(self, prefix=''):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        keys = []
+        for name in names:
+            if not name.endswith(self.SUFFIX):
+                continue
+            key = unquote(name[:-len(self.SUFFIX)])
+            if key.startswith(prefix):
+                keys.append(key)
+        return keys
+
+    def clear(self):
+        for key in self.keys(KEY_PREFIX):
+            self.delete(key)
+
+
+class RedisBackend(CacheBackend):
+    """Local Redis-compatible server. Size bound is enforced by the server (maxmemory + allkeys-lru)."""
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, payload, ttl):
+        self.client.setex(key, int(ttl), payload)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def keys(self, prefix=''):
+        return [k.decode('utf-8') if isinstance(k, bytes) else k
+                for k in self.client.scan_iter(match=prefix + '*', count=500)]
+
+    def clear(self):
+        keys = self.keys(KEY_PREFIX)
+        if keys:
+            self.client.delete(*keys)
+
+
+_backend = None
+_max_entry_bytes = DEFAULT_MAX_ENTRY_BYTES
+
+
+def configure_report_cache(app=None):
+    """Select the cache backend from config/env. Called once at app start-up; safe to call again."""
+    global _backend, _max_entry_bytes
+    name = (settings.get(app, 'REPORT_CACHE_BACKEND', 'file') or 'file').strip().lower()
+    directory = settings.get(app, 'REPORT_CACHE_DIR') or (os.path.join(app.instance_path, CACHE_DIR_NAME) if app else None)
+    max_bytes = settings.get(app, 'REPORT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES, int)
+    _max_entry_bytes = settings.get(app, 'REPORT_CACHE_MAX_ENTRY_BYTES', DEFAULT_MAX_ENTRY_BYTES, int)
+
+    if name == 'redis':
+        url = settings.get(app, 'REPORT_CACHE_URL', 'redis://localhost:6379/0')
+        if redis is None:
+            print("Warning: redis package not installed; report cache using file backend")
+            name = 'file'
+        else:
+            try:
+                _backend = RedisBackend(url)
+                return _backend
+            except Exception as e:
+                print("Warning: could not connect report cache to {}: {}".format(url, e))
+                name = 'file'
+
+    if name == 'file' and directory:
+        try:
+            _backend = FileBackend(directory, max_bytes)
+            return _backend
+        except OSError as e:
+            print("Warning: report cache directory {} unavailable ({}); using memory backend".format(directory, e))
+
+    generation_path = None
+    if directory:
+        try:
+            ensure_private_dir(directory)
+            generation_path = os.path.join(directory, 'generation')
+        except OSError as e:
+            print("Warning: report cache clears will not reach other workers ({})".format(e))
+    _backend = MemoryLRUBackend(max_bytes, generation_path=generation_path)
+    return _backend
+
+
+def get_backend():
+    if _backend is None:
+        configure_report_cache()
+    return _backend
+
+
+def _tenant_token(tenant):
+    return str(tenant).replace(':', '_') if tenant else '_'
+
+
+def _scope_of(key):
+    """report:<tenant>: — the namespace a key belongs to."""
+    return ':'.join(key.split(':', 2)[:2]) + ':'
+
+
+def tenant_scope(tenant):
+    return '{}{}:'.format(KEY_PREFIX, _tenant_token(tenant))
+
+
+def get_cache_key(report_type, params, tenant=None, date_range=None):
+    """date_range is the (start, end) the report covers as YYYY-MM-DD; None means all dates."""
+    start, end = (str(date_range[0]), str(date_range[1])) if date_range else (ALL_DATES, ALL_DATES)
     param_str = json.dumps(params, sort_keys=True)
-    return "{}_{}".format(report_type, hashlib.md5(param_str.encode()).hexdigest())
+    return "{}{}:{}:{}_{}".format(tenant_scope(tenant), start, end, report_type,
+                                  hashlib.md5(param_str.encode()).hexdigest())
+
+
+def _key_covers_dates(key, dates):
+    try:
+        _, _, start, end, _ = key.split(':', 4)
+    except ValueError:
+        return True
+    if start == ALL_DATES:
+        return True
+    return any(start <= d <= end for d in dates)
+
+
+def get_cached_report(report_type, params, tenant=None, date_range=None):
+    try:
+        payload = get_backend().get(get_cache_key(report_type, params, tenant, date_range))
+        if payload is None:
+            return None
+        return loads(payload)
+    except Exception as e:
+        print("Report cache read failed: {}".format(e))
+        return None
 
 
-def get_cached_report(report_type, params):
-    cache_key = get_cache_key(report_type, params)
-    if cache_key in report_cache:
-        timestamp, data = report_cache[cache_key]
-        if datetime.now().timestamp() - timestamp < CACHE_DURATION:
-            return data
-        del report_cache[cache_key]
-    return None
+def cache_report(report_type, params, data, tenant=None, date_range=None):
+    try:
+        payload = dumps(data)
+        if len(payload) > _max_entry_bytes:
+            return
+        get_backend().set(get_cache_key(report_type, params, tenant, date_range), payload, CACHE_DURATION)
+    except Exception as e:
+        print("Report cache write failed: {}".format(e))
 
 
-def cache_report(report_type, params, data):
-    cache_key = get_cache_key(report_type, params)
-    report_cache[cache_key] = (datetime.now().timestamp(), data)
+def invalidate_reports(tenant, dates=None):
+    """Evict one tenant's cached reports. With dates, only entries whose range covers one of them."""
+    if dates is not None:
+        dates = sorted({str(d)[:10] for d in dates if d})
+        if not dates:
+            return
+    try:
+        if dates is None:
+            get_backend().invalidate(tenant_scope(tenant), lambda key: True)
+        else:
+            get_backend().invalidate(tenant_scope(tenant), lambda key: _key_covers_dates(key, dates))
+    except Exception as e:
+        print("Report cache invalidation failed: {}".format(e))
 
 
 def clear_report_cache():
-    """Call after item/group/sale changes so profit and other cached reports stay accurate."""
-    report_cache.clear()
+    """Flush every tenant's cached reports in every worker (e.g. after a schema change)."""
+    try:
+        get_backend().clear()
+    except Exception as e:
+        print("Report cache clear failed: {}".format(e))
@@ -0,0 +1,89 @@
+"""
+Response header normalization, done once per response at the WSGI layer.
+
+nginx rejects upstream responses with a repeated header line ("upstream sent duplicate header
+line"), so every response passes through HeaderNormalizationMiddleware: the first occurrence of
+each header name wins (case-insensitive), repeated identical values of multi-valued headers
+(Set-Cookie by default) are dropped, and a single Date header is moved to the end. This runs at
+start_response rather than in an after_request hook because Flask writes the session cookie after
+the hooks have run.
+
+Responses without duplicates (almost all of them) cost one set-based scan and are passed on as
+the original list; only a response with a repeated line is rebuilt.
+
+Configure via Flask config or environment variables:
+  RESPONSE_HEADER_DEDUP   — 0/false to disable normalization (default on)
+  RESPONSE_HEADERS_MULTI  — comma-separated headers allowed to repeat with distinct values
+                            (default Set-Cookie)
+
+Benchmark: python scripts/benchmark_header_dedup.py
+"""
+import os
+
+DEFAULT_MULTI_HEADERS = ('set-cookie',)
+
+
+def normalize_headers(headers, multi=DEFAULT_MULTI_HEADERS):
+    """Deduplicated copy of a [(name, value)] list, or the list itself when nothing repeats."""
+    names = set()
+    multi_values = set()
+    for key, value in headers:
+        key_lower = key.lower()
+        if key_lower in multi:
+            # Multi-valued headers may repeat; only an identical line is a duplicate. A value shared by
+            # two different multi-valued headers only sends us down the exact path below.
+            if value in multi_values:
+                return _dedupe(headers, multi)
+            multi_values.add(value)
+        elif key_lower in names:
+            return _dedupe(headers, multi)
+        else:
+            names.add(key_lower)
+    return headers
+
+
+def _dedupe(headers, multi):
+    seen = set()
+    normalized = []
+    date = None
+    for key, value in headers:
+        key_lower = key.lower()
+        marker = (key_lower, value) if key_lower in multi else key_lower
+        if marker in seen:
+            continue
+        seen.add(marker)
+        if key_lower == 'date':
+            date = (key, value)
+        else:
+            normalized.append((key, value))
+    if date is not None:
+        normalized.append(date)
+    return normalized
+
+
+class HeaderNormalizationMiddleware:
+    """WSGI middleware applying normalize_headers to every response before it reaches nginx"""
+
+    def __init__(self, app, multi=DEFAULT_MULTI_HEADERS):
+        self.app = app
+        self.multi = frozenset(h.lower() for h in multi)
+
+    def __call__(self, environ, start_response):
+        multi = self.multi
+
+        def normalized_start_response(status, response_headers, exc_info=None):
+            return start_response(status, normalize_headers(list(response_headers), multi), exc_info)
+
+        return self.app(environ, normalized_start_response)
+
+
+def configure_header_normalization(app):
+    """Wrap app.wsgi_app unless RESPONSE_HEADER_DEDUP is off. Call once, after config is loaded."""
+    enabled = app.config.get('RESPONSE_HEADER_DEDUP', os.environ.get('RESPONSE_HEADER_DEDUP', '1'))
+    if str(enabled).strip().lower() in ('0', 'false', 'no', 'off', 'none', ''):
+        return app.wsgi_app
+    multi = app.config.get('RESPONSE_HEADERS_MULTI') or os.environ.get('RESPONSE_HEADERS_MULTI')
+    if isinstance(multi, str):
+        multi = [h.strip() for h in multi.split(',') if h.strip()]
+    app.wsgi_app = HeaderNormalizationMiddleware(app.wsgi_app, multi or DEFAULT_MULTI_HEADERS)
+    return app.wsgi_app
@@ -0,0 +1,40 @@
+"""Shared MySQL connection helper for the maintenance and benchmark scripts in this directory.
+
+Settings come from config.ProductionConfig (MYSQL_HOST, MYSQL_USER, MYSQL_PASSWORD, MYSQL_DB,
+MYSQL_PORT) or the same names as environment variables; the environment wins when both are set.
+"""
+import os
+import sys
+
+import MySQLdb
+import MySQLdb.cursors
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setting(name, default=None):
+    if os.environ.get(name):
+        return os.environ[name]
+    try:
+        sys.path.insert(0, REPO_ROOT)
+        import config
+        value = getattr(config.ProductionConfig, name, None)
+        if value:
+            return value
+    except Exception:
+        pass
+    return default
+
+
+def connect(**overrides):
+    params = dict(
+        host=setting('MYSQL_HOST', 'localhost'),
+        user=setting('MYSQL_USER', 'root'),
+        passwd=setting('MYSQL_PASSWORD', ''),
+        db=setting('MYSQL_DB', 'gsale_bench'),
+        port=int(setting('MYSQL_PORT', 3306)),
+        charset='utf8mb4',
+        cursorclass=MySQLdb.cursors.DictCursor,
+    )
+    params.update(overrides)
+    return MySQLdb.connect(**params)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Apply the versioned migrations in sql/migrations/ in order, once each.
+
+  python scripts/apply_migrations.py            # apply everything pending
+  python scripts/apply_migrations.py --list     # show applied / pending versions
+  python scripts/apply_migrations.py --to 0003  # stop after version 0003
+
+Files are named NNNN_description.sql; NNNN_description.down.sql is the manual rollback.
+Applied versions are recorded in the schema_migrations table. Connection settings: scripts/_db.py.
+"""
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _db import REPO_ROOT, connect  # noqa: E402
+
+MIGRATIONS_DIR = os.path.join(REPO_ROOT, 'sql', 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_[\w-]+\.sql$')
+BACKFILL_MARKER = '-- Backfill'
+
+
+def migration_files():
+    """[(version, path)] sorted by version, rollback (.down.sql) files excluded."""
+    found = []
+    for name in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(name)
+        if match and not name.endswith('.down.sql'):
+            found.append((match.group(1), os.path.join(MIGRATIONS_DIR, name)))
+    return sorted(found)
+
+
+def split_statements(sql_text):
+    """Split a migration file on ';' after dropping '--' comment lines (files hold no procedures)."""
+    lines = [line for line in sql_text.splitlines() if not line.strip().startswith('--')]
+    return [stmt.strip() for stmt in '\n'.join(lines).split(';') if stmt.strip()]
+
+
+def ensure_migrations_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS `schema_migrations` (
+          `version` varchar(4) NOT NULL,
+          `name` varchar(200) NOT NULL,
+          `applied_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          PRIMARY KEY (`version`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+    """)
+
+
+def applied_versions(cur):
+    ensure_migrations_table(cur)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row['version'] for row in cur.fetchall()}
+
+
+def apply_pending(conn, up_to=None):
+    """Apply pending migrations (DDL auto-commits in MySQL, so each file is recorded once it completes)."""
+    cur = conn.cursor()
+    done = applied_versions(cur)
+    applied = []
+    for version, path in migration_files():
+        if up_to and version > up_to:
+            break
+        if version in done:
+            continue
+        with open(path) as f:
+            for statement in split_statements(f.read()):
+                cur.execute(statement)
+        cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, os.path.basename(path)))
+        conn.commit()
+        applied.append(version)
+    cur.close()
+    return applied
+
+
+def run_backfill(conn):
+    """Re-run the backfill section of applied migrations that rebuild derived tables. Returns their versions."""
+    cur = conn.cursor()
+    done = applied_versions(cur)
+    rebuilt = []
+    for version, path in migration_files():
+        if version not in done:
+            continue
+        with open(path) as f:
+            text = f.read()
+        if BACKFILL_MARKER not in text:
+            continue
+        for statement in split_statements(text[text.index(BACKFILL_MARKER):]):
+            cur.execute(statement)
+        conn.commit()
+        rebuilt.append(version)
+    cur.close()
+    return rebuilt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--list', action='store_true', help='show migration status and exit')
+    parser.add_argument('--to', help='apply up to and including this version')
+    args = parser.parse_args()
+
+    conn = connect()
+    if args.list:
+        cur = conn.cursor()
+        done = applied_versions(cur)
+        cur.close()
+        for version, path in migration_files():
+            print("{} {:<8} {}".format(version, 'applied' if version in done else 'pending', os.path.basename(path)))
+    else:
+        applied = apply_pending(conn, args.to)
+        print("Applied: {}".format(', '.join(applied) if applied else 'nothing pending'))
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: per-response header deduplication cost, before and after response_headers.
+
+Before, every response went through two full rebuilds: the remove_duplicate_headers after_request
+hook (cleared and refilled werkzeug Headers, list membership checks for Set-Cookie) and then
+RemoveDuplicateHeadersMiddleware at start_response. Now one HeaderNormalizationMiddleware pass
+returns the original list unless something repeats.
+
+  python scripts/benchmark_header_dedup.py
+  python scripts/benchmark_header_dedup.py --rounds 50000
+
+The after_request half needs werkzeug (installed with Flask); without it only the WSGI passes
+are compared.
+"""
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+import response_headers  # noqa: E402
+
+try:
+    from werkzeug.datastructures import Headers
+except ImportError:
+    Headers = None
+
+DATE = ('Date', 'Sat, 18 Oct 2026 12:00:00 GMT')
+
+SCENARIOS = {
+    'JSON API response': [
+        ('Content-Type', 'application/json'), ('Content-Length', '5120'),
+        ('Vary', 'Cookie'), ('Set-Cookie', 'session=abc123; HttpOnly; Path=/'),
+    ],
+    'static redirect': [
+        ('Content-Type', 'text/html; charset=utf-8'), ('Content-Length', '229'),
+        ('Location', '/static/css/site.css'),
+    ],
+    'HTML page, 3 cookies': [
+        ('Content-Type', 'text/html; charset=utf-8'), ('Content-Length', '48213'), ('Vary', 'Cookie'),
+        ('Set-Cookie', 'session=abc123; HttpOnly; Path=/'), ('Set-Cookie', 'theme=dark; Path=/'),
+        ('Set-Cookie', 'tz=America/Chicago; Path=/'), ('Cache-Control', 'no-cache'),
+    ],
+    'duplicates (Date x2, cookie x2)': [
+        ('Content-Type', 'text/html; charset=utf-8'), DATE, ('Content-Length', '1200'),
+        ('Set-Cookie', 'session=abc123; HttpOnly; Path=/'), ('Set-Cookie', 'session=abc123; HttpOnly; Path=/'),
+        ('content-type', 'text/html'), DATE,
+    ],
+}
+
+
+# Legacy implementations, as they were in app.py
+
+def legacy_after_request(headers):
+    original_headers = list(headers)
+    headers_dict = {}
+    cookie_values = []
+    date_header = None
+    date_key = None
+    for key, value in original_headers:
+        key_lower = key.lower()
+        if key_lower == 'set-cookie':
+            if value not in cookie_values:
+                cookie_values.append(value)
+        elif key_lower == 'date':
+            if date_header is None:
+                date_header = value
+                date_key = key
+        else:
+            if key_lower not in headers_dict:
+                headers_dict[key_lower] = (key, value)
+    headers.clear()
+    for original_key, value in headers_dict.values():
+        headers[original_key] = value
+    if date_header is not None:
+        headers[date_key or 'Date'] = date_header
+    for cookie_value in cookie_values:
+        headers.add('Set-Cookie', cookie_value)
+    return headers
+
+
+def legacy_middleware(response_headers):
+    headers_list = list(response_headers)
+    seen_headers = {}
+    deduplicated_headers = []
+    cookie_values = []
+    date_header = None
+    date_key = None
+    for key, value in headers_list:
+        key_lower = key.lower()
+        if key_lower == 'set-cookie':
+            if value not in cookie_values:
+                cookie_values.append(value)
+                deduplicated_headers.append((key, value))
+        elif key_lower == 'date':
+            if date_header is None:
+                date_header = value
+                date_key = key
+        elif key_lower not in seen_headers:
+            seen_headers[key_lower] = True
+            deduplicated_headers.append((key, value))
+    if date_header is not None:
+        deduplicated_headers.append((date_key or 'Date', date_header))
+    return deduplicated_headers
+
+
+def time_per_call(fn, make_input, rounds, repeats=5):
+    """Best of repeats, in microseconds per call"""
+    best = None
+    for _ in range(repeats):
+        inputs = [make_input() for _ in range(rounds)]
+        started = time.perf_counter()
+        for value in inputs:
+            fn(value)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=20000)
+    args = parser.parse_args()
+
+    multi = frozenset(response_headers.DEFAULT_MULTI_HEADERS)
+    if Headers is None:
+        print("werkzeug not installed: timing the WSGI passes only\n")
+    print("{:<34} {:>14} {:>14} {:>10}".format('scenario', 'before (us)', 'after (us)', 'speedup'))
+    for name, headers in SCENARIOS.items():
+        # Flask fills in its headers, the hook rebuilds them, the middleware rebuilds the result again
+        if Headers is not None:
+            def before(h):
+                return legacy_middleware(legacy_after_request(h).to_wsgi_list())
+            make_before = lambda: Headers(headers)  # noqa: E731
+        else:
+            before = legacy_middleware
+            make_before = lambda: list(headers)  # noqa: E731
+        before_us = time_per_call(before, make_before, args.rounds)
+        after_us = time_per_call(lambda h: response_headers.normalize_headers(h, multi), lambda: list(headers),
+                                 args.rounds)
+        print("{:<34} {:>14.2f} {:>14.2f} {:>9.1f}x".format(name, before_us, after_us,
+                                                           before_us / after_us if after_us else 0))
+
+
+if __name__ == '__main__':
+    main()
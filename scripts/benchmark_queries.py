@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Time the hot report and list queries against seeded data and report p50/p95 latency.
+
+Typical before/after run on a scratch database (see scripts/_db.py for connection settings):
+  python scripts/apply_migrations.py --to 0002
+  python scripts/seed_benchmark_data.py --items 1000000 --reset
+  python scripts/benchmark_queries.py --label before --out bench_before.json
+  python scripts/apply_migrations.py
+  python scripts/benchmark_queries.py --label after --out bench_after.json
+  python scripts/benchmark_queries.py --compare bench_before.json bench_after.json
+
+Query shapes mirror get_data for the benchmark group seeded by seed_benchmark_data.py.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _db import connect  # noqa: E402
+from seed_benchmark_data import BENCH_ACCOUNT_ID, BENCH_GROUP_ID  # noqa: E402
+
+
+def query_shapes(cur, year):
+    start, end = '{}-01-01'.format(year), '{}-12-31'.format(year)
+    cur.execute("SELECT id, date FROM collection WHERE group_id = %s ORDER BY date DESC LIMIT 1", (BENCH_GROUP_ID,))
+    sample = cur.fetchone()
+    if not sample:
+        sys.exit("No benchmark rows found; run scripts/seed_benchmark_data.py first")
+    sample_group, sample_date = sample['id'], sample['date']
+    return [
+        ('index yearly profit (get_yearly_profit)', """
+            SELECT p.year, COALESCE(sales.sale_price, 0) AS sale_price, p.purchase_price
+            FROM (SELECT YEAR(date) AS year, COALESCE(SUM(price), 0) AS purchase_price
+                  FROM collection WHERE group_id = %s AND date IS NOT NULL GROUP BY YEAR(date)) p
+            LEFT JOIN (SELECT YEAR(c.date) AS year,
+                           COALESCE(SUM(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0)), 0) AS sale_price
+                       FROM sale s INNER JOIN items i ON s.id = i.id INNER JOIN collection c ON i.group_id = c.id
+                       WHERE c.group_id = %s AND i.sold = 1 GROUP BY YEAR(c.date)) sales ON sales.year = p.year
+            ORDER BY p.year DESC""", (BENCH_GROUP_ID, BENCH_GROUP_ID)),
+        ('profit report, year (get_group_sold_from_date)', """
+            SELECT rollup_date AS date, COALESCE(SUM(purchase_net), 0) AS net
+            FROM report_daily_rollup
+            WHERE rollup_date BETWEEN %s AND %s AND account = %s AND purchase_count > 0
+            GROUP BY rollup_date ORDER BY rollup_date""", (start, end, BENCH_ACCOUNT_ID)),
+        ('sales report, year (get_sold_from_date)', """
+            SELECT rollup_date AS date, SUM(sale_price) AS price, SUM(sale_net) AS net
+            FROM report_daily_rollup
+            WHERE rollup_date BETWEEN %s AND %s AND group_id = %s AND sale_items > 0
+            GROUP BY rollup_date ORDER BY rollup_date""", (start, end, BENCH_GROUP_ID)),
+        ('group list, year (get_all_from_group_and_items)', """
+            SELECT c.id, c.name, c.price, c.date,
+                COALESCE(SUM(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0)), 0) AS net,
+                COUNT(i.group_id) AS total_items, SUM(CASE WHEN i.sold = 1 THEN 1 ELSE 0 END) AS sold_items
+            FROM collection c LEFT JOIN items i ON c.id = i.group_id LEFT JOIN sale s ON i.id = s.id
+            WHERE c.group_id = %s AND c.date BETWEEN %s AND %s
+            GROUP BY c.id, c.name, c.price, c.date ORDER BY c.date""", (BENCH_GROUP_ID, start, end)),
+        ('group detail (get_data_from_item_groups)', """
+            SELECT items.id, items.name, items.sold, ls.price AS gross,
+                (ls.price - ls.shipping_fee - COALESCE(ls.returned_fee, 0)) AS net, ls.sale_date
+            FROM items items
+            INNER JOIN collection collection ON items.group_id = collection.id
+            LEFT JOIN item_latest_sale ls ON ls.item_id = items.id
+            WHERE items.group_id = %s AND collection.group_id = %s
+            ORDER BY ls.sale_date""", (sample_group, BENCH_GROUP_ID)),
+        ('profit drill-down (get_sold_items_by_group_date)', """
+            SELECT items.id, ls.price AS gross, ls.sale_date
+            FROM items items
+            INNER JOIN collection collection ON items.group_id = collection.id
+            LEFT JOIN item_latest_sale ls ON ls.item_id = items.id
+            WHERE collection.date = %s AND collection.account = %s AND items.sold = 1
+            ORDER BY ls.sale_date, items.name""", (sample_date, BENCH_ACCOUNT_ID)),
+        ('item list, sold in year (get_list_of_items_by_sold_status)', """
+            SELECT i.id, i.name, s.date AS sale_date, c.date AS purchase_date
+            FROM items i INNER JOIN collection c ON i.group_id = c.id LEFT JOIN sale s ON i.id = s.id
+            WHERE c.account = %s AND i.sold = 1 AND s.date BETWEEN %s AND %s
+            ORDER BY c.date ASC""", (BENCH_ACCOUNT_ID, start, end)),
+    ]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(conn, year, runs, warmup):
+    cur = conn.cursor()
+    results = {}
+    for name, sql, params in query_shapes(cur, year):
+        for _ in range(warmup):
+            cur.execute(sql, params)
+            cur.fetchall()
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            cur.execute(sql, params)
+            cur.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        results[name] = {'p50_ms': percentile(timings, 50), 'p95_ms': percentile(timings, 95), 'runs': runs}
+        print("{:<58} p50 {:>9.2f} ms   p95 {:>9.2f} ms".format(name, results[name]['p50_ms'], results[name]['p95_ms']))
+    cur.close()
+    return results
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print("{:<58} {:>12} {:>12} {:>12} {:>12}".format(
+        'query', before['label'] + ' p50', after['label'] + ' p50', before['label'] + ' p95', after['label'] + ' p95'))
+    for name, b in before['results'].items():
+        a = after['results'].get(name)
+        if not a:
+            continue
+        print("{:<58} {:>12.2f} {:>12.2f} {:>12.2f} {:>12.2f}".format(
+            name, b['p50_ms'], a['p50_ms'], b['p95_ms'], a['p95_ms']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--label', default='run')
+    parser.add_argument('--out', help='write results as JSON to this file')
+    parser.add_argument('--year', type=int, default=time.localtime().tm_year - 1)
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    conn = connect()
+    results = run(conn, args.year, args.runs, args.warmup)
+    conn.close()
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'label': args.label, 'year': args.year, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: Trading API field extraction with `.//` descendant searches vs ebay_xml direct paths.
+
+Parses each document once, then times only the per-record extraction (what runs per Item/Order in
+get_sold_items_basic, get_orders_for_item, get_order_with_tax_breakdown and parse_fvf_from_xml).
+
+  python scripts/benchmark_xml_extraction.py                      # synthetic 200-item SoldList + 100-order GetOrders
+  python scripts/benchmark_xml_extraction.py --items 2000 --orders 1000
+  python scripts/benchmark_xml_extraction.py --fixtures 'captures/*.xml'
+
+Fixtures are saved raw GetMyeBaySelling or GetOrders responses (the ios/GSaleApp/*.html captures are
+rendered GSale pages, not Trading API XML, so they are not usable here).
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+import ebay_xml  # noqa: E402
+
+NS = ebay_xml.NS
+
+
+def synthetic_sold_list(count):
+    items = []
+    for i in range(count):
+        items.append("""
+    <OrderTransaction><Transaction>
+      <Buyer><UserID>buyer{i}</UserID><BuyerInfo><ShippingAddress><Name>Buyer {i}</Name><Street1>{i} Main St</Street1>
+        <CityName>Springfield</CityName><StateOrProvince>IL</StateOrProvince><PostalCode>62701</PostalCode></ShippingAddress></BuyerInfo></Buyer>
+      <ShippedTime>2024-03-02T10:00:00.000Z</ShippedTime><TotalPrice currencyID="USD">{price}</TotalPrice>
+      <Item>
+        <ItemID>{item_id}</ItemID><Title>Vintage lot #{i} with assorted parts</Title>
+        <ListingDetails><StartTime>2024-02-01T10:00:00.000Z</StartTime><EndTime>2024-03-01T10:00:00.000Z</EndTime></ListingDetails>
+        <PictureDetails><GalleryURL>https://i.ebayimg.com/images/g/{i}/s-l140.jpg</GalleryURL></PictureDetails>
+        <PrimaryCategory><CategoryID>{cat}</CategoryID><CategoryName>Collectibles</CategoryName></PrimaryCategory>
+        <Quantity>1</Quantity>
+        <SellingStatus><CurrentPrice currencyID="USD">{price}</CurrentPrice><QuantitySold>1</QuantitySold><ListingStatus>Completed</ListingStatus></SellingStatus>
+        <ConditionDisplayName>Used</ConditionDisplayName>
+      </Item>
+    </Transaction></OrderTransaction>""".format(i=i, item_id=110000000000 + i, price=10 + i % 90, cat=1000 + i % 50))
+    return """<?xml version="1.0" encoding="UTF-8"?>
+<GetMyeBaySellingResponse xmlns="urn:ebay:apis:eBLBaseComponents"><Ack>Success</Ack>
+  <SoldList><OrderTransactionArray>{}</OrderTransactionArray>
+  <PaginationResult><TotalNumberOfPages>1</TotalNumberOfPages><TotalNumberOfEntries>{}</TotalNumberOfEntries></PaginationResult></SoldList>
+</GetMyeBaySellingResponse>""".format(''.join(items), count)
+
+
+def synthetic_orders(count):
+    orders = []
+    for i in range(count):
+        orders.append("""
+  <Order><OrderID>{order_id}</OrderID><OrderStatus>Completed</OrderStatus>
+    <CheckoutStatus><Status>Complete</Status><LastModifiedTime>2024-03-02T10:00:00.000Z</LastModifiedTime></CheckoutStatus>
+    <ShippingDetails><SalesTax><SalesTaxPercent>0.0</SalesTaxPercent><SalesTaxAmount currencyID="USD">1.{c:02d}</SalesTaxAmount></SalesTax></ShippingDetails>
+    <ShippingAddress><Name>Buyer {i}</Name><Street1>{i} Main St</Street1><CityName>Springfield</CityName><PostalCode>62701</PostalCode></ShippingAddress>
+    <ShippingServiceSelected><ShippingService>USPSGroundAdvantage</ShippingService><ShippingServiceCost currencyID="USD">4.50</ShippingServiceCost></ShippingServiceSelected>
+    <Subtotal currencyID="USD">{price}</Subtotal><Total currencyID="USD">{total}</Total><CreatedTime>2024-03-01T10:00:00.000Z</CreatedTime>
+    <TransactionArray><Transaction>
+      <Buyer><Email>buyer{i}@example.com</Email></Buyer><ShippingDetails><SellingManagerSalesRecordNumber>{i}</SellingManagerSalesRecordNumber></ShippingDetails>
+      <CreatedDate>2024-03-01T10:00:00.000Z</CreatedDate>
+      <Item><ItemID>{item_id}</ItemID><Site>US</Site><Title>Vintage lot #{i}</Title></Item>
+      <QuantityPurchased>1</QuantityPurchased><TransactionID>{i}</TransactionID>
+      <TransactionPrice currencyID="USD">{price}</TransactionPrice><FinalValueFee currencyID="USD">{fvf}</FinalValueFee>
+      <OrderLineItemID>{item_id}-{i}</OrderLineItemID>
+    </Transaction></TransactionArray>
+  </Order>""".format(i=i, c=i % 100, order_id='12-{:05d}-{:05d}'.format(i, i), item_id=110000000000 + i,
+                     price=10 + i % 90, total=14.5 + i % 90, fvf=round((10 + i % 90) * 0.1325, 2)))
+    return """<?xml version="1.0" encoding="UTF-8"?>
+<GetOrdersResponse xmlns="urn:ebay:apis:eBLBaseComponents"><Ack>Success</Ack>
+  <OrderArray>{}</OrderArray><HasMoreOrders>false</HasMoreOrders>
+</GetOrdersResponse>""".format(''.join(orders))
+
+
+# Pre-ebay_xml extraction, as app.py did it: one `.//` descendant search per field
+
+def _find(elem, name):
+    return elem.find('.//' + NS + name)
+
+
+def legacy_sold_item(item):
+    item_id, title = _find(item, 'ItemID'), _find(item, 'Title')
+    condition, quantity, end_time = _find(item, 'ConditionDisplayName'), _find(item, 'Quantity'), _find(item, 'EndTime')
+    price = 0
+    selling_status = _find(item, 'SellingStatus')
+    if selling_status is not None:
+        current_price = _find(selling_status, 'CurrentPrice')
+        if current_price is not None and current_price.text:
+            price = float(current_price.text)
+    gallery = None
+    picture_details = _find(item, 'PictureDetails')
+    if picture_details is not None:
+        gallery = _find(picture_details, 'GalleryURL')
+    category = _find(item, 'PrimaryCategoryName')
+    _find(item, 'TransactionArray')
+    if selling_status is not None:
+        _find(selling_status, 'ListingStatus')
+    _find(item, 'CancelReason')
+    ET.tostring(item, encoding='unicode', method='text')
+    return (item_id.text if item_id is not None else None, title.text if title is not None else None,
+            condition, quantity, end_time, price, gallery, category)
+
+
+def legacy_order(order):
+    order_id = _find(order, 'OrderID')
+    results = []
+    for transaction in order.findall('.//' + NS + 'Transaction'):
+        item = _find(transaction, 'Item')
+        item_id = _find(item, 'ItemID') if item is not None else None
+        price = _find(transaction, 'TransactionPrice')
+        values = [_find(order, name) for name in ('Subtotal', 'ShippingCost', 'ShippingServiceCost', 'Total',
+                                                  'FinalValueFee', 'SalesTax', 'Fees')]
+        results.append((order_id, item_id, price, values))
+    return results
+
+
+def new_order(order):
+    order_id = ebay_xml.text(order, ebay_xml.ORDER_ID)
+    return [(order_id, ebay_xml.text(t, ebay_xml.TRANSACTION_ITEM_ID), ebay_xml.order_breakdown(order, t, order_id))
+            for t in order.findall(ebay_xml.ORDER_TRANSACTIONS)]
+
+
+def records(root):
+    """(kind, elements) for whatever the document contains"""
+    sold = root.find(NS + 'SoldList')
+    if sold is not None:
+        return 'sold items', list(sold.iter(NS + 'Item'))
+    return 'orders', root.findall(ebay_xml.ORDERS)
+
+
+def time_it(fn, elements, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for elem in elements:
+            fn(elem)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def bench(name, xml_text, rounds):
+    root = ET.fromstring(xml_text)
+    kind, elements = records(root)
+    legacy, new = (legacy_sold_item, ebay_xml.sold_item) if kind == 'sold items' else (legacy_order, new_order)
+    legacy_ms = time_it(legacy, elements, rounds)
+    new_ms = time_it(new, elements, rounds)
+    print("{:<40} {:>6} {:<10} descendant {:>9.2f} ms   direct {:>9.2f} ms   {:>5.1f}x".format(
+        name, len(elements), kind, legacy_ms, new_ms, legacy_ms / new_ms if new_ms else 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=200, help='synthetic SoldList items')
+    parser.add_argument('--orders', type=int, default=100, help='synthetic GetOrders orders')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--fixtures', help='glob of saved Trading API XML responses to benchmark instead')
+    args = parser.parse_args()
+
+    if args.fixtures:
+        paths = sorted(glob.glob(args.fixtures))
+        if not paths:
+            sys.exit("No fixtures match {}".format(args.fixtures))
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                bench(os.path.basename(path), f.read(), args.rounds)
+        return
+    bench('synthetic GetMyeBaySelling', synthetic_sold_list(args.items), args.rounds)
+    bench('synthetic GetOrders', synthetic_orders(args.orders), args.rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Compare EXPLAIN plans of the old LIKE date filters with the BETWEEN ranges get_data now uses.
+
+Seed first (scripts/seed_benchmark_data.py), then run from repo root:
+  python scripts/explain_date_filters.py --year 2022
+
+For each query shape it prints the access type, chosen index and estimated rows per table, and
+times a few executions of both variants. LIKE on a DATE column casts every row to a string, so
+MySQL cannot range-scan idx_collection_date; the BETWEEN variant should show type=range.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _db import connect  # noqa: E402
+from seed_benchmark_data import BENCH_ACCOUNT_ID, BENCH_GROUP_ID  # noqa: E402
+
+
+def query_shapes(year):
+    start, end = '{}-01-01'.format(year), '{}-12-31'.format(year)
+    like = '{}-%-%'.format(year)
+    return [
+        ('profit purchases (get_profit)',
+         "SELECT COALESCE(SUM(price), 0) FROM collection WHERE group_id = %s AND date LIKE %s",
+         (BENCH_GROUP_ID, like),
+         "SELECT COALESCE(SUM(price), 0) FROM collection WHERE group_id = %s AND date BETWEEN %s AND %s",
+         (BENCH_GROUP_ID, start, end)),
+        ('group list (get_all_from_group_and_items)',
+         """SELECT c.id, COALESCE(SUM(s.price - s.shipping_fee), 0) AS net, COUNT(i.group_id) AS total_items
+            FROM collection c LEFT JOIN items i ON c.id = i.group_id LEFT JOIN sale s ON i.id = s.id
+            WHERE c.date LIKE %s AND c.group_id = %s GROUP BY c.id""",
+         (like, BENCH_GROUP_ID),
+         """SELECT c.id, COALESCE(SUM(s.price - s.shipping_fee), 0) AS net, COUNT(i.group_id) AS total_items
+            FROM collection c LEFT JOIN items i ON c.id = i.group_id LEFT JOIN sale s ON i.id = s.id
+            WHERE c.group_id = %s AND c.date BETWEEN %s AND %s GROUP BY c.id""",
+         (BENCH_GROUP_ID, start, end)),
+        ('group dropdown (get_group_choices_for_account)',
+         "SELECT id, name FROM collection WHERE date LIKE %s AND account = %s ORDER BY date DESC, name ASC",
+         ('%' + like + '%', BENCH_ACCOUNT_ID),
+         "SELECT id, name FROM collection WHERE account = %s AND date BETWEEN %s AND %s ORDER BY date DESC, name ASC",
+         (BENCH_ACCOUNT_ID, start, end)),
+        ('item list (get_list_of_items_by_sold_status)',
+         """SELECT i.id, s.date FROM items i INNER JOIN collection c ON i.group_id = c.id
+            LEFT JOIN sale s ON i.id = s.id
+            WHERE c.account = %s AND i.sold = 1 AND s.date LIKE %s AND c.date LIKE %s
+            AND i.list_date LIKE %s AND i.storage LIKE %s""",
+         (BENCH_ACCOUNT_ID, like, '%', '%', '%'),
+         """SELECT i.id, s.date FROM items i INNER JOIN collection c ON i.group_id = c.id
+            LEFT JOIN sale s ON i.id = s.id
+            WHERE c.account = %s AND i.sold = 1 AND s.date BETWEEN %s AND %s""",
+         (BENCH_ACCOUNT_ID, start, end)),
+    ]
+
+
+def explain(cur, sql, params):
+    cur.execute("EXPLAIN " + sql, params)
+    return cur.fetchall()
+
+
+def time_query(cur, sql, params, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def print_plan(label, rows):
+    print("  {}:".format(label))
+    for row in rows:
+        print("    table={:<4} type={:<7} key={:<32} rows={:<9} {}".format(
+            str(row.get('table')), str(row.get('type')), str(row.get('key')),
+            str(row.get('rows')), row.get('Extra') or ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--year', type=int, default=2022)
+    parser.add_argument('--runs', type=int, default=5, help='timed executions per variant')
+    args = parser.parse_args()
+
+    conn = connect()
+    cur = conn.cursor()
+    for name, like_sql, like_params, range_sql, range_params in query_shapes(args.year):
+        print(name)
+        print_plan('LIKE', explain(cur, like_sql, like_params))
+        print_plan('BETWEEN', explain(cur, range_sql, range_params))
+        print("  median ms: LIKE {:.1f}  BETWEEN {:.1f}".format(
+            time_query(cur, like_sql, like_params, args.runs),
+            time_query(cur, range_sql, range_params, args.runs)))
+        print()
+    cur.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Seed a scratch database with synthetic collections, items and sales for query benchmarks.
+
+Run from repo root against a database loaded with sql/table.sql (and the sql/ migrations):
+  python scripts/seed_benchmark_data.py --items 100000
+  python scripts/seed_benchmark_data.py --items 1000000 --reset
+
+Connection settings: see scripts/_db.py (MYSQL_* from config or environment). Never point this
+at production: rows are written under a dedicated benchmark group/account and --reset deletes them.
+The report rollup and latest-sale tables are rebuilt afterwards when their migrations are applied.
+"""
+import argparse
+import os
+import random
+import sys
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _db import connect  # noqa: E402
+from apply_migrations import run_backfill  # noqa: E402
+
+BENCH_GROUP_ID = 'bench-group-0000-0000-000000000001'
+BENCH_ACCOUNT_ID = 'bench-account-000-0000-000000000001'
+BATCH_SIZE = 5000
+
+
+def reset(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        DELETE s FROM sale s
+        INNER JOIN items i ON s.id = i.id
+        INNER JOIN collection c ON i.group_id = c.id
+        WHERE c.group_id = %s
+    """, (BENCH_GROUP_ID,))
+    cur.execute("""
+        DELETE i FROM items i
+        INNER JOIN collection c ON i.group_id = c.id
+        WHERE c.group_id = %s
+    """, (BENCH_GROUP_ID,))
+    cur.execute("DELETE FROM collection WHERE group_id = %s", (BENCH_GROUP_ID,))
+    conn.commit()
+    cur.close()
+
+
+def seed(conn, item_count, items_per_collection=20, years=10, sold_ratio=0.6, seed_value=42):
+    """Insert item_count items spread over collections in the last `years` years. Returns collection count."""
+    rng = random.Random(seed_value)
+    today = date.today()
+    first_day = today - timedelta(days=365 * years)
+    span = (today - first_day).days
+    collection_count = max(1, item_count // items_per_collection)
+    cur = conn.cursor()
+
+    collections = []
+    for n in range(collection_count):
+        bought = first_day + timedelta(days=rng.randrange(span))
+        collections.append((str(uuid.uuid4()), bought))
+    for start in range(0, len(collections), BATCH_SIZE):
+        cur.executemany(
+            "INSERT INTO collection(id, name, date, price, account, group_id) VALUES (%s, %s, %s, %s, %s, %s)",
+            [(cid, 'Bench {}'.format(start + n), bought, round(rng.uniform(5, 300), 2),
+              BENCH_ACCOUNT_ID, BENCH_GROUP_ID)
+             for n, (cid, bought) in enumerate(collections[start:start + BATCH_SIZE])],
+        )
+        conn.commit()
+
+    items = []
+    sales = []
+    for n in range(item_count):
+        cid, bought = collections[n % collection_count]
+        item_id = str(uuid.uuid4())
+        sold = 1 if rng.random() < sold_ratio else 0
+        sale_day = bought + timedelta(days=rng.randrange(1, 240)) if sold else bought
+        items.append((item_id, 'Bench item {}'.format(n), sold, cid, 'Bin {}'.format(n % 50), bought))
+        sales.append((item_id, round(rng.uniform(5, 150), 2) if sold else 0,
+                      round(rng.uniform(0, 15), 2) if sold else 0, min(sale_day, today)))
+        if len(items) >= BATCH_SIZE:
+            _flush_items(conn, cur, items, sales)
+    _flush_items(conn, cur, items, sales)
+    cur.close()
+    return collection_count
+
+
+def _flush_items(conn, cur, items, sales):
+    if not items:
+        return
+    cur.executemany(
+        "INSERT INTO items(id, name, sold, group_id, storage, list_date) VALUES (%s, %s, %s, %s, %s, %s)",
+        items,
+    )
+    cur.executemany("INSERT INTO sale(id, price, shipping_fee, date) VALUES (%s, %s, %s, %s)", sales)
+    conn.commit()
+    del items[:]
+    del sales[:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=100000, help='number of items to insert')
+    parser.add_argument('--items-per-collection', type=int, default=20)
+    parser.add_argument('--years', type=int, default=10, help='spread purchases over this many years')
+    parser.add_argument('--reset', action='store_true', help='delete previously seeded benchmark rows first')
+    args = parser.parse_args()
+
+    conn = connect()
+    if args.reset:
+        reset(conn)
+        print("Removed previous benchmark rows")
+    collections = seed(conn, args.items, args.items_per_collection, args.years)
+    print("Seeded {} items in {} collections (group_id {})".format(args.items, collections, BENCH_GROUP_ID))
+    for version in run_backfill(conn):
+        print("Rebuilt derived table from migration {}".format(version))
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,22 +2,129 @@ from collections.abc import Mapping
 from flask import session
 import datetime
 from datetime import date, timedelta
+import json
 import uuid
 
+import admin_cache
 import reports_cache
 
 # We'll get the mysql object passed to us or use a global reference
 mysql = None
 
+# Rows per multi-row INSERT when adding many items at once
+BULK_INSERT_CHUNK_SIZE = 500
+
 def set_mysql_connection(mysql_connection):
     """Set the MySQL connection from the main app"""
     global mysql
     mysql = mysql_connection
 
 
-def _invalidate_report_cache():
-    """Profit/sales reports cache in-memory; clear after any change that affects totals."""
-    reports_cache.clear_report_cache()
+def _invalidate_report_cache(dates=None):
+    """Evict this group's cached reports covering the given dates (all of its reports when dates is None)."""
+    reports_cache.invalidate_reports(session.get('group_id'), dates)
+
+
+def _item_report_dates(cur, item_ids):
+    """Purchase (collection) and sale dates of items, i.e. the report rows a change to them touches."""
+    item_ids = [str(item_id) for item_id in item_ids]
+    if not item_ids:
+        return set()
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    cur.execute("""
+        SELECT c.date AS group_date, s.date AS sale_date
+        FROM items i
+        INNER JOIN collection c ON i.group_id = c.id
+        LEFT JOIN sale s ON s.id = i.id
+        WHERE i.id IN ({}) AND c.group_id = %s
+    """.format(placeholders), tuple(item_ids) + (session.get('group_id'),))
+    dates = set()
+    for row in cur.fetchall():
+        dates.add(row['group_date'])
+        dates.add(row['sale_date'])
+    dates.discard(None)
+    return dates
+
+
+def _refresh_daily_rollup(cur, dates):
+    """Recompute this group's report_daily_rollup rows for the given dates. Call before commit."""
+    dates = sorted({str(d)[:10] for d in dates if d})
+    group_id = session.get('group_id')
+    if not dates or not group_id:
+        return
+    placeholders = ', '.join(['%s'] * len(dates))
+    cur.execute("DELETE FROM report_daily_rollup WHERE group_id = %s AND rollup_date IN ({})".format(placeholders),
+                (group_id,) + tuple(dates))
+    cur.execute("""
+        INSERT INTO report_daily_rollup
+            (group_id, account, rollup_date, purchase_count, purchase_spend, purchase_items, purchase_net,
+             sale_items, sale_price, shipping_fee, returned_fee, sale_net)
+        SELECT group_id, account, rollup_date,
+            SUM(purchase_count), SUM(purchase_spend), SUM(purchase_items), SUM(purchase_net),
+            SUM(sale_items), SUM(sale_price), SUM(shipping_fee), SUM(returned_fee), SUM(sale_net)
+        FROM (
+            SELECT c.group_id, COALESCE(c.account, '') AS account, c.date AS rollup_date,
+                1 AS purchase_count, c.price AS purchase_spend, 0 AS purchase_items, 0 AS purchase_net,
+                0 AS sale_items, 0 AS sale_price, 0 AS shipping_fee, 0 AS returned_fee, 0 AS sale_net
+            FROM collection c
+            WHERE c.group_id = %s AND c.date IN ({dates})
+            UNION ALL
+            SELECT c.group_id, COALESCE(c.account, ''), c.date,
+                0, 0, 1, COALESCE(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0), 0),
+                0, 0, 0, 0, 0
+            FROM collection c
+            INNER JOIN items i ON i.group_id = c.id
+            LEFT JOIN sale s ON s.id = i.id
+            WHERE c.group_id = %s AND c.date IN ({dates})
+            UNION ALL
+            SELECT c.group_id, COALESCE(c.account, ''), s.date,
+                0, 0, 0, 0,
+                1, s.price, COALESCE(s.shipping_fee, 0), COALESCE(s.returned_fee, 0),
+                COALESCE(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0), 0)
+            FROM sale s
+            INNER JOIN items i ON s.id = i.id
+            INNER JOIN collection c ON i.group_id = c.id
+            WHERE c.group_id = %s AND s.date IN ({dates})
+        ) x
+        GROUP BY group_id, account, rollup_date
+    """.format(dates=placeholders), ((group_id,) + tuple(dates)) * 3)
+
+
+def _refresh_latest_sale(cur, item_ids):
+    """Re-point item_latest_sale at each item's most recent sale row. Call after writing to sale, before commit."""
+    item_ids = [str(item_id) for item_id in item_ids]
+    if not item_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    cur.execute("DELETE FROM item_latest_sale WHERE item_id IN ({})".format(placeholders), tuple(item_ids))
+    cur.execute("""
+        INSERT INTO item_latest_sale (item_id, price, shipping_fee, returned_fee, sale_date)
+        SELECT id, price, shipping_fee, returned_fee, date
+        FROM (
+            SELECT s.id, s.price, s.shipping_fee, s.returned_fee, s.date,
+                ROW_NUMBER() OVER (PARTITION BY s.id ORDER BY s.date DESC, s.price DESC) AS rn
+            FROM sale s
+            WHERE s.id IN ({})
+        ) ranked
+        WHERE rn = 1
+    """.format(placeholders), tuple(item_ids))
+
+
+def _group_report_dates(cur, group_id):
+    """Purchase date of a collection plus the sale dates of its items."""
+    cur.execute("""
+        SELECT c.date AS group_date, s.date AS sale_date
+        FROM collection c
+        LEFT JOIN items i ON i.group_id = c.id
+        LEFT JOIN sale s ON s.id = i.id
+        WHERE c.id = %s AND c.group_id = %s
+    """, (group_id, session.get('group_id')))
+    dates = set()
+    for row in cur.fetchall():
+        dates.add(row['group_date'])
+        dates.add(row['sale_date'])
+    dates.discard(None)
+    return dates
 
 #Item Data
 
@@ -33,6 +140,7 @@ def set_mark_sold(id, sold):
         raise ValueError("Invalid sold status")
     
     cur = mysql.connection.cursor()
+    affected_dates = _item_report_dates(cur, [id])
     cur.execute("""
         UPDATE items i 
         INNER JOIN collection c ON i.group_id = c.id 
@@ -41,7 +149,7 @@ def set_mark_sold(id, sold):
     """, (sold, id, session.get('id')))
     mysql.connection.commit()
     cur.close()
-    _invalidate_report_cache()
+    _invalidate_report_cache(affected_dates)
 
 def set_bought_items_improved(details):
     """Improved function to handle bulk item adding with individual categories and eBay item IDs"""
@@ -58,10 +166,11 @@ def set_bought_items_improved(details):
     if not isinstance(details.get('list_date', ''), str) or len(details.get('list_date', '')) > 10:
         raise ValueError("Invalid list date")
     
-    cur = mysql.connection.cursor()
+    sale_date = date.today().strftime("%Y-%m-%d")
     
-    # Process items from the new form structure
-    item_count = 0
+    # Process items from the new form structure; rows are inserted in chunks below
+    item_rows = []
+    sale_rows = []
     for key, value in details.items():
         if key.startswith("items-") and "-name" in key:
             # Extract item index from key like "items-0-name"
@@ -88,22 +197,35 @@ def set_bought_items_improved(details):
             else:
                 ebay_item_id = None
             
-            # Insert item with eBay item ID
-            item_id = generate_uuid()
-            cur.execute("""
-                INSERT INTO items(id, name, group_id, category_id, storage, list_date, ebay_item_id) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (item_id, item_name, details['group'], category_id, details['storage'], details['list_date'], ebay_item_id))
-            
-            # Insert sale record
-            cur.execute("INSERT INTO sale(id, price, shipping_fee, date) VALUES (%s, 0, 0, %s)",
-                        (item_id, date.today().strftime("%Y-%m-%d")))
-            
-            item_count += 1
+            item_id = str(generate_uuid())
+            item_rows.append((item_id, item_name, details['group'], category_id, details['storage'], details['list_date'], ebay_item_id))
+            # Placeholder sale record
+            sale_rows.append((item_id, 0, 0, sale_date))
     
+    item_count = len(item_rows)
+    cur = mysql.connection.cursor()
+    # executemany sends each chunk as one multi-row INSERT
+    for start in range(0, item_count, BULK_INSERT_CHUNK_SIZE):
+        end = start + BULK_INSERT_CHUNK_SIZE
+        cur.executemany("""
+            INSERT INTO items(id, name, group_id, category_id, storage, list_date, ebay_item_id) 
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, item_rows[start:end])
+        cur.executemany("INSERT INTO sale(id, price, shipping_fee, date) VALUES (%s, %s, %s, %s)",
+                        sale_rows[start:end])
+        # New items have exactly one sale row, so it is also their latest sale. Every value is a
+        # placeholder: mysqlclient only batches executemany into one INSERT when the VALUES are all %s.
+        cur.executemany("""
+            INSERT INTO item_latest_sale (item_id, price, shipping_fee, sale_date, returned_fee)
+            VALUES (%s, %s, %s, %s, %s)
+        """, [row + (0,) for row in sale_rows[start:end]])
+    
+    affected_dates = (_group_report_dates(cur, details['group']) | {sale_date}) if item_count else set()
+    _refresh_daily_rollup(cur, affected_dates)
     mysql.connection.commit()
     cur.close()
-    _invalidate_report_cache()
+    if item_count:
+        _invalidate_report_cache(affected_dates)
     
     return item_count
 
@@ -147,16 +269,20 @@ def set_quick_sale(details):
         ebay_item_id = None
 
     item_id = generate_uuid()
+    sale_date = date.today().strftime("%Y-%m-%d")
     cur = mysql.connection.cursor()
     cur.execute(
         "INSERT INTO items(id, name, group_id, category_id, list_date, sold, ebay_item_id) VALUES (%s, %s, %s, %s, %s, 1, %s)",
         (item_id, details['name'], details['group'], details['category'], details['list_date'], ebay_item_id),
     )
     cur.execute("INSERT INTO sale(id, price, shipping_fee, date) VALUES (%s, %s, %s, %s)",
-                (item_id, price, shipping_fee, date.today().strftime("%Y-%m-%d")))
+                (item_id, price, shipping_fee, sale_date))
+    affected_dates = _item_report_dates(cur, [item_id]) | {sale_date}
+    _refresh_latest_sale(cur, [item_id])
+    _refresh_daily_rollup(cur, affected_dates)
     mysql.connection.commit()
     cur.close()
-    _invalidate_report_cache()
+    _invalidate_report_cache(affected_dates)
     return item_id
 
 def set_sale_data(details):
@@ -185,6 +311,8 @@ def set_sale_data(details):
     if not sale_date:
         sale_date = None
     
+    # Old sale date and purchase date; the new sale date is added below
+    affected_dates = _item_report_dates(cur, [details['id']])
     cur.execute("""
         UPDATE sale s
         INNER JOIN items i ON s.id = i.id
@@ -192,9 +320,13 @@ def set_sale_data(details):
         SET s.date = %s, s.price = %s, s.shipping_fee = %s 
         WHERE s.id = %s AND c.account = %s
     """, (sale_date, price, shipping_fee, details['id'], session.get('id')))
+    if sale_date:
+        affected_dates.add(sale_date)
+    _refresh_latest_sale(cur, [details['id']])
+    _refresh_daily_rollup(cur, affected_dates)
     mysql.connection.commit()
     cur.close()
-    _invalidate_report_cache()
+    _invalidate_report_cache(affected_dates)
 
 
 def set_items_modify(details):
@@ -219,15 +351,19 @@ def set_items_modify(details):
     elif not ebay_item_id:
         ebay_item_id = None
     
+    affected_dates = _item_report_dates(cur, [details['id']])
     cur.execute("""
         UPDATE items i
         INNER JOIN collection c ON i.group_id = c.id
         SET i.name = %s, i.group_id = %s, i.category_id = %s, i.returned = %s, i.storage = %s, i.list_date = %s, i.ebay_item_id = %s
         WHERE i.id = %s AND c.account = %s
     """, (details['name'], details['group'], details['category'], details['returned'], details['storage'], details['list_date'], ebay_item_id, details['id'], session.get('id')))
+    # Item may have moved to another collection (purchase date)
+    affected_dates |= _item_report_dates(cur, [details['id']])
+    _refresh_daily_rollup(cur, affected_dates)
     mysql.connection.commit()
     cur.close()
-    _invalidate_report_cache()
+    _invalidate_report_cache(affected_dates)
 
 def remove_item_data(id):
     # Validate input
@@ -235,14 +371,121 @@ def remove_item_data(id):
         raise ValueError("Invalid item ID")
     
     cur = mysql.connection.cursor()
+    affected_dates = _item_report_dates(cur, [id])
     cur.execute("""
         DELETE i FROM items i
         INNER JOIN collection c ON i.group_id = c.id
         WHERE i.id = %s AND c.account = %s
     """, (id, session.get('id')))
+    _refresh_daily_rollup(cur, affected_dates)
+    mysql.connection.commit()
+    cur.close()
+    _invalidate_report_cache(affected_dates)
+
+#Bulk Item Data
+
+# Upper bound on ids per bulk request (keeps the IN (...) lists and lock footprint small)
+MAX_BULK_ITEMS = 500
+
+def _validate_item_ids(item_ids):
+    if not isinstance(item_ids, (list, tuple)) or not item_ids or len(item_ids) > MAX_BULK_ITEMS:
+        raise ValueError("Invalid item IDs")
+    cleaned = []
+    for item_id in item_ids:
+        if not isinstance(item_id, str) or not item_id or len(item_id) > 50:
+            raise ValueError("Invalid item ID")
+        if item_id not in cleaned:
+            cleaned.append(item_id)
+    return cleaned
+
+def set_items_bulk_mark_sold(item_ids, sold):
+    """Set the sold flag on many of the current account's items. Returns the number of rows changed."""
+    item_ids = _validate_item_ids(item_ids)
+    if sold not in [0, 1]:
+        raise ValueError("Invalid sold status")
+
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    cur = mysql.connection.cursor()
+    affected_dates = _item_report_dates(cur, item_ids)
+    cur.execute("""
+        UPDATE items i
+        INNER JOIN collection c ON i.group_id = c.id
+        SET i.sold = %s
+        WHERE i.id IN ({}) AND c.account = %s
+    """.format(placeholders), [sold] + item_ids + [session.get('id')])
+    updated = cur.rowcount
     mysql.connection.commit()
     cur.close()
-    _invalidate_report_cache()
+    _invalidate_report_cache(affected_dates)
+    return updated
+
+def set_items_bulk_move(item_ids, group_id):
+    """Move many of the current account's items into another collection of the same group."""
+    item_ids = _validate_item_ids(item_ids)
+    if not isinstance(group_id, str) or len(group_id) > 50:
+        raise ValueError("Invalid group ID")
+
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT date FROM collection WHERE id = %s AND group_id = %s", (group_id, session.get('group_id')))
+    target = cur.fetchone()
+    if not target:
+        cur.close()
+        raise ValueError("Invalid group ID")
+
+    affected_dates = _item_report_dates(cur, item_ids)
+    affected_dates.add(target['date'])
+    cur.execute("""
+        UPDATE items i
+        INNER JOIN collection c ON i.group_id = c.id
+        SET i.group_id = %s
+        WHERE i.id IN ({}) AND c.account = %s
+    """.format(placeholders), [group_id] + item_ids + [session.get('id')])
+    updated = cur.rowcount
+    _refresh_daily_rollup(cur, affected_dates)
+    mysql.connection.commit()
+    cur.close()
+    _invalidate_report_cache(affected_dates)
+    return updated
+
+def set_items_bulk_category(item_ids, category_id):
+    """Recategorize many of the current account's items."""
+    item_ids = _validate_item_ids(item_ids)
+    if not isinstance(category_id, str) or len(category_id) > 36:
+        raise ValueError("Invalid category ID")
+
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        UPDATE items i
+        INNER JOIN collection c ON i.group_id = c.id
+        SET i.category_id = %s
+        WHERE i.id IN ({}) AND c.account = %s
+    """.format(placeholders), [category_id] + item_ids + [session.get('id')])
+    updated = cur.rowcount
+    mysql.connection.commit()
+    cur.close()
+    # Category reports are not cached and the rollup has no category column; nothing to invalidate
+    return updated
+
+def remove_items_bulk(item_ids):
+    """Delete many of the current account's items."""
+    item_ids = _validate_item_ids(item_ids)
+
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    cur = mysql.connection.cursor()
+    affected_dates = _item_report_dates(cur, item_ids)
+    cur.execute("""
+        DELETE i FROM items i
+        INNER JOIN collection c ON i.group_id = c.id
+        WHERE i.id IN ({}) AND c.account = %s
+    """.format(placeholders), item_ids + [session.get('id')])
+    deleted = cur.rowcount
+    _refresh_daily_rollup(cur, affected_dates)
+    mysql.connection.commit()
+    cur.close()
+    _invalidate_report_cache(affected_dates)
+    return deleted
 
 
 #Group Data
@@ -286,9 +529,10 @@ def set_group_add(group_name, details, image_id):
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
     """, (group_id, group_name, details['date'], price, image_id, session.get('id'), 
           session.get('group_id'), latitude, longitude, location_address, neighborhood_id))
+    _refresh_daily_rollup(cur, {details['date']})
     mysql.connection.commit()
     cur.close()
-    _invalidate_report_cache()
+    _invalidate_report_cache({details['date']})
     return group_id
 
 def set_group_modify(details, image_id):
@@ -327,6 +571,7 @@ def set_group_modify(details, image_id):
     if neighborhood_id == '':
         neighborhood_id = None
     
+    affected_dates = _group_report_dates(cur, details['id'])
     cur.execute("""
         UPDATE collection 
         SET name = %s, date = %s, price = %s, image = %s, 
@@ -335,9 +580,11 @@ def set_group_modify(details, image_id):
     """, (details['name'], details['date'], price, image_id, 
           latitude, longitude, location_address, neighborhood_id,
           details['id'], session.get('group_id')))
+    affected_dates.add(details['date'])
+    _refresh_daily_rollup(cur, affected_dates)
     mysql.connection.commit()
     cur.close()
-    _invalidate_report_cache()
+    _invalidate_report_cache(affected_dates)
 
 def remove_group_data(id):
     # Validate input
@@ -345,13 +592,15 @@ def remove_group_data(id):
         raise ValueError("Invalid group ID")
     
     cur = mysql.connection.cursor()
+    affected_dates = _group_report_dates(cur, id)
     cur.execute("""
         DELETE FROM collection 
         WHERE id = %s AND group_id = %s
     """, (id, session.get('group_id')))
+    _refresh_daily_rollup(cur, affected_dates)
     mysql.connection.commit()
     cur.close()
-    _invalidate_report_cache()
+    _invalidate_report_cache(affected_dates)
 
 
 
@@ -429,6 +678,7 @@ def toggle_admin_status(user_id):
     cur.execute("UPDATE accounts SET is_admin = NOT is_admin WHERE id = %s", (user_id,))
     mysql.connection.commit()
     cur.close()
+    admin_cache.invalidate_admin_status(user_id)
     return True
 
 def toggle_user_status(user_id):
@@ -440,6 +690,7 @@ def toggle_user_status(user_id):
     cur.execute("UPDATE accounts SET is_active = NOT is_active WHERE id = %s", (user_id,))
     mysql.connection.commit()
     cur.close()
+    admin_cache.invalidate_admin_status(user_id)
     return True
 
 def deactivate_user(user_id):
@@ -451,6 +702,7 @@ def deactivate_user(user_id):
     cur.execute("UPDATE accounts SET is_active = 0 WHERE id = %s", (user_id,))
     mysql.connection.commit()
     cur.close()
+    admin_cache.invalidate_admin_status(user_id)
     return True
 
 def delete_user(user_id):
@@ -584,11 +836,14 @@ def add_group(name, description=""):
         raise ValueError("Invalid description")
     
     group_id = generate_uuid()
+    today = date.today().strftime("%Y-%m-%d")
     cur = mysql.connection.cursor()
     cur.execute("INSERT INTO collection(id, name, date, price, account, group_id) VALUES (%s, %s, %s, %s, %s, %s)", 
-                (group_id, name, date.today().strftime("%Y-%m-%d"), 0, session.get('id'), session.get('group_id')))
+                (group_id, name, today, 0, session.get('id'), session.get('group_id')))
+    _refresh_daily_rollup(cur, {today})
     mysql.connection.commit()
     cur.close()
+    _invalidate_report_cache({today})
     return group_id
 
 def record_access_attempt(email, google_id=None, name=None, picture=None, ip_address=None, user_agent=None):
@@ -618,6 +873,7 @@ def record_access_attempt(email, google_id=None, name=None, picture=None, ip_add
     """, (email, google_id, name, picture, ip_address, user_agent))
     mysql.connection.commit()
     cur.close()
+    admin_cache.invalidate_pending_count()
     return True
 
 def get_pending_access_attempts():
@@ -643,6 +899,18 @@ def get_pending_access_attempts():
     cur.close()
     return results
 
+def count_pending_access_attempts():
+    # Same filter as get_pending_access_attempts, without fetching the rows
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT COUNT(*) AS pending
+        FROM access_attempts
+        WHERE status IS NULL OR status = 'pending'
+    """)
+    row = cur.fetchone()
+    cur.close()
+    return int(row['pending']) if row else 0
+
 def update_access_attempt_status(attempt_id, status):
     # Validate inputs
     if not isinstance(attempt_id, str) or len(attempt_id) > 50:
@@ -655,6 +923,7 @@ def update_access_attempt_status(attempt_id, status):
     cur.execute("UPDATE access_attempts SET status = %s WHERE id = %s", (status, attempt_id))
     mysql.connection.commit()
     cur.close()
+    admin_cache.invalidate_pending_count()
     return True
 
 def mark_item_returned(item_id, returned_fee):
@@ -671,6 +940,7 @@ def mark_item_returned(item_id, returned_fee):
     
     cur = mysql.connection.cursor()
     try:
+        affected_dates = _item_report_dates(cur, [item_id])
         # Mark item as returned (don't change sold status)
         cur.execute("""
             UPDATE items i
@@ -688,8 +958,10 @@ def mark_item_returned(item_id, returned_fee):
             WHERE s.id = %s AND c.account = %s
         """, (returned_fee, item_id, session.get('id')))
         
+        _refresh_latest_sale(cur, [item_id])
+        _refresh_daily_rollup(cur, affected_dates)
         mysql.connection.commit()
-        _invalidate_report_cache()
+        _invalidate_report_cache(affected_dates)
         return True
     except Exception as e:
         mysql.connection.rollback()
@@ -1710,6 +1982,7 @@ def delete_group(group_id):
     """Delete a collection and all its associated items (not the user group)"""
     try:
         cur = mysql.connection.cursor()
+        affected_dates = _group_report_dates(cur, group_id)
         
         # Delete all items in the collection
         cur.execute("DELETE FROM items WHERE group_id = %s", (group_id,))
@@ -1724,8 +1997,10 @@ def delete_group(group_id):
         # Delete the collection record
         cur.execute("DELETE FROM collection WHERE id = %s", (group_id,))
         
+        _refresh_daily_rollup(cur, affected_dates)
         mysql.connection.commit()
         cur.close()
+        _invalidate_report_cache(affected_dates)
         return True, "Collection and all associated items deleted successfully"
     except Exception as e:
         print("Error deleting collection: {}".format(e))
@@ -1906,3 +2181,72 @@ def assign_neighborhood_to_collection(collection_id, neighborhood_id):
     except Exception as e:
         print("Error assigning collection to neighborhood: {}".format(e))
         return False, "Error assigning collection to neighborhood: {}".format(str(e))
+
+def set_ebay_order_cache(ebay_item_id, order_line_item_id, order_created_at, transaction_data, is_final, ttl_seconds):
+    """
+    Store one order line's eBay order/fee breakdown for the current group; settled orders never expire.
+    Written on its own pooled connection so the request's other pending writes are not committed early.
+    """
+    group_id = session.get('group_id')
+    if not ebay_item_id or not order_line_item_id or not group_id:
+        return
+    now = datetime.datetime.now()
+    expires_at = None if is_final else now + timedelta(seconds=ttl_seconds)
+    with mysql.pooled_connection() as conn:
+        cur = conn.cursor()
+        # Drop this group's expired entries while we are here; the table stays small
+        cur.execute("DELETE FROM ebay_order_cache WHERE group_id = %s AND expires_at <= %s", (group_id, now))
+        cur.execute("""
+            INSERT INTO ebay_order_cache
+                (group_id, order_line_item_id, ebay_item_id, order_id, order_created_at, is_final,
+                 transaction_data, fetched_at, expires_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                ebay_item_id = VALUES(ebay_item_id), order_id = VALUES(order_id),
+                order_created_at = VALUES(order_created_at), is_final = VALUES(is_final),
+                transaction_data = VALUES(transaction_data),
+                fetched_at = VALUES(fetched_at), expires_at = VALUES(expires_at)
+        """, (group_id, str(order_line_item_id), str(ebay_item_id), transaction_data.get('order_id') or None,
+              order_created_at, 1 if is_final else 0, json.dumps(transaction_data, default=str), now, expires_at))
+        conn.commit()
+        cur.close()
+
+def set_ebay_sold_orders(account_id, rows):
+    """Upsert synced sold eBay order lines for an account (no session: called from the sync worker)"""
+    if not rows:
+        return 0
+    now = datetime.datetime.utcnow()
+    values = [(account_id, r['order_line_item_id'], r['order_id'], r['ebay_item_id'], r['title'], r['price'],
+               r['currency'], r['quantity'], r['sold_at'], r['modified_at'], 1 if r['is_cancelled'] else 0, now)
+              for r in rows]
+    cur = mysql.connection.cursor()
+    for start in range(0, len(values), BULK_INSERT_CHUNK_SIZE):
+        cur.executemany("""
+            INSERT INTO ebay_sold_orders
+                (account, order_line_item_id, order_id, ebay_item_id, title, price, currency, quantity,
+                 sold_at, modified_at, is_cancelled, synced_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                order_id = VALUES(order_id), title = VALUES(title), price = VALUES(price),
+                currency = VALUES(currency), quantity = VALUES(quantity), sold_at = VALUES(sold_at),
+                modified_at = VALUES(modified_at), is_cancelled = VALUES(is_cancelled),
+                synced_at = VALUES(synced_at)
+        """, values[start:start + BULK_INSERT_CHUNK_SIZE])
+    mysql.connection.commit()
+    cur.close()
+    return len(values)
+
+def set_ebay_sync_state(account_id, last_mod_time, error=None):
+    """Record a sold-order sync run; a run without error also advances last_success_at"""
+    now = datetime.datetime.utcnow()
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        INSERT INTO ebay_sync_state (account, last_mod_time, last_run_at, last_success_at, last_error)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            last_mod_time = VALUES(last_mod_time), last_run_at = VALUES(last_run_at),
+            last_success_at = COALESCE(VALUES(last_success_at), last_success_at),
+            last_error = VALUES(last_error)
+    """, (account_id, last_mod_time, now, None if error else now, error))
+    mysql.connection.commit()
+    cur.close()
@@ -0,0 +1,26 @@
+"""
+Settings lookup shared by the configure_* helpers: app.config first, then the environment, then
+the default.
+
+A key present in app.config wins even when it is falsy, so EBAY_TOKEN_CACHE_SECONDS = 0 in
+config.py turns the cache off instead of falling through to the environment or the default.
+"""
+import os
+
+
+def get(app, key, default=None, cast=None):
+    """
+    app.config[key], else os.environ[key], else default. With cast (int, float, ...), the value found
+    is converted and default is returned when it does not convert.
+    """
+    value = app.config.get(key) if app else None
+    if value is None:
+        value = os.environ.get(key)
+    if value is None:
+        return default
+    if cast is None:
+        return value
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return default
@@ -10,35 +10,61 @@ Configure via Flask config or environment variables:
   SHIPPO_FROM_STATE      — 2-letter state
   SHIPPO_FROM_ZIP
   SHIPPO_FROM_COUNTRY    — Default US
+  SHIPPO_QUOTE_CACHE_TTL — Seconds a quote is reused for the same ZIP/parcel (default 900, 0 disables)
+  SHIPPO_QUOTE_CACHE_SIZE — Most quotes kept per worker, least recently used evicted (default 512)
+  SHIPPO_BATCH_CONCURRENCY — Shipments quoted in parallel by /api/shippo-rates/batch (default 4)
+  SHIPPO_ASYNC_TIMEOUT   — Seconds an async quote job waits for slow carriers before it is
+                           finished with the rates received so far (default 60)
+
+Quotes are cached per worker process on the ship-from address, the destination ZIP (5-digit),
+state and country, and the normalized parcel from build_parcel; street, city and name do not
+change the key, so a rate shown for a ZIP may not reflect carrier residential surcharges.
+
+Async quotes (start_quote_job / poll_quote_job) create the shipment with async=true and return at
+once; the job id is the Shippo shipment id, and each poll reads the shipment back from Shippo. The
+job's owner, quote-cache key and progress are kept in the report cache's shared backend (file or
+Redis, see reports_cache), so whichever worker a poll lands on can answer it and check the owner;
+an id that is not in the store is answered as not found. With REPORT_CACHE_BACKEND=memory jobs
+are per worker, and polls must reach the worker that started the job.
 """
-import os
+import json
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
+import reports_cache
+import settings
+
 SHIPPO_SHIPMENTS_URL = "https://api.goshippo.com/shipments/"
 SHIPPO_API_VERSION = "2018-02-08"
 ZIP_US_RE = re.compile(r"^\d{5}(-\d{4})?$")
-
-
-def _cfg(app, key, env_key, default=""):
-    return (app.config.get(key) if app else None) or os.environ.get(env_key, default)
+DEFAULT_QUOTE_CACHE_TTL = 900
+DEFAULT_QUOTE_CACHE_SIZE = 512
+DEFAULT_BATCH_CONCURRENCY = 4
+ASYNC_REQUEST_TIMEOUT = 15
+DEFAULT_ASYNC_TIMEOUT = 60
+JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+PENDING_STATUSES = ("QUEUED", "WAITING")
 
 
 def get_shippo_token(app):
-    return (_cfg(app, "SHIPPO_API_TOKEN", "SHIPPO_API_TOKEN", "") or "").strip()
+    return (settings.get(app, "SHIPPO_API_TOKEN", "") or "").strip()
 
 
 def get_address_from(app):
     """Build Shippo address_from dict from config/env."""
-    country = (_cfg(app, "SHIPPO_FROM_COUNTRY", "SHIPPO_FROM_COUNTRY", "US") or "US").strip() or "US"
+    country = (settings.get(app, "SHIPPO_FROM_COUNTRY", "US") or "US").strip() or "US"
     return {
-        "name": (_cfg(app, "SHIPPO_FROM_NAME", "SHIPPO_FROM_NAME", "Shipper") or "Shipper").strip(),
-        "street1": (_cfg(app, "SHIPPO_FROM_STREET1", "SHIPPO_FROM_STREET1", "") or "").strip(),
-        "street2": (_cfg(app, "SHIPPO_FROM_STREET2", "SHIPPO_FROM_STREET2", "") or "").strip() or None,
-        "city": (_cfg(app, "SHIPPO_FROM_CITY", "SHIPPO_FROM_CITY", "") or "").strip(),
-        "state": (_cfg(app, "SHIPPO_FROM_STATE", "SHIPPO_FROM_STATE", "") or "").strip(),
-        "zip": (_cfg(app, "SHIPPO_FROM_ZIP", "SHIPPO_FROM_ZIP", "") or "").strip(),
+        "name": (settings.get(app, "SHIPPO_FROM_NAME", "Shipper") or "Shipper").strip(),
+        "street1": (settings.get(app, "SHIPPO_FROM_STREET1", "") or "").strip(),
+        "street2": (settings.get(app, "SHIPPO_FROM_STREET2", "") or "").strip() or None,
+        "city": (settings.get(app, "SHIPPO_FROM_CITY", "") or "").strip(),
+        "state": (settings.get(app, "SHIPPO_FROM_STATE", "") or "").strip(),
+        "zip": (settings.get(app, "SHIPPO_FROM_ZIP", "") or "").strip(),
         "country": country,
     }
 
@@ -123,22 +149,41 @@ def build_parcel(body):
     }
 
 
-def request_shipment_rates(token, address_from, address_to, parcel):
-    """POST /shipments/ with async=false; return parsed JSON or raise."""
+def _headers(token):
+    return {
+        "Authorization": "ShippoToken {}".format(token),
+        "Content-Type": "application/json",
+        "SHIPPO-API-VERSION": SHIPPO_API_VERSION,
+    }
+
+
+def request_shipment_rates(token, address_from, address_to, parcel, async_mode=False):
+    """
+    POST /shipments/; return parsed JSON or raise.
+    async_mode=False waits for every carrier (up to 60s). async_mode=True returns as soon as Shippo
+    has queued the shipment (status QUEUED/WAITING); poll get_shipment for the rates.
+    """
     # Do not set carrier_accounts: if present, Shippo only returns those IDs.
     # Omitting it polls every active carrier on the Shippo account (USPS, UPS, FedEx, etc.).
     payload = {
         "address_from": {k: v for k, v in address_from.items() if v is not None},
         "address_to": address_to,
         "parcels": [parcel],
-        "async": False,
+        "async": bool(async_mode),
     }
-    headers = {
-        "Authorization": "ShippoToken {}".format(token),
-        "Content-Type": "application/json",
-        "SHIPPO-API-VERSION": SHIPPO_API_VERSION,
-    }
-    resp = requests.post(SHIPPO_SHIPMENTS_URL, json=payload, headers=headers, timeout=60)
+    resp = requests.post(SHIPPO_SHIPMENTS_URL, json=payload, headers=_headers(token),
+                         timeout=ASYNC_REQUEST_TIMEOUT if async_mode else 60)
+    return _parse_response(resp)
+
+
+def get_shipment(token, shipment_id):
+    """GET /shipments/<id>/ (status and the rates returned so far); return parsed JSON or raise."""
+    resp = requests.get("{}{}/".format(SHIPPO_SHIPMENTS_URL, shipment_id), headers=_headers(token),
+                        timeout=ASYNC_REQUEST_TIMEOUT)
+    return _parse_response(resp)
+
+
+def _parse_response(resp):
     try:
         data = resp.json()
     except Exception:
@@ -182,3 +227,254 @@ def normalize_rates(shipment_json):
         )
     out.sort(key=lambda x: x["amount_float"])
     return out
+
+
+class QuoteCache:
+    """LRU of normalized rate quotes with a fixed time-to-live."""
+
+    def __init__(self, ttl=DEFAULT_QUOTE_CACHE_TTL, max_entries=DEFAULT_QUOTE_CACHE_SIZE):
+        self.ttl = max(0, int(ttl))
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if not self.ttl:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        if not self.ttl:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_quote_cache = QuoteCache()
+
+
+def configure_quote_cache(app=None):
+    """Build the quote cache from config/env. Called once at app start-up; safe to call again."""
+    global _quote_cache
+    try:
+        _quote_cache = QuoteCache(
+            ttl=settings.get(app, "SHIPPO_QUOTE_CACHE_TTL", DEFAULT_QUOTE_CACHE_TTL, int),
+            max_entries=settings.get(app, "SHIPPO_QUOTE_CACHE_SIZE", DEFAULT_QUOTE_CACHE_SIZE, int),
+        )
+    except (TypeError, ValueError) as e:
+        print("Warning: invalid Shippo quote cache settings ({}); using defaults".format(e))
+        _quote_cache = QuoteCache()
+    return _quote_cache
+
+
+def quote_cache_key(address_from, address_to, parcel):
+    """ZIP-level key: ship-from ZIP/country, destination ZIP5/state/country, normalized parcel."""
+    return (
+        (address_from.get("zip") or "")[:5],
+        (address_from.get("country") or "").upper(),
+        (address_to.get("zip") or "")[:5],
+        (address_to.get("state") or "").upper(),
+        (address_to.get("country") or "").upper(),
+        parcel["length"], parcel["width"], parcel["height"], parcel["distance_unit"],
+        parcel["weight"], parcel["mass_unit"],
+    )
+
+
+def quote_rates(app, address_to, parcel):
+    """
+    Normalized rates for a destination/parcel, from the quote cache when fresh.
+    Returns {'rates', 'shipment_status', 'cached'}; raises like request_shipment_rates.
+    """
+    address_from = get_address_from(app)
+    key = quote_cache_key(address_from, address_to, parcel)
+    cached = _quote_cache.get(key)
+    if cached is not None:
+        return dict(cached, cached=True)
+    shipment = request_shipment_rates(get_shippo_token(app), address_from, address_to, parcel)
+    quote = {"rates": normalize_rates(shipment), "shipment_status": shipment.get("status")}
+    # Only complete quotes are reused; an empty or partial carrier poll is retried next time
+    if quote["rates"] and quote["shipment_status"] in (None, "SUCCESS"):
+        _quote_cache.set(key, quote)
+    return dict(quote, cached=False)
+
+
+def ship_to_body(ship_to, parcel_fields=None):
+    """eBay ship_to_address (see extract_ship_to_address_from_fulfillment_order) -> rate request body."""
+    body = dict(parcel_fields or {})
+    body.update({
+        "to_name": ship_to.get("name"),
+        "to_street1": ship_to.get("street1"),
+        "to_city": ship_to.get("city"),
+        "to_state": ship_to.get("state"),
+        "to_zip": ship_to.get("postal_code"),
+        "to_country": ship_to.get("country"),
+    })
+    return body
+
+
+def quote_batch(app, bodies, max_workers=None):
+    """
+    Quote many rate request bodies at once. Shipments with the same quote_cache_key are quoted once;
+    the rest run concurrently, at most max_workers (SHIPPO_BATCH_CONCURRENCY) at a time.
+    Returns one result per body, in order: quote_rates' dict plus 'success', or
+    {'success': False, 'message'} for a body that failed validation or quoting.
+    """
+    if max_workers is None:
+        max_workers = settings.get(app, "SHIPPO_BATCH_CONCURRENCY", DEFAULT_BATCH_CONCURRENCY, int)
+    address_from = get_address_from(app)
+    results = [None] * len(bodies)
+    shipments = OrderedDict()  # quote_cache_key -> (address_to, parcel, [indexes])
+    for index, body in enumerate(bodies):
+        try:
+            address_to = build_address_to(body)
+            parcel = build_parcel(body)
+        except ValueError as e:
+            results[index] = {"success": False, "message": str(e)}
+            continue
+        key = quote_cache_key(address_from, address_to, parcel)
+        shipments.setdefault(key, (address_to, parcel, []))[2].append(index)
+
+    def quote(shipment):
+        address_to, parcel, _ = shipment
+        try:
+            return dict(quote_rates(app, address_to, parcel), success=True)
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+
+    if shipments:
+        workers = max(1, min(int(max_workers), len(shipments)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for shipment, result in zip(shipments.values(), pool.map(quote, shipments.values())):
+                for index in shipment[2]:
+                    results[index] = result
+    return results
+
+
+JOB_KEY_PREFIX = "shippo-job:"
+
+
+class JobStore:
+    """Async quote jobs by id in a reports_cache backend shared by all workers, dropped after ttl seconds."""
+
+    def __init__(self, ttl=600, backend=None):
+        self.ttl = ttl
+        self._backend = backend
+
+    def _store(self):
+        return self._backend or reports_cache.get_backend()
+
+    def get(self, job_id):
+        try:
+            payload = self._store().get(JOB_KEY_PREFIX + job_id)
+            job = json.loads(payload.decode("utf-8")) if payload is not None else None
+        except Exception as e:
+            print("Shippo quote job read failed: {}".format(e))
+            return None
+        if not isinstance(job, dict):
+            return None
+        if job.get("cache_key") is not None:
+            job["cache_key"] = tuple(job["cache_key"])  # JSON turns the key tuple into a list
+        return job
+
+    def put(self, job_id, job):
+        remaining = self.ttl - (time.time() - job["created_at"])
+        if remaining <= 0:
+            return
+        try:
+            self._store().set(JOB_KEY_PREFIX + job_id, json.dumps(job).encode("utf-8"), max(1, int(remaining)))
+        except Exception as e:
+            print("Shippo quote job write failed: {}".format(e))
+
+
+_jobs = JobStore()
+
+
+def _shipment_messages(shipment):
+    texts = []
+    for message in shipment.get("messages") or []:
+        text = message.get("text") if isinstance(message, dict) else message
+        if text:
+            texts.append(str(text))
+    return "; ".join(texts)
+
+
+def _job_view(job_id, job):
+    view = {"job_id": job_id, "status": job["status"], "rates": job.get("rates") or [],
+            "shipment_status": job.get("shipment_status"), "cached": job.get("cached", False)}
+    if job.get("message"):
+        view["message"] = job["message"]
+    if job.get("timed_out"):
+        view["timed_out"] = True
+    return view
+
+
+def _apply_shipment(job, shipment, timeout):
+    """Update job from a Shippo shipment; finish it on SUCCESS/ERROR or when timeout has passed."""
+    status = shipment.get("status")
+    job["shipment_status"] = status
+    job["rates"] = normalize_rates(shipment)
+    if status in PENDING_STATUSES:
+        if time.time() - job["created_at"] > timeout:
+            job["status"] = "done"
+            job["timed_out"] = True
+        return
+    if status == "ERROR" and not job["rates"]:
+        job["status"] = "error"
+        job["message"] = _shipment_messages(shipment) or "Shippo could not rate this shipment."
+        return
+    job["status"] = "done"
+    if job["rates"] and job.get("cache_key"):
+        _quote_cache.set(job["cache_key"], {"rates": job["rates"], "shipment_status": status})
+
+
+def start_quote_job(app, address_to, parcel, owner):
+    """
+    Start an async quote. Returns the job view: status 'done' right away on a quote-cache hit or a
+    shipment Shippo rated immediately, otherwise 'pending' with a job_id to pass to poll_quote_job.
+    """
+    address_from = get_address_from(app)
+    key = quote_cache_key(address_from, address_to, parcel)
+    cached = _quote_cache.get(key)
+    if cached is not None:
+        return _job_view(None, dict(cached, status="done", cached=True))
+    shipment = request_shipment_rates(get_shippo_token(app), address_from, address_to, parcel, async_mode=True)
+    job_id = shipment.get("object_id")
+    if not job_id or not JOB_ID_RE.match(job_id):
+        raise ValueError("Shippo did not return a shipment id for this quote.")
+    # Wall-clock created_at: the job may be polled from another worker process
+    job = {"owner": owner, "cache_key": key, "created_at": time.time(), "status": "pending"}
+    _apply_shipment(job, shipment, _async_timeout(app))
+    _jobs.put(job_id, job)
+    return _job_view(job_id, job)
+
+
+def poll_quote_job(app, job_id, owner):
+    """Current job view, polling Shippo while pending. None for an unknown id or another user's job."""
+    if not job_id or not JOB_ID_RE.match(job_id):
+        return None
+    job = _jobs.get(job_id)
+    if job is None or job["owner"] != owner:
+        return None
+    if job["status"] == "pending":
+        _apply_shipment(job, get_shipment(get_shippo_token(app), job_id), _async_timeout(app))
+        _jobs.put(job_id, job)
+    return _job_view(job_id, job)
+
+
+def _async_timeout(app):
+    return settings.get(app, "SHIPPO_ASYNC_TIMEOUT", DEFAULT_ASYNC_TIMEOUT, int)
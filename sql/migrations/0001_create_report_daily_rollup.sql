@@ -0,0 +1,57 @@
+-- Create report_daily_rollup table for profit, sales and purchase reports
+-- One row per group, account and day. Purchase columns are keyed by the collection date,
+-- sale columns by the sale date. set_data write functions recompute the affected days in
+-- the same transaction, so year and all-time reports scan days instead of items.
+
+CREATE TABLE IF NOT EXISTS `report_daily_rollup` (
+  `group_id` varchar(36) NOT NULL,
+  `account` varchar(36) NOT NULL DEFAULT '',
+  `rollup_date` date NOT NULL,
+  `purchase_count` int NOT NULL DEFAULT '0',
+  `purchase_spend` decimal(12,2) NOT NULL DEFAULT '0.00',
+  `purchase_items` int NOT NULL DEFAULT '0',
+  `purchase_net` decimal(12,2) NOT NULL DEFAULT '0.00',
+  `sale_items` int NOT NULL DEFAULT '0',
+  `sale_price` decimal(12,2) NOT NULL DEFAULT '0.00',
+  `shipping_fee` decimal(12,2) NOT NULL DEFAULT '0.00',
+  `returned_fee` decimal(12,2) NOT NULL DEFAULT '0.00',
+  `sale_net` decimal(12,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`group_id`, `account`, `rollup_date`),
+  KEY `idx_rollup_account_date` (`account`, `rollup_date`),
+  KEY `idx_rollup_group_date` (`group_id`, `rollup_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Backfill from existing data (safe to re-run: rebuilds every row)
+DELETE FROM `report_daily_rollup`;
+
+INSERT INTO `report_daily_rollup`
+    (group_id, account, rollup_date, purchase_count, purchase_spend, purchase_items, purchase_net,
+     sale_items, sale_price, shipping_fee, returned_fee, sale_net)
+SELECT group_id, account, rollup_date,
+    SUM(purchase_count), SUM(purchase_spend), SUM(purchase_items), SUM(purchase_net),
+    SUM(sale_items), SUM(sale_price), SUM(shipping_fee), SUM(returned_fee), SUM(sale_net)
+FROM (
+    SELECT c.group_id, COALESCE(c.account, '') AS account, c.date AS rollup_date,
+        1 AS purchase_count, c.price AS purchase_spend, 0 AS purchase_items, 0 AS purchase_net,
+        0 AS sale_items, 0 AS sale_price, 0 AS shipping_fee, 0 AS returned_fee, 0 AS sale_net
+    FROM collection c
+    WHERE c.group_id IS NOT NULL
+    UNION ALL
+    SELECT c.group_id, COALESCE(c.account, ''), c.date,
+        0, 0, 1, COALESCE(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0), 0),
+        0, 0, 0, 0, 0
+    FROM collection c
+    INNER JOIN items i ON i.group_id = c.id
+    LEFT JOIN sale s ON s.id = i.id
+    WHERE c.group_id IS NOT NULL
+    UNION ALL
+    SELECT c.group_id, COALESCE(c.account, ''), s.date,
+        0, 0, 0, 0,
+        1, s.price, COALESCE(s.shipping_fee, 0), COALESCE(s.returned_fee, 0),
+        COALESCE(s.price - s.shipping_fee - COALESCE(s.returned_fee, 0), 0)
+    FROM sale s
+    INNER JOIN items i ON s.id = i.id
+    INNER JOIN collection c ON i.group_id = c.id
+    WHERE c.group_id IS NOT NULL
+) x
+GROUP BY group_id, account, rollup_date;
@@ -0,0 +1,29 @@
+-- Create item_latest_sale table: the most recent sale row for each item
+-- Replaces the "SELECT s.id, MAX(s.date) ... GROUP BY s.id" self-join used by the group
+-- detail page, item search and profit drill-down. Maintained by set_data (set_sale_data,
+-- set_quick_sale, mark_item_returned and item creation) in the same transaction as the sale write.
+-- item_id uses the items.id collation so the join is a plain primary key lookup.
+
+CREATE TABLE IF NOT EXISTS `item_latest_sale` (
+  `item_id` varchar(36) CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci NOT NULL,
+  `price` decimal(6,2) NOT NULL DEFAULT '0.00',
+  `shipping_fee` decimal(5,2) DEFAULT '0.00',
+  `returned_fee` decimal(5,2) DEFAULT '0.00',
+  `sale_date` date DEFAULT NULL,
+  PRIMARY KEY (`item_id`),
+  KEY `idx_item_latest_sale_date` (`sale_date`),
+  CONSTRAINT `fk_item_latest_sale_item` FOREIGN KEY (`item_id`) REFERENCES `items` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Backfill from existing sales (safe to re-run)
+DELETE FROM `item_latest_sale`;
+
+INSERT INTO `item_latest_sale` (item_id, price, shipping_fee, returned_fee, sale_date)
+SELECT ranked.id, ranked.price, ranked.shipping_fee, ranked.returned_fee, ranked.date
+FROM (
+    SELECT s.id, s.price, s.shipping_fee, s.returned_fee, s.date,
+        ROW_NUMBER() OVER (PARTITION BY s.id ORDER BY s.date DESC, s.price DESC) AS rn
+    FROM sale s
+) ranked
+INNER JOIN items i ON i.id = ranked.id
+WHERE ranked.rn = 1;
@@ -0,0 +1,6 @@
+-- Roll back 0003_align_sale_id_collation.sql
+
+ALTER TABLE `sale` MODIFY `id` varchar(50) CHARACTER SET latin1 COLLATE latin1_swedish_ci DEFAULT NULL;
+ALTER TABLE `sale` CONVERT TO CHARACTER SET latin1;
+
+DELETE FROM `schema_migrations` WHERE `version` = '0003';
@@ -0,0 +1,8 @@
+-- Align sale.id with items.id (utf8mb4_0900_ai_ci)
+-- sale.id was latin1 while items.id is utf8mb4, so every `sale s JOIN items i ON s.id = i.id`
+-- converted one side per row and could not use idx_sale_id / the items primary key for the join.
+-- Item ids are ASCII UUIDs, so the conversion does not change any stored value.
+
+ALTER TABLE `sale` CONVERT TO CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci;
+
+ALTER TABLE `sale` MODIFY `id` varchar(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci DEFAULT NULL;
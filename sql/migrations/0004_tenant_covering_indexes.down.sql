@@ -0,0 +1,9 @@
+-- Roll back 0004_tenant_covering_indexes.sql
+
+ALTER TABLE `sale` ADD INDEX `idx_sale_items_collection` (`id`, `date`);
+ALTER TABLE `sale` DROP INDEX `idx_sale_id_date_amounts`;
+ALTER TABLE `items` DROP INDEX `idx_items_group_name`;
+ALTER TABLE `collection` DROP INDEX `idx_collection_account_date_price`;
+ALTER TABLE `collection` DROP INDEX `idx_collection_group_date_price`;
+
+DELETE FROM `schema_migrations` WHERE `version` = '0004';
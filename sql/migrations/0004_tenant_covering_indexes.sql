@@ -0,0 +1,18 @@
+-- Tenant-leading composite and covering indexes for the hot multi-tenant query shapes
+-- Almost every read filters on collection.group_id (the tenant), but collection was only
+-- indexed by account and date.
+
+-- Group list, year filters, get_years, yearly profit: group_id + date range, price read from the index
+ALTER TABLE `collection` ADD INDEX `idx_collection_group_date_price` (`group_id`, `date`, `price`);
+
+-- Profit drill-down and purchase totals by account + exact date, covering price
+ALTER TABLE `collection` ADD INDEX `idx_collection_account_date_price` (`account`, `date`, `price`);
+
+-- Items of a collection by name (group detail search/sort); the primary key rides along
+ALTER TABLE `items` ADD INDEX `idx_items_group_name` (`group_id`, `name`);
+
+-- Sale lookups from items: id equality, newest first, amounts read from the index
+ALTER TABLE `sale` ADD INDEX `idx_sale_id_date_amounts` (`id`, `date`, `price`, `shipping_fee`, `returned_fee`);
+
+-- Superseded by the covering index above
+ALTER TABLE `sale` DROP INDEX `idx_sale_items_collection`;
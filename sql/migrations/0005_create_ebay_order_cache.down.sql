@@ -0,0 +1,5 @@
+-- Roll back 0005_create_ebay_order_cache.sql (cached order breakdowns are refetched from eBay on demand)
+
+DROP TABLE IF EXISTS `ebay_order_cache`;
+
+DELETE FROM `schema_migrations` WHERE `version` = '0005';
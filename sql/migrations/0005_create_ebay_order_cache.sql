@@ -0,0 +1,25 @@
+-- Create ebay_order_cache table: normalized order/fee breakdowns from get_item_transaction_details
+-- Saves the GetOrders + getOrder(TAX_BREAKDOWN) round trips behind /api/ebay-item-data,
+-- /api/ebay-listing-data, /api/ebay-order-address and the sell/quick-sell prefill.
+-- One row per order line, so each sale of a multi-quantity listing keeps its own buyer and fees.
+-- Settled orders (paid and fulfilled with no change for EBAY_ORDER_SETTLE_DAYS, cancelled, or fully
+-- refunded) are kept with expires_at NULL; anything still open expires after EBAY_ORDER_CACHE_TTL.
+-- A listing's newest row is only trusted as its latest sale for EBAY_ORDER_CACHE_TTL after fetched_at;
+-- after that one GetOrders page is read again to find any later order.
+-- Keyed by tenant so one group never reads another group's buyer data for the same listing.
+
+CREATE TABLE IF NOT EXISTS `ebay_order_cache` (
+  `group_id` varchar(36) NOT NULL,
+  `order_line_item_id` varchar(100) NOT NULL,
+  `ebay_item_id` varchar(64) NOT NULL,
+  `order_id` varchar(64) DEFAULT NULL,
+  `order_created_at` datetime DEFAULT NULL,
+  `is_final` tinyint(1) NOT NULL DEFAULT '0',
+  `transaction_data` mediumtext NOT NULL,
+  `fetched_at` datetime NOT NULL,
+  `expires_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`group_id`, `order_line_item_id`),
+  KEY `idx_ebay_order_cache_item` (`group_id`, `ebay_item_id`, `order_created_at`),
+  KEY `idx_ebay_order_cache_order` (`group_id`, `order_id`),
+  KEY `idx_ebay_order_cache_expires` (`expires_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
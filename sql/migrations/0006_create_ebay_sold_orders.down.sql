@@ -0,0 +1,6 @@
+-- Roll back 0006_create_ebay_sold_orders.sql (the next sync after re-applying starts a fresh 90-day backfill)
+
+DROP TABLE IF EXISTS `ebay_sync_state`;
+DROP TABLE IF EXISTS `ebay_sold_orders`;
+
+DELETE FROM `schema_migrations` WHERE `version` = '0006';
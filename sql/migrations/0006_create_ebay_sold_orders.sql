@@ -0,0 +1,33 @@
+-- Create ebay_sold_orders and ebay_sync_state: local copy of sold eBay orders per account
+-- Filled by the background sync in ebay_sync.py (GetOrders by modification time) so
+-- /tools/ebay-sold-search reads from MySQL instead of calling GetMyeBaySelling per page load.
+-- One row per order line item. The GSale item for an order is looked up when the sold page is read
+-- (items.ebay_item_id within the account's collections), so linking an item shows up immediately.
+
+CREATE TABLE IF NOT EXISTS `ebay_sold_orders` (
+  `account` varchar(36) NOT NULL,
+  `order_line_item_id` varchar(100) NOT NULL,
+  `order_id` varchar(64) DEFAULT NULL,
+  `ebay_item_id` varchar(64) NOT NULL,
+  `title` varchar(255) DEFAULT NULL,
+  `price` decimal(10,2) NOT NULL DEFAULT '0.00',
+  `currency` char(3) NOT NULL DEFAULT 'USD',
+  `quantity` int NOT NULL DEFAULT '1',
+  `sold_at` datetime DEFAULT NULL,
+  `modified_at` datetime DEFAULT NULL,
+  `is_cancelled` tinyint(1) NOT NULL DEFAULT '0',
+  `synced_at` datetime NOT NULL,
+  PRIMARY KEY (`account`, `order_line_item_id`),
+  KEY `idx_ebay_sold_orders_account_sold` (`account`, `sold_at`),
+  KEY `idx_ebay_sold_orders_item` (`account`, `ebay_item_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Incremental sync cursor per account (times are UTC, as eBay reports them)
+CREATE TABLE IF NOT EXISTS `ebay_sync_state` (
+  `account` varchar(36) NOT NULL,
+  `last_mod_time` datetime DEFAULT NULL,
+  `last_run_at` datetime NOT NULL,
+  `last_success_at` datetime DEFAULT NULL,
+  `last_error` text,
+  PRIMARY KEY (`account`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
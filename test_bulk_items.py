@@ -0,0 +1,222 @@
+"""Tests for bulk item operations (set_data.set_items_bulk_* / remove_items_bulk and /api/items/bulk)"""
+import datetime
+
+import pytest
+
+flask = pytest.importorskip('flask')
+
+import reports_cache  # noqa: E402
+import set_data  # noqa: E402
+
+ACCOUNT = 'acct-1'
+GROUP = 'grp-1'
+# _item_report_dates rows: the purchase and sale dates of the items being changed
+ITEM_DATES = [{'group_date': datetime.date(2026, 3, 1), 'sale_date': datetime.date(2026, 3, 9)},
+              {'group_date': datetime.date(2026, 3, 1), 'sale_date': None}]
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+        self.rows = list(ITEM_DATES)
+        self.target = {'date': datetime.date(2026, 4, 1)}
+        self.rowcount = 2
+
+    def execute(self, sql, params=None):
+        self.executed.append((' '.join(sql.split()), list(params or ())))
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.target
+
+    def close(self):
+        pass
+
+    def statements(self, prefix):
+        return [(sql, params) for sql, params in self.executed if sql.startswith(prefix)]
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+
+class FakeMySQL:
+    def __init__(self, cursor):
+        self.connection = FakeConnection(cursor)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Stubbed cursor behind set_data plus the report-cache invalidations, inside a request for ACCOUNT"""
+    cursor = FakeCursor()
+    mysql = FakeMySQL(cursor)
+    invalidated = []
+    monkeypatch.setattr(set_data, 'mysql', mysql)
+    monkeypatch.setattr(reports_cache, 'invalidate_reports',
+                        lambda tenant, dates=None: invalidated.append((tenant, dates)))
+    app = flask.Flask(__name__)
+    app.secret_key = 'test'
+    with app.test_request_context():
+        flask.session.update(id=ACCOUNT, group_id=GROUP)
+        yield cursor, mysql.connection, invalidated
+
+
+def rollup_dates(cursor):
+    deletes = cursor.statements('DELETE FROM report_daily_rollup')
+    assert len(deletes) == 1
+    sql, params = deletes[0]
+    assert params[0] == GROUP
+    return set(params[1:])
+
+
+def test_dedupes_and_keeps_order():
+    assert set_data._validate_item_ids(['b', 'a', 'b']) == ['b', 'a']
+    assert set_data._validate_item_ids(('a',)) == ['a']
+
+
+@pytest.mark.parametrize('item_ids', [None, [], 'abc', {'a'}, ['x'] * (set_data.MAX_BULK_ITEMS + 1)])
+def test_rejects_bad_lists(item_ids):
+    with pytest.raises(ValueError, match='Invalid item IDs'):
+        set_data._validate_item_ids(item_ids)
+
+
+@pytest.mark.parametrize('bad', ['', None, 42, 'x' * 51])
+def test_rejects_bad_ids(bad):
+    with pytest.raises(ValueError, match='Invalid item ID'):
+        set_data._validate_item_ids(['ok', bad])
+
+
+def test_accepts_the_maximum():
+    ids = [str(i) for i in range(set_data.MAX_BULK_ITEMS)]
+    assert set_data._validate_item_ids(ids) == ids
+
+
+@pytest.mark.parametrize('call', [
+    lambda ids: set_data.set_items_bulk_mark_sold(ids, 1),
+    lambda ids: set_data.set_items_bulk_move(ids, 'col-2'),
+    lambda ids: set_data.set_items_bulk_category(ids, 'cat-1'),
+    set_data.remove_items_bulk,
+])
+def test_over_the_cap_runs_no_sql(db, call):
+    cursor, connection, invalidated = db
+    with pytest.raises(ValueError, match='Invalid item IDs'):
+        call([str(i) for i in range(set_data.MAX_BULK_ITEMS + 1)])
+    assert (cursor.executed, connection.commits, invalidated) == ([], 0, [])
+
+
+def test_mark_sold_is_scoped_to_the_account(db):
+    cursor, connection, invalidated = db
+    assert set_data.set_items_bulk_mark_sold(['a', 'b', 'a'], 1) == 2
+    (sql, params), = cursor.statements('UPDATE items')
+    assert 'c.account = %s' in sql and 'IN (%s, %s)' in sql
+    assert params == [1, 'a', 'b', ACCOUNT]
+    assert connection.commits == 1
+    assert invalidated == [(GROUP, {datetime.date(2026, 3, 1), datetime.date(2026, 3, 9)})]
+
+
+def test_mark_sold_rejects_bad_status(db):
+    cursor, connection, invalidated = db
+    with pytest.raises(ValueError, match='Invalid sold status'):
+        set_data.set_items_bulk_mark_sold(['a'], 2)
+    assert cursor.executed == []
+
+
+def test_move_refreshes_old_and_new_dates(db):
+    cursor, connection, invalidated = db
+    assert set_data.set_items_bulk_move(['a', 'b'], 'col-2') == 2
+    (sql, params), = cursor.statements('SELECT date FROM collection')
+    assert params == ['col-2', GROUP]
+    (sql, params), = cursor.statements('UPDATE items')
+    assert 'c.account = %s' in sql
+    assert params == ['col-2', 'a', 'b', ACCOUNT]
+    assert rollup_dates(cursor) == {'2026-03-01', '2026-03-09', '2026-04-01'}
+    assert connection.commits == 1
+    assert invalidated == [(GROUP, {datetime.date(2026, 3, 1), datetime.date(2026, 3, 9), datetime.date(2026, 4, 1)})]
+
+
+def test_move_rejects_a_collection_outside_the_group(db):
+    cursor, connection, invalidated = db
+    cursor.target = None
+    with pytest.raises(ValueError, match='Invalid group ID'):
+        set_data.set_items_bulk_move(['a'], 'other-col')
+    assert cursor.statements('UPDATE items') == []
+    assert (connection.commits, invalidated) == (0, [])
+
+
+def test_recategorize_leaves_reports_alone(db):
+    cursor, connection, invalidated = db
+    assert set_data.set_items_bulk_category(['a', 'b'], 'cat-1') == 2
+    (sql, params), = cursor.statements('UPDATE items')
+    assert 'c.account = %s' in sql
+    assert params == ['cat-1', 'a', 'b', ACCOUNT]
+    assert cursor.statements('DELETE FROM report_daily_rollup') == []
+    assert (connection.commits, invalidated) == (1, [])
+
+
+def test_remove_is_scoped_and_refreshes_the_rollup(db):
+    cursor, connection, invalidated = db
+    assert set_data.remove_items_bulk(['a', 'b']) == 2
+    (sql, params), = cursor.statements('DELETE i FROM items')
+    assert 'c.account = %s' in sql
+    assert params == ['a', 'b', ACCOUNT]
+    assert rollup_dates(cursor) == {'2026-03-01', '2026-03-09'}
+    assert connection.commits == 1
+    assert invalidated == [(GROUP, {datetime.date(2026, 3, 1), datetime.date(2026, 3, 9)})]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Logged-in test client for app.py with set_data on a stubbed cursor (skipped without the app's deps)"""
+    app_module = pytest.importorskip('app')
+    cursor = FakeCursor()
+    invalidated = []
+    monkeypatch.setattr(set_data, 'mysql', FakeMySQL(cursor))
+    monkeypatch.setattr(reports_cache, 'invalidate_reports',
+                        lambda tenant, dates=None: invalidated.append((tenant, dates)))
+    monkeypatch.setitem(app_module.app.config, 'EBAY_SOLD_SYNC_ENABLED', '0')
+    monkeypatch.setitem(app_module.app.config, 'EBAY_TOKEN_REFRESH_ENABLED', '0')
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as session:
+        session.update(loggedin=True, id=ACCOUNT, group_id=GROUP)
+    return test_client, cursor, invalidated
+
+
+def test_route_deletes_and_reports_the_count(client):
+    test_client, cursor, invalidated = client
+    response = test_client.post('/api/items/bulk', json={'operation': 'delete', 'item_ids': ['a', 'b']})
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'message': '2 item(s) deleted', 'count': 2}
+    (sql, params), = cursor.statements('DELETE i FROM items')
+    assert params == ['a', 'b', ACCOUNT]
+    assert invalidated == [(GROUP, {datetime.date(2026, 3, 1), datetime.date(2026, 3, 9)})]
+
+
+def test_route_rejects_more_than_the_cap(client):
+    test_client, cursor, invalidated = client
+    item_ids = [str(i) for i in range(set_data.MAX_BULK_ITEMS + 1)]
+    response = test_client.post('/api/items/bulk', json={'operation': 'mark_sold', 'item_ids': item_ids})
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'message': 'Invalid item IDs'}
+    assert cursor.executed == []
+
+
+@pytest.mark.parametrize('body, message', [
+    ({'operation': 'archive', 'item_ids': ['a']}, 'Unknown operation'),
+    ({'operation': 'mark_sold', 'item_ids': ['a'], 'sold': 'yes'}, 'Invalid sold status'),
+])
+def test_route_rejects_bad_requests(client, body, message):
+    test_client, cursor, invalidated = client
+    response = test_client.post('/api/items/bulk', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == message
+    assert cursor.executed == []
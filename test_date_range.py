@@ -0,0 +1,36 @@
+"""Tests for date selection -> BETWEEN bounds (get_data.date_range / date_filter_sql)"""
+import pytest
+
+pytest.importorskip('flask')
+
+import get_data  # noqa: E402
+
+
+@pytest.mark.parametrize('selection, expected', [
+    ('2026', ('2026-01-01', '2026-12-31')),
+    (2026, ('2026-01-01', '2026-12-31')),
+    ('2026-%-%', ('2026-01-01', '2026-12-31')),
+    ('%2026%', ('2026-01-01', '2026-12-31')),
+    ('2024-02', ('2024-02-01', '2024-02-29')),
+    ('2026-12', ('2026-12-01', '2026-12-31')),
+    ('2026-03-07', ('2026-03-07', '2026-03-07')),
+])
+def test_ranges(selection, expected):
+    assert get_data.date_range(selection) == expected
+
+
+@pytest.mark.parametrize('selection', [None, '', '%', '%-%-%', 'all', 'All'])
+def test_wildcards_have_no_range(selection):
+    assert get_data.date_range(selection) is None
+    assert get_data.date_filter_sql('c.date', selection) == ('', [])
+
+
+@pytest.mark.parametrize('selection', ['2026-13', '2026-02-30', 'junk'])
+def test_invalid_selection_matches_nothing(selection):
+    start, end = get_data.date_range(selection)
+    assert start > end
+
+
+def test_date_filter_sql():
+    assert get_data.date_filter_sql('c.date', '2026-03') == (
+        'AND c.date BETWEEN %s AND %s', ['2026-03-01', '2026-03-31'])
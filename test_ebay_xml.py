@@ -0,0 +1,116 @@
+"""Tests for Trading API XML extraction (ebay_xml)"""
+import xml.etree.ElementTree as ET
+
+import ebay_xml
+
+GET_ORDERS = """<?xml version="1.0" encoding="UTF-8"?>
+<GetOrdersResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+  <Ack>Warning</Ack>
+  <Errors><SeverityCode>Warning</SeverityCode><LongMessage>Deprecated field</LongMessage></Errors>
+  <HasMoreOrders>true</HasMoreOrders>
+  <OrderArray>
+    <Order>
+      <OrderID>11-1111-1111</OrderID>
+      <Subtotal currencyID="USD">40.00</Subtotal>
+      <Total currencyID="USD">47.50</Total>
+      <ShippingServiceSelected><ShippingServiceCost>5.00</ShippingServiceCost></ShippingServiceSelected>
+      <ShippingDetails><SalesTax><SalesTaxAmount>2.50</SalesTaxAmount></SalesTax></ShippingDetails>
+      <TransactionArray>
+        <Transaction>
+          <Item><ItemID>111</ItemID></Item>
+          <TransactionPrice>20.00</TransactionPrice>
+          <FinalValueFee>2.60</FinalValueFee>
+        </Transaction>
+        <Transaction>
+          <Item><ItemID>222</ItemID></Item>
+          <TransactionPrice>20.00</TransactionPrice>
+        </Transaction>
+      </TransactionArray>
+      <Fees>
+        <Fee><Name>Final Value Fee</Name><Fee>1.00</Fee></Fee>
+        <Fee><Name>Insertion Fee</Name><Fee>0.35</Fee></Fee>
+      </Fees>
+    </Order>
+    <Order>
+      <OrderID>22-2222-2222</OrderID>
+      <TransactionArray>
+        <Transaction><Item><ItemID>333</ItemID></Item></Transaction>
+      </TransactionArray>
+    </Order>
+  </OrderArray>
+</GetOrdersResponse>"""
+
+SOLD_ITEM = """<Item xmlns="urn:ebay:apis:eBLBaseComponents">
+  <ItemID>444</ItemID>
+  <Title>Vintage lamp</Title>
+  <Quantity>1</Quantity>
+  <SellingStatus><CurrentPrice currencyID="CAD">12.5</CurrentPrice><ListingStatus>Completed</ListingStatus></SellingStatus>
+  <ListingDetails><EndTime>2026-10-01T10:00:00.000Z</EndTime></ListingDetails>
+  <TransactionArray>
+    <Transaction>{transaction}</Transaction>
+  </TransactionArray>
+</Item>"""
+
+
+def parse(xml):
+    return ET.fromstring(xml.encode('utf-8'))
+
+
+def test_text_and_number_defaults():
+    root = parse(GET_ORDERS)
+    assert ebay_xml.text(root, ebay_xml.HAS_MORE_ORDERS) == 'true'
+    assert ebay_xml.text(root, ebay_xml.ORDER_ID, 'missing') == 'missing'
+    order = root.find(ebay_xml.ORDERS)
+    assert ebay_xml.number(order, ebay_xml.ORDER_TOTAL) == 47.5
+    assert ebay_xml.number(order, ebay_xml.ORDER_FEES, 1.0) == 1.0
+
+
+def test_api_error_skips_warnings():
+    assert ebay_xml.api_error(parse(GET_ORDERS)) is None
+    failed = parse('<R xmlns="urn:ebay:apis:eBLBaseComponents"><Errors><SeverityCode>Error</SeverityCode>'
+                   '<ShortMessage>Invalid token</ShortMessage></Errors></R>')
+    assert ebay_xml.api_error(failed) == 'Invalid token'
+
+
+def test_iter_order_transactions():
+    lines = [(ebay_xml.text(order, ebay_xml.ORDER_ID), item_id)
+             for order, _, item_id in ebay_xml.iter_order_transactions(parse(GET_ORDERS))]
+    assert lines == [('11-1111-1111', '111'), ('11-1111-1111', '222'), ('22-2222-2222', '333')]
+
+
+def test_order_breakdown_uses_reported_fees():
+    order, transaction, _ = next(ebay_xml.iter_order_transactions(parse(GET_ORDERS)))
+    data = ebay_xml.order_breakdown(order, transaction, '11-1111-1111')
+    assert data['final_price'] == 47.5
+    assert data['subtotal'] == 40.0
+    assert data['shipping'] == 5.0
+    assert data['sales_tax'] == 2.5
+    assert round(data['final_value_fee'], 2) == 3.6
+    assert data['listing_fees'] == 0.35
+    assert round(data['total_fees'], 2) == 3.95
+    assert round(data['net_earnings'], 2) == 43.55
+    assert data['order_id'] == '11-1111-1111'
+
+
+def test_final_value_fees_only_for_orders_reporting_one():
+    assert ebay_xml.final_value_fees(parse(GET_ORDERS)) == [
+        {'order_id': '11-1111-1111', 'final_value_fee': 2.6}]
+
+
+def test_sold_item():
+    item = ebay_xml.sold_item(parse(SOLD_ITEM.format(
+        transaction='<Status><eBayPaymentStatus>PaymentInProcess</eBayPaymentStatus></Status>'
+                    '<ContainingOrder><OrderStatus>Completed</OrderStatus></ContainingOrder>')))
+    assert item['itemId'] == '444'
+    assert item['price'] == 12.5
+    assert item['currency'] == 'CAD'
+    assert item['quantity'] == 1
+    assert item['end_time'] == '2026-10-01T10:00:00.000Z'
+    assert item['ebay_url'] == 'https://www.ebay.com/itm/444'
+    assert not item['is_cancelled']
+
+
+def test_sold_item_cancelled_when_every_transaction_is():
+    item = ebay_xml.sold_item(parse(SOLD_ITEM.format(
+        transaction='<ContainingOrder><OrderStatus>Cancelled</OrderStatus></ContainingOrder>')))
+    assert item['is_cancelled']
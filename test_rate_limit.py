@@ -0,0 +1,150 @@
+"""Tests for the eBay rate-limit governor (ebay_rate_limit)"""
+import threading
+import time
+
+import ebay_rate_limit
+from ebay_rate_limit import RateLimitGovernor
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None, content=b''):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+
+
+def test_family_for_classifies_ebay_urls():
+    assert ebay_rate_limit.family_for('https://api.ebay.com/ws/api.dll') == 'trading'
+    assert ebay_rate_limit.family_for('https://api.ebay.com/sell/inventory/v1/offer?sku=1') == 'sell_inventory'
+    assert ebay_rate_limit.family_for('https://api.ebay.com/sell/fulfillment/v1/order') == 'fulfillment'
+    assert ebay_rate_limit.family_for('https://apiz.ebay.com/sell/finances/v1/transaction') == 'finances'
+    assert ebay_rate_limit.family_for('https://svcs.ebay.com/services/search/FindingService/v1') == 'finding'
+    assert ebay_rate_limit.family_for('https://api.ebay.com/identity/v1/oauth2/token') is None
+
+
+def test_burst_then_rate_limit_for_low_priority():
+    governor = RateLimitGovernor(rates={'trading': (0.01, 2)}, max_wait=0)
+    assert governor.acquire('trading') is None
+    assert governor.acquire('trading') is None
+    assert governor.acquire('trading', 'low') == 'Trading call rate limit reached'
+
+
+def test_normal_call_waits_for_a_token():
+    governor = RateLimitGovernor(rates={'fulfillment': (20, 1)}, max_wait=1)
+    assert governor.acquire('fulfillment') is None
+    started = time.monotonic()
+    assert governor.acquire('fulfillment') is None
+    assert time.monotonic() - started >= 0.03
+
+
+def test_low_priority_shed_inside_reserve():
+    governor = RateLimitGovernor(daily_limits={'finances': 10}, reserve=0.5)
+    for _ in range(5):
+        assert governor.acquire('finances') is None
+    assert governor.acquire('finances', 'low') == 'Finances quota reserved for priority calls'
+    assert governor.acquire('finances') is None
+
+
+def test_families_have_their_own_buckets():
+    governor = RateLimitGovernor(max_wait=0)
+    rows = {r['family']: r for r in governor.snapshot()}
+    assert rows['sell_inventory']['burst'] > rows['trading']['burst']
+    # An offer fan-out drains Sell Inventory's bucket without touching Trading's
+    for _ in range(rows['sell_inventory']['burst']):
+        assert governor.acquire('sell_inventory') is None
+    assert governor.acquire('trading', 'low') is None
+
+
+def test_workers_share_the_daily_quota():
+    governor = RateLimitGovernor(daily_limits={'finding': 10}, reserve=0, workers=4)
+    assert governor.acquire('finding') is None
+    assert governor.acquire('finding') is None
+    assert governor.acquire('finding') == 'Finding daily quota exhausted'
+    governor.update_from_analytics([{'apiName': 'FindingAPI', 'resources': [
+        {'rates': [{'timeWindow': 86400, 'limit': 10, 'remaining': 8}]}]}])
+    row = next(r for r in governor.snapshot() if r['family'] == 'finding')
+    assert (row['remaining'], row['share_limit'], row['workers']) == (2, 2, 4)
+
+
+def test_configure_reads_per_family_settings(monkeypatch):
+    monkeypatch.setenv('EBAY_RATE_SELL_INVENTORY', '2')
+    monkeypatch.setenv('EBAY_RATE_BURST_SELL_INVENTORY', '3')
+    monkeypatch.setenv('EBAY_RATE_WORKERS', '2')
+    try:
+        rows = {r['family']: r for r in ebay_rate_limit.configure().snapshot()}
+    finally:
+        monkeypatch.undo()
+        ebay_rate_limit.configure()
+    assert rows['sell_inventory']['burst'] == 3
+    assert rows['trading']['burst'] == ebay_rate_limit.DEFAULT_RATES['trading'][1]
+    assert rows['trading']['share_limit'] == ebay_rate_limit.DEFAULT_DAILY_LIMITS['trading'] // 2
+
+
+def test_daily_quota_exhausted():
+    governor = RateLimitGovernor(daily_limits={'finding': 1}, reserve=0)
+    assert governor.acquire('finding') is None
+    assert governor.acquire('finding') == 'Finding daily quota exhausted'
+
+
+def test_429_pauses_bucket_without_exhausting_the_day():
+    governor = RateLimitGovernor(rates={'trading': (100, 5)}, max_wait=1, max_throttle_pause=0.1)
+    governor.record('trading', FakeResponse(429, {'Retry-After': '30'}))
+    # Low priority never waits, so the emptied bucket sheds it
+    assert governor.acquire('trading', 'low') == 'Trading call rate limit reached'
+    started = time.monotonic()
+    assert governor.acquire('trading') is None
+    assert time.monotonic() - started >= 0.09
+    row = next(r for r in governor.snapshot() if r['family'] == 'trading')
+    assert not row['exhausted']
+
+
+def test_quota_errors_exhaust_until_reset():
+    governor = RateLimitGovernor()
+    governor.record('trading', FakeResponse(200, content=b'<Errors><ErrorCode>518</ErrorCode></Errors>'))
+    assert governor.acquire('trading') == 'Trading daily quota exhausted'
+    governor.record('finding', FakeResponse(500, content=b'<errorId>10001</errorId><domain>RateLimiter</domain>'))
+    assert governor.acquire('finding') == 'Finding daily quota exhausted'
+    # A streamed body is never read
+    governor.record('fulfillment', FakeResponse(200, content=b'RateLimiter'), streamed=True)
+    assert governor.acquire('fulfillment') is None
+
+
+def test_response_headers_correct_the_estimate():
+    governor = RateLimitGovernor()
+    governor.record('sell_inventory', FakeResponse(200, {'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '7'}))
+    row = next(r for r in governor.snapshot() if r['family'] == 'sell_inventory')
+    assert (row['daily_limit'], row['remaining'], row['source']) == (100, 7, 'response headers')
+
+
+def test_update_from_analytics():
+    governor = RateLimitGovernor()
+    updated = governor.update_from_analytics([
+        {'apiName': 'TradingAPI', 'resources': [
+            {'rates': [{'timeWindow': 86400, 'limit': 5000, 'remaining': 4000, 'reset': '2026-10-19T07:00:00.000Z'},
+                       {'timeWindow': 3600, 'limit': 100, 'remaining': 0}]},
+        ]},
+        {'apiName': 'unknown', 'resources': []},
+    ])
+    assert updated == ['trading']
+    row = next(r for r in governor.snapshot() if r['family'] == 'trading')
+    assert (row['daily_limit'], row['remaining'], row['source']) == (5000, 4000, 'Analytics API')
+
+
+def test_priority_is_thread_local():
+    seen = []
+    with ebay_rate_limit.low_priority():
+        assert ebay_rate_limit.current_priority() == 'low'
+        worker = threading.Thread(target=lambda: seen.append(ebay_rate_limit.current_priority()))
+        worker.start()
+        worker.join()
+        priority = ebay_rate_limit.current_priority()
+
+        def restored():
+            with ebay_rate_limit.with_priority(priority):
+                seen.append(ebay_rate_limit.current_priority())
+
+        worker = threading.Thread(target=restored)
+        worker.start()
+        worker.join()
+    assert seen == ['normal', 'low']
+    assert ebay_rate_limit.current_priority() == 'normal'
@@ -0,0 +1,107 @@
+"""Tests for the report cache backends and JSON serialization (reports_cache)"""
+import datetime
+import decimal
+import os
+import stat
+
+import pytest
+
+import reports_cache
+from reports_cache import FileBackend, MemoryLRUBackend
+
+ROWS = [{'date': datetime.date(2026, 3, 1), 'sold_at': datetime.datetime(2026, 3, 1, 9, 30),
+         'profit': decimal.Decimal('12.50'), 'age': datetime.timedelta(days=2), 'name': 'Lamp'}]
+
+
+def key(tenant, start, end, name='profit'):
+    return reports_cache.get_cache_key(name, {}, tenant, (start, end))
+
+
+def test_dumps_loads_round_trip():
+    payload = reports_cache.dumps(ROWS)
+    assert b'pickle' not in payload
+    assert reports_cache.loads(payload) == ROWS
+
+
+def test_private_dir_is_created_0700(tmp_path):
+    path = str(tmp_path / 'cache')
+    reports_cache.ensure_private_dir(path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+
+
+def test_private_dir_is_tightened(tmp_path):
+    path = tmp_path / 'cache'
+    path.mkdir(mode=0o777)
+    os.chmod(str(path), 0o777)
+    reports_cache.ensure_private_dir(str(path))
+    assert stat.S_IMODE(os.stat(str(path)).st_mode) == 0o700
+
+
+def test_private_dir_rejects_a_file(tmp_path):
+    path = tmp_path / 'cache'
+    path.write_text('')
+    with pytest.raises(OSError):
+        reports_cache.ensure_private_dir(str(path))
+
+
+@pytest.fixture(params=['memory', 'file'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryLRUBackend(generation_path=str(tmp_path / 'generation'))
+    return FileBackend(str(tmp_path / 'cache'))
+
+
+def test_set_get_delete(backend):
+    k = key('g1', '2026-01-01', '2026-12-31')
+    assert backend.get(k) is None
+    backend.set(k, reports_cache.dumps(ROWS), 60)
+    assert reports_cache.loads(backend.get(k)) == ROWS
+    backend.delete(k)
+    assert backend.get(k) is None
+
+
+def test_expired_entries_are_dropped(backend):
+    k = key('g1', '2026-01-01', '2026-12-31')
+    backend.set(k, b'[]', -1)
+    assert backend.get(k) is None
+
+
+def test_invalidation_is_scoped_to_tenant_and_dates(backend):
+    march = key('g1', '2026-03-01', '2026-03-31')
+    june = key('g1', '2026-06-01', '2026-06-30')
+    all_dates = reports_cache.get_cache_key('profit', {}, 'g1')
+    other_tenant = key('g2', '2026-03-01', '2026-03-31')
+    for k in (march, june, all_dates, other_tenant):
+        backend.set(k, b'[]', 60)
+    backend.invalidate(reports_cache.tenant_scope('g1'),
+                       lambda k: reports_cache._key_covers_dates(k, ['2026-03-15']))
+    assert backend.get(march) is None
+    assert backend.get(all_dates) is None
+    assert backend.get(june) == b'[]'
+    assert backend.get(other_tenant) == b'[]'
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryLRUBackend(max_bytes=10)
+    backend.set('report:g:a', b'12345', 60)
+    backend.set('report:g:b', b'12345', 60)
+    backend.get('report:g:a')
+    backend.set('report:g:c', b'12345', 60)
+    assert backend.get('report:g:b') is None
+    assert backend.get('report:g:a') == b'12345'
+
+
+def test_memory_clear_reaches_other_workers(tmp_path):
+    generation = str(tmp_path / 'generation')
+    first, second = MemoryLRUBackend(generation_path=generation), MemoryLRUBackend(generation_path=generation)
+    second.set('report:g:a', b'[]', 60)
+    first.clear()
+    assert second.get('report:g:a') is None
+
+
+def test_file_backend_enforces_size(tmp_path):
+    backend = FileBackend(str(tmp_path / 'cache'), max_bytes=100)
+    for name in 'abcdef':
+        backend.set('report:g:' + name, b'x' * 30, 60)
+    assert len(backend.keys('report:')) < 6
+    assert backend.get('report:g:f') is not None
@@ -0,0 +1,45 @@
+"""Tests for response header normalization (response_headers)"""
+from response_headers import HeaderNormalizationMiddleware, normalize_headers
+
+
+def test_no_duplicates_returns_same_list():
+    headers = [('Content-Type', 'text/html'), ('Set-Cookie', 'a=1'), ('Set-Cookie', 'b=2'),
+               ('Date', 'Sat, 18 Oct 2026 12:00:00 GMT')]
+    assert normalize_headers(headers) is headers
+
+
+def test_first_occurrence_wins_case_insensitively():
+    headers = [('Content-Type', 'text/html'), ('Content-Length', '10'), ('content-type', 'application/json')]
+    assert normalize_headers(headers) == [('Content-Type', 'text/html'), ('Content-Length', '10')]
+
+
+def test_identical_cookies_collapse_distinct_ones_stay():
+    headers = [('Set-Cookie', 'session=abc'), ('Set-Cookie', 'theme=dark'), ('Set-Cookie', 'session=abc')]
+    assert normalize_headers(headers) == [('Set-Cookie', 'session=abc'), ('Set-Cookie', 'theme=dark')]
+
+
+def test_date_moves_to_end_when_rebuilt():
+    date = ('Date', 'Sat, 18 Oct 2026 12:00:00 GMT')
+    headers = [date, ('Vary', 'Cookie'), ('Vary', 'Accept'), ('Content-Length', '0'), date]
+    assert normalize_headers(headers) == [('Vary', 'Cookie'), ('Content-Length', '0'), date]
+
+
+def test_same_value_in_two_multi_headers_is_not_a_duplicate():
+    multi = frozenset(['set-cookie', 'link'])
+    headers = [('Set-Cookie', 'x'), ('Link', 'x'), ('Content-Type', 'text/plain')]
+    assert normalize_headers(headers, multi) == headers
+
+
+def test_middleware_normalizes_start_response():
+    captured = {}
+
+    def app(environ, start_response):
+        start_response('200 OK', [('X-A', '1'), ('x-a', '2')])
+        return [b'ok']
+
+    def start_response(status, headers, exc_info=None):
+        captured['status'], captured['headers'] = status, headers
+
+    body = HeaderNormalizationMiddleware(app)({}, start_response)
+    assert body == [b'ok']
+    assert captured == {'status': '200 OK', 'headers': [('X-A', '1')]}
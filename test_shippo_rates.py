@@ -0,0 +1,137 @@
+"""Tests for Shippo rate quoting (shippo_rates)"""
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+
+import reports_cache  # noqa: E402
+import shippo_rates  # noqa: E402
+from shippo_rates import JobStore, QuoteCache  # noqa: E402
+
+ADDRESS_FROM = {'name': 'Shipper', 'street1': '1 Main St', 'city': 'Austin', 'state': 'TX', 'zip': '78701',
+                'country': 'US'}
+SHIPMENT = {'status': 'SUCCESS', 'rates': [
+    {'amount': '9.10', 'currency': 'USD', 'provider': 'UPS', 'servicelevel': {'name': 'Ground'}},
+    {'amount': '5.25', 'currency': 'USD', 'provider': 'USPS', 'servicelevel': {'name': 'Ground Advantage'}},
+]}
+
+
+@pytest.fixture
+def shippo(monkeypatch):
+    """Stub the Shippo HTTP calls; returns the list of address_to dicts sent to /shipments/"""
+    calls = []
+    lock = threading.Lock()
+
+    def request_shipment_rates(token, address_from, address_to, parcel, async_mode=False):
+        with lock:
+            calls.append(address_to)
+        return dict(SHIPMENT, object_id='a' * 32)
+
+    monkeypatch.setattr(shippo_rates, 'get_address_from', lambda app: dict(ADDRESS_FROM))
+    monkeypatch.setattr(shippo_rates, 'get_shippo_token', lambda app: 'token')
+    monkeypatch.setattr(shippo_rates, 'request_shipment_rates', request_shipment_rates)
+    monkeypatch.setattr(shippo_rates, '_quote_cache', QuoteCache())
+    monkeypatch.setattr(shippo_rates, '_jobs', JobStore(backend=reports_cache.MemoryLRUBackend()))
+    return calls
+
+
+def test_quote_cache_ttl_and_lru():
+    cache = QuoteCache(ttl=60, max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    expired = QuoteCache(ttl=60)
+    expired.set('a', 1)
+    expired._entries['a'] = (time.monotonic() - 61, 1)
+    assert expired.get('a') is None
+
+
+def test_quote_cache_disabled_with_zero_ttl():
+    cache = QuoteCache(ttl=0)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+
+
+def test_cache_key_is_zip_level():
+    parcel = shippo_rates.build_parcel({'weight_lb': '2'})
+    one = shippo_rates.build_address_to({'to_zip': '10001-1234', 'to_state': 'ny', 'to_street1': '5 Elm'})
+    other = shippo_rates.build_address_to({'to_zip': '10001', 'to_state': 'NY', 'to_street1': '9 Oak'})
+    assert shippo_rates.quote_cache_key(ADDRESS_FROM, one, parcel) == shippo_rates.quote_cache_key(ADDRESS_FROM, other, parcel)
+
+
+def test_quote_rates_caches_complete_quotes(shippo):
+    address_to = shippo_rates.build_address_to({'to_zip': '10001', 'to_state': 'NY'})
+    parcel = shippo_rates.build_parcel({})
+    first = shippo_rates.quote_rates(None, address_to, parcel)
+    second = shippo_rates.quote_rates(None, address_to, parcel)
+    assert len(shippo) == 1
+    assert (first['cached'], second['cached']) == (False, True)
+    assert [r['provider'] for r in second['rates']] == ['USPS', 'UPS']
+
+
+def test_quote_batch_dedupes_and_keeps_order(shippo):
+    bodies = [
+        {'to_zip': '10001', 'to_state': 'NY', 'weight_lb': '1'},
+        {'to_zip': 'bad', 'to_state': 'NY'},
+        {'to_zip': '10001', 'to_state': 'NY', 'weight_lb': '1', 'to_street1': 'Other St'},
+        {'to_zip': '94105', 'to_state': 'CA', 'weight_lb': '1'},
+    ]
+    results = shippo_rates.quote_batch(None, bodies, max_workers=4)
+    assert len(shippo) == 2
+    assert [r['success'] for r in results] == [True, False, True, True]
+    assert 'ZIP' in results[1]['message']
+    assert results[0] is results[2]
+
+
+def test_quote_batch_reports_failures_per_body(shippo, monkeypatch):
+    def failing(token, address_from, address_to, parcel, async_mode=False):
+        raise ValueError('Invalid address')
+
+    monkeypatch.setattr(shippo_rates, 'request_shipment_rates', failing)
+    results = shippo_rates.quote_batch(None, [{'to_zip': '10001', 'to_state': 'NY'}], max_workers=1)
+    assert results == [{'success': False, 'message': 'Invalid address'}]
+
+
+def test_quote_jobs_are_owned_and_unknown_ids_not_found(shippo, monkeypatch):
+    monkeypatch.setattr(shippo_rates, 'request_shipment_rates',
+                        lambda *args, **kwargs: {'status': 'QUEUED', 'rates': [], 'object_id': 'b' * 32})
+    monkeypatch.setattr(shippo_rates, 'get_shipment', lambda token, job_id: dict(SHIPMENT, object_id=job_id))
+    address_to = shippo_rates.build_address_to({'to_zip': '10001', 'to_state': 'NY'})
+    parcel = shippo_rates.build_parcel({})
+    job = shippo_rates.start_quote_job(None, address_to, parcel, owner='user-1')
+    assert (job['job_id'], job['status']) == ('b' * 32, 'pending')
+    assert shippo_rates.poll_quote_job(None, 'b' * 32, owner='user-2') is None
+    assert shippo_rates.poll_quote_job(None, 'c' * 32, owner='user-1') is None
+    assert shippo_rates.poll_quote_job(None, '../shipments', owner='user-1') is None
+    done = shippo_rates.poll_quote_job(None, 'b' * 32, owner='user-1')
+    assert done['status'] == 'done' and len(done['rates']) == 2
+    # The finished job filled the quote cache
+    assert shippo_rates.start_quote_job(None, address_to, parcel, owner='user-3')['cached']
+
+
+def test_start_quote_job_requires_a_shipment_id(shippo, monkeypatch):
+    monkeypatch.setattr(shippo_rates, 'request_shipment_rates', lambda *args, **kwargs: {'status': 'QUEUED'})
+    with pytest.raises(ValueError):
+        shippo_rates.start_quote_job(None, shippo_rates.build_address_to({'to_zip': '10001', 'to_state': 'NY'}),
+                                     shippo_rates.build_parcel({}), owner='user-1')
+
+
+def test_jobs_are_visible_to_every_worker(tmp_path):
+    directory = str(tmp_path / 'cache')
+    # Two workers, each with its own backend object over the same directory
+    starter = JobStore(backend=reports_cache.FileBackend(directory))
+    poller = JobStore(backend=reports_cache.FileBackend(directory))
+    job = {'owner': 7, 'cache_key': ('78701', 'US'), 'created_at': time.time(), 'status': 'pending'}
+    starter.put('d' * 32, job)
+    assert poller.get('d' * 32) == job
+    assert poller.get('e' * 32) is None
+
+
+def test_expired_jobs_are_not_stored():
+    store = JobStore(ttl=60, backend=reports_cache.MemoryLRUBackend())
+    store.put('d' * 32, {'owner': 7, 'cache_key': None, 'created_at': time.time() - 61, 'status': 'pending'})
+    assert store.get('d' * 32) is None